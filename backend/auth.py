@@ -6,6 +6,8 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import os
 
+from utils.timing import span
+
 # Configuration
 SECRET_KEY = os.environ.get("JWT_SECRET_KEY", "rids-ngo-secret-key-change-in-production-2025")
 ALGORITHM = "HS256"
@@ -19,11 +21,13 @@ security = HTTPBearer()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    with span("bcrypt"):
+        return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """Hash a password."""
-    return pwd_context.hash(password)
+    with span("bcrypt"):
+        return pwd_context.hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
@@ -59,7 +63,8 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         raise credentials_exception
     
     email: str = payload.get("sub")
-    if email is None:
+    # Scoped tokens (e.g. event stream tickets) are not API credentials
+    if email is None or payload.get("scope"):
         raise credentials_exception
     
     return {"email": email, "payload": payload}
@@ -0,0 +1 @@
+# RIDS NGO Backend Benchmarks
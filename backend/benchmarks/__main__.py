@@ -0,0 +1,166 @@
+"""
+Offline benchmark for every API route.
+
+Drives the FastAPI app from main.py in-process over an ASGI transport
+against a local MongoDB (or mongomock-motor with --mock) seeded with a
+synthetic dataset, then reports throughput and latency percentiles.
+
+    cd backend
+    python -m benchmarks --mock --records 2000 --out benchmarks/results.json
+    python -m benchmarks --mongo-url mongodb://localhost:27017 --compare baseline.json
+    python -m benchmarks --mock --detect-blocking 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+
+def _start_image_server() -> str:
+    """Serve one generated JPEG locally so the image proxy never leaves the machine."""
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.new("RGB", (1600, 1000), (180, 90, 40)).save(buffer, "JPEG", quality=90)
+    payload = buffer.getvalue()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}/original.jpg"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[1])
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017",
+                        help="local mongod to benchmark against")
+    parser.add_argument("--mock", action="store_true", help="use mongomock-motor instead of a mongod")
+    parser.add_argument("--db-name", default="rids_bench", help="database to (re)create")
+    parser.add_argument("--records", type=int, default=1000, help="documents per collection")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per route")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=5, help="unmeasured requests per route")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", help="run routes whose 'METHOD /path' contains this text")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative regression before failing (default 0.2)")
+    parser.add_argument("--detect-blocking", type=float, metavar="MS",
+                        help="fail if any handler blocks the event loop longer than MS")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    image_url = _start_image_server()
+
+    # Configuration is read at import time, so it has to be in place first
+    os.environ["MONGO_URL"] = args.mongo_url
+    os.environ["DB_NAME"] = args.db_name
+    os.environ["IMAGE_ALLOWED_HOSTS"] = "127.0.0.1"
+    os.environ["IMAGE_CACHE_DIR"] = tempfile.mkdtemp(prefix="rids-bench-images-")
+    os.environ["SNAPSHOT_DIR"] = tempfile.mkdtemp(prefix="rids-bench-snapshots-")
+    os.environ["RAZORPAY_KEY_ID"] = "rzp_bench"
+    os.environ["RAZORPAY_KEY_SECRET"] = "bench"
+    os.environ["RECEIPTS_DIR"] = tempfile.mkdtemp(prefix="rids-bench-receipts-")
+    # One JSON line per request would dominate the output and the timings
+    os.environ["TIMING_LOG"] = "false"
+    # Every request comes from one address; limits would measure the limiter
+    os.environ["RATE_LIMITS_ENABLED"] = "false"
+    # Rebuilds here run while nothing else writes donations
+    os.environ["REBUILD_SETTLE_SECONDS"] = "0"
+    for var in ("SMTP_HOST", "SMTP_USER", "SMTP_PASSWORD"):
+        os.environ.pop(var, None)
+
+    from benchmarks import runner
+    from benchmarks.dataset import build_dataset
+    from benchmarks.scenarios import Context, WEBHOOK_SECRET
+    os.environ["RAZORPAY_WEBHOOK_SECRET"] = WEBHOOK_SECRET
+
+    app, database = runner.build_app(args.mock)
+    runner.stub_payment_gateway()
+
+    disposable = 2 * (args.requests + args.warmup)
+    data = build_dataset(args.records, disposable, args.seed)
+
+    from utils.blocking import blocking_detector
+
+    async def run():
+        token = await runner.load_dataset(database, data, disposable)
+        ctx = Context(data, token, image_url, args.seed, database)
+        # Startup runs after loading, which drops the database, so warm-up
+        # builds its indexes and caches on the data being measured
+        await app.router.startup()
+        try:
+            await runner.wait_until_warm()
+            if args.detect_blocking:
+                blocking_detector.threshold = args.detect_blocking / 1000
+                blocking_detector.start(app)
+            return await runner.run_all(app, ctx, args.requests, args.concurrency, args.warmup, args.only)
+        finally:
+            await app.router.shutdown()
+
+    results = asyncio.run(run())
+
+    missing = runner.uncovered_routes(app, runner.SCENARIOS)
+    if missing:
+        print("\nRoutes without a benchmark scenario:", *missing, sep="\n  ")
+
+    report = {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "backend": "mongomock" if args.mock else "mongod",
+            "records": args.records,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        },
+        "routes": results,
+    }
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"\nResults written to {args.out}")
+
+    offenders = blocking_detector.offenders()
+    if offenders:
+        print(f"\nEvent loop blocked for more than {args.detect_blocking:g} ms:")
+        for o in offenders:
+            print(f"  {o['route']}  {o['location']}  x{o['count']}  max {o['max_ms']} ms")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = runner.compare(results, baseline["routes"], args.tolerance)
+        if regressions:
+            print(f"\nRegressions against {args.compare}:", *regressions, sep="\n  ")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.compare}")
+
+    if offenders:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import random
+from uuid import uuid4
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from models import (
+    Program, News, Story, GalleryImage,
+    Donation, Inquiry, Volunteer, Newsletter,
+)
+from utils.matching import match_tokens
+
+CATEGORIES = ["Women Empowerment", "Child Development", "Healthcare", "Education", "Tribal Upliftment"]
+CITIES = ["Banswara", "Udaipur", "Jaipur", "Dungarpur", "Kushalgarh", "Sajjangarh"]
+IMAGE = "https://images.pexels.com/photos/4314674/pexels-photo-4314674.jpeg"
+
+# Collections that get extra records reserved for DELETE scenarios
+DISPOSABLE = ["programs", "news", "stories", "gallery", "inquiries", "volunteers", "newsletter"]
+
+
+def _created(rng: random.Random) -> datetime:
+    return datetime.utcnow() - timedelta(days=rng.randint(0, 730), seconds=rng.randint(0, 86400))
+
+
+def _record(collection: str, i: int, rng: random.Random) -> dict:
+    category = rng.choice(CATEGORIES)
+    if collection == "programs":
+        obj = Program(title=f"Program {i}", category=category, description="Synthetic program " * 8,
+                      image=IMAGE, beneficiaries=rng.randint(100, 20000),
+                      status=rng.choice(["active", "active", "inactive"]))
+    elif collection == "news":
+        obj = News(title=f"News {i}", excerpt="Synthetic excerpt " * 4, content="Body " * 200,
+                   category=rng.choice(["Announcement", "Success", "Event"]), image=IMAGE,
+                   date=_created(rng))
+    elif collection == "stories":
+        obj = Story(name=f"Beneficiary {i}", location=rng.choice(CITIES), story="Story text " * 30,
+                    image=IMAGE, program=category)
+    elif collection == "gallery":
+        obj = GalleryImage(url=f"{IMAGE}?v={i}", title=f"Image {i}", category=category)
+    elif collection == "donations":
+        obj = Donation(name=f"Donor {i}", email=f"donor{i}@example.org", phone=f"98{i:08d}"[-10:],
+                       amount=float(rng.choice([500, 1000, 2500, 5000, 10000])),
+                       type=rng.choice(["one-time", "one-time", "monthly"]),
+                       status=rng.choice(["completed", "completed", "pending", "failed"]),
+                       pan=f"ABCDE{i % 10000:04d}F", address=f"{i} Main Road, {rng.choice(CITIES)}")
+    elif collection == "inquiries":
+        obj = Inquiry(name=f"Visitor {i}", email=f"visitor{i}@example.org", subject="Question",
+                      message="Synthetic inquiry " * 10, status=rng.choice(["new", "replied", "closed"]))
+    elif collection == "volunteers":
+        obj = Volunteer(name=f"Volunteer {i}", email=f"volunteer{i}@example.org", phone="9876543210",
+                        city=rng.choice(CITIES), interest=category, availability="Weekends",
+                        status=rng.choice(["new", "contacted", "accepted", "rejected"]))
+    elif collection == "newsletter":
+        obj = Newsletter(email=f"reader{i}@example.org", status=rng.choice(["active", "active", "unsubscribed"]))
+    else:
+        raise ValueError(collection)
+
+    doc = obj.dict()
+    if "created_at" in doc:
+        doc["created_at"] = _created(rng)
+    if collection == "volunteers":
+        doc["match_tokens"] = match_tokens(doc)
+    if collection == "donations":
+        # What create-order stores; the webhook scenario looks donations up by it
+        doc["razorpay_order_id"] = f"order_{doc['id']}"
+    return doc
+
+
+def _jobs(records: int, disposable: int) -> List[dict]:
+    """Finished jobs to list and look up, and failed ones for the retry scenario."""
+    now = datetime.utcnow()
+    jobs = []
+    for i in range(records + disposable):
+        failed = i >= records
+        jobs.append({
+            "id": str(uuid4()), "type": "email.send", "payload": {"bench": i},
+            "status": "failed" if failed else "completed", "priority": 0,
+            "attempts": 5 if failed else 1, "max_attempts": 5, "run_at": now, "lease_until": None,
+            "locked_by": None, "last_error": "SMTP unavailable" if failed else None,
+            "created_at": now, "updated_at": now, "finished_at": now, "_bench_disposable": failed,
+        })
+    return jobs
+
+
+def build_dataset(records: int, disposable: int, seed: int) -> Dict[str, List[dict]]:
+    """
+    ``records`` documents per collection, plus ``disposable`` extra documents
+    in each DELETE-able collection (flagged with ``_bench_disposable``).
+    """
+    rng = random.Random(seed)
+    data = {}
+    for collection in ["programs", "news", "stories", "gallery", "donations",
+                       "inquiries", "volunteers", "newsletter"]:
+        docs = [_record(collection, i, rng) for i in range(records)]
+        if collection in DISPOSABLE:
+            for i in range(records, records + disposable):
+                doc = _record(collection, i, rng)
+                doc["_bench_disposable"] = True
+                docs.append(doc)
+        data[collection] = docs
+    data["jobs"] = _jobs(records, disposable)
+    return data
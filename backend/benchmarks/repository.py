@@ -0,0 +1,135 @@
+"""
+Repository writes against the handler code they replaced.
+
+Runs the pre-repository create/update sequences (copied from the old
+programs and inquiries handlers) and the Repository calls that replaced
+them on the same data, and reports latency and Mongo round-trips per
+operation.
+
+    cd backend
+    python -m benchmarks.repository --mock
+    python -m benchmarks.repository --mongo-url mongodb://localhost:27017
+"""
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List
+
+
+# ======================================================
+# BEFORE: the handlers' own queries
+# ======================================================
+async def legacy_create_program(db, program):
+    program_dict = program.dict()
+    program_dict["created_at"] = datetime.utcnow()
+    await db.programs.insert_one(program_dict)
+    return program
+
+
+async def legacy_update_program(db, program_id: str, update_data: dict):
+    from models import Program
+
+    existing = await db.programs.find_one({"id": program_id})
+    if not existing:
+        raise LookupError(program_id)
+    await db.programs.update_one({"id": program_id}, {"$set": update_data})
+    updated = await db.programs.find_one({"id": program_id})
+    updated.pop("_id", None)
+    return Program(**updated)
+
+
+async def legacy_update_inquiry(db, inquiry_id: str, new_status: str):
+    from models import Inquiry
+
+    result = await db.inquiries.update_one({"id": inquiry_id}, {"$set": {"status": new_status}})
+    if result.matched_count == 0:
+        raise LookupError(inquiry_id)
+    inquiry = await db.inquiries.find_one({"id": inquiry_id})
+    inquiry.pop("_id", None)
+    return Inquiry(**inquiry)
+
+
+# ======================================================
+# MEASUREMENT
+# ======================================================
+async def measure(operation: Callable[[int], Awaitable], requests: int) -> Dict[str, float]:
+    from benchmarks.runner import percentile, round_trips
+
+    latencies: List[float] = []
+    before = round_trips.count
+    for i in range(requests):
+        started = time.perf_counter()
+        await operation(i)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return {
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "round_trips": round((round_trips.count - before) / requests, 2),
+    }
+
+
+async def run(requests: int) -> Dict[str, Dict[str, float]]:
+    from db import get_db
+    from models import Inquiry, Program
+    from routers.inquiries import inquiries_repo
+    from routers.programs import programs_repo
+
+    db = get_db()
+    await db.client.drop_database(db.name)
+
+    def program(i):
+        return Program(title=f"Bench {i}", category="Education", description="Benchmark",
+                       image="https://example.org/x.jpg")
+
+    programs = [program(i) for i in range(requests)]
+    inquiries = [Inquiry(name="Bench", email="bench@example.org", subject="Benchmark", message="Benchmark")
+                 for _ in range(requests)]
+    await db.programs.insert_many([p.dict() for p in programs])
+    await db.inquiries.insert_many([q.dict() for q in inquiries])
+
+    pairs = {
+        "create program": (
+            lambda i: legacy_create_program(db, program(i)),
+            lambda i: programs_repo.create(program(i)),
+        ),
+        "update program": (
+            lambda i: legacy_update_program(db, programs[i].id, {"beneficiaries": i}),
+            lambda i: programs_repo.update(programs[i].id, {"beneficiaries": i + 1}),
+        ),
+        "update inquiry status": (
+            lambda i: legacy_update_inquiry(db, inquiries[i].id, "replied"),
+            lambda i: inquiries_repo.update(inquiries[i].id, {"status": "closed"}),
+        ),
+    }
+
+    results = {}
+    for name, (before, after) in pairs.items():
+        results[f"{name} (handler)"] = await measure(before, requests)
+        results[f"{name} (repository)"] = await measure(after, requests)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.repository", description=__doc__.splitlines()[1])
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--mock", action="store_true", help="use mongomock-motor instead of a mongod")
+    parser.add_argument("--db-name", default="rids_bench")
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    os.environ["MONGO_URL"] = args.mongo_url
+    os.environ["DB_NAME"] = args.db_name
+    os.environ["TIMING_LOG"] = "false"
+
+    from benchmarks.runner import build_app
+    build_app(args.mock)
+
+    for name, r in asyncio.run(run(args.requests)).items():
+        print(f"{name:<36} p50 {r['p50_ms']:>8.3f}  p95 {r['p95_ms']:>8.3f} ms  {r['round_trips']:>4.1f} rt/op")
+
+
+if __name__ == "__main__":
+    main()
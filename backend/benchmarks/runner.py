@@ -0,0 +1,345 @@
+import asyncio
+import functools
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List
+from urllib.parse import urlencode
+
+import httpx
+from fastapi.routing import APIRoute
+from pymongo import monitoring
+
+from benchmarks.scenarios import SCENARIOS, Context, Scenario, ADMIN_EMAIL, ADMIN_PASSWORD
+
+# Routers that exist in routers/ but are not mounted by main.py
+EXTRA_ROUTERS = ["news", "stories", "gallery", "dashboard"]
+
+
+# ======================================================
+# ROUND-TRIP COUNTING
+# ======================================================
+class RoundTripCounter(monitoring.CommandListener):
+    """Commands sent to the server; connection handshakes and heartbeats are not counted."""
+
+    IGNORED = {"hello", "ismaster", "isMaster", "endSessions", "saslStart", "saslContinue"}
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        if event.command_name not in self.IGNORED:
+            with self._lock:
+                self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+round_trips = RoundTripCounter()
+
+# mongomock methods that would each be one command against a server
+MOCK_COMMANDS = [
+    "find", "find_one", "insert_one", "insert_many", "update_one", "update_many", "replace_one",
+    "delete_one", "delete_many", "find_one_and_update", "find_one_and_replace", "find_one_and_delete",
+    "count_documents", "aggregate", "bulk_write", "create_index", "distinct",
+]
+
+
+def _count_mock_round_trips():
+    """mongomock emits no command events, so count its collection calls (outermost only) instead."""
+    from mongomock.collection import Collection
+
+    depth = threading.local()
+
+    def counted(method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            # find_one calls find internally; that is still one command
+            if not getattr(depth, "value", 0):
+                with round_trips._lock:
+                    round_trips.count += 1
+            depth.value = getattr(depth, "value", 0) + 1
+            try:
+                return method(*args, **kwargs)
+            finally:
+                depth.value -= 1
+        return wrapper
+
+    for name in MOCK_COMMANDS:
+        setattr(Collection, name, counted(getattr(Collection, name)))
+
+
+# ======================================================
+# APP + DATABASE STAND-IN
+# ======================================================
+def build_app(use_mock: bool):
+    """Import main.app, mount the remaining routers and optionally swap in mongomock."""
+    import importlib
+    import db
+    import main
+
+    mounted = {id(r.endpoint) for r in main.app.routes if isinstance(r, APIRoute)}
+    for name in EXTRA_ROUTERS:
+        module = importlib.import_module(f"routers.{name}")
+        if not any(id(r.endpoint) in mounted for r in module.router.routes):
+            main.app.include_router(module.router, prefix=main.API_PREFIX)
+
+    if use_mock:
+        from mongomock_motor import AsyncMongoMockClient
+        _count_mock_round_trips()
+        db._client = AsyncMongoMockClient()
+    else:
+        # Applies to clients created afterwards, i.e. the first get_db()
+        monitoring.register(round_trips)
+
+    return main.app, db.get_db()
+
+
+class _FakeOrders:
+    def __init__(self):
+        self._count = 0
+
+    def create(self, data):
+        self._count += 1
+        return {"id": f"order_bench_{self._count}", **data}
+
+
+class _FakeRazorpayClient:
+    """Razorpay is an external network call; the benchmark measures our side only."""
+
+    def __init__(self, auth=None):
+        self.order = _FakeOrders()
+
+
+def stub_payment_gateway():
+    import razorpay
+    razorpay.Client = _FakeRazorpayClient
+
+
+async def load_dataset(database, data: Dict[str, List[dict]], disposable_admins: int):
+    from auth import get_password_hash, create_access_token
+    from models import AdminUser
+    from utils.donors import backfill
+    from utils.receipts import financial_year, generate
+
+    await database.client.drop_database(database.name)
+
+    for collection, docs in data.items():
+        if docs:
+            await database[collection].insert_many([dict(d) for d in docs])
+
+    # Donor profiles are derived from completed donations
+    await backfill()
+    data["donors"] = await database.donors.find({}, {"_id": 0}).to_list(None)
+
+    # This financial year's 80G receipts, for the download scenario
+    await generate(financial_year(datetime.utcnow()))
+    data["receipts"] = await database.donations.find(
+        {"receipt_file": {"$exists": True}}, {"_id": 0, "id": 1}
+    ).to_list(None)
+    if not data["receipts"]:
+        raise SystemExit("No donation in the dataset qualifies for a receipt; raise --records")
+
+    hashed = get_password_hash(ADMIN_PASSWORD)
+    admins = [AdminUser(email=ADMIN_EMAIL, name="Bench Admin")]
+    admins += [AdminUser(email=f"bench-disposable{i}@rids.org", name="Disposable")
+               for i in range(disposable_admins)]
+    admin_docs = [{**a.dict(), "hashed_password": hashed} for a in admins]
+    for doc in admin_docs[1:]:
+        doc["_bench_disposable"] = True
+    await database.admin_users.insert_many([dict(d) for d in admin_docs])
+    data["admin_users"] = admin_docs
+
+    return create_access_token({"sub": ADMIN_EMAIL, "role": "admin", "name": "Bench Admin"})
+
+
+async def wait_until_warm(timeout: float = 120):
+    """Wait for the startup warm-up, so /ready is 200 and caches are primed."""
+    from utils.warmup import warmup
+
+    deadline = time.monotonic() + timeout
+    while not warmup.done:
+        if time.monotonic() > deadline:
+            raise SystemExit(f"Warm-up did not finish within {timeout:g}s: {warmup.report()}")
+        await asyncio.sleep(0.05)
+
+
+# ======================================================
+# MEASUREMENT
+# ======================================================
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _request_args(scenario: Scenario, ctx: Context) -> dict:
+    spec = scenario.build(ctx)
+    # Route templates may carry converters, e.g. {relative:path}
+    url = re.sub(r"\{(\w+):\w+\}", r"{\1}", scenario.path).format(**spec.get("path", {}))
+    headers = dict(ctx.auth) if scenario.auth else {}
+    headers.update(spec.get("headers", {}))
+    args = {"method": scenario.method, "url": url, "headers": headers}
+    for key in ("json", "params", "content"):
+        if key in spec:
+            args[key] = spec[key]
+    return args
+
+
+async def _first_chunk(app, args: dict) -> int:
+    """
+    Status of a response that never ends (Server-Sent Events), returned as
+    soon as its first chunk is sent; the client then disconnects.
+    httpx's ASGI transport would wait for the whole body.
+    """
+    path, _, query = args["url"].partition("?")
+    query = query or urlencode(args.get("params", {}))
+    headers = [(k.lower().encode(), v.encode()) for k, v in {"host": "bench", **args["headers"]}.items()]
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": args["method"], "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": query.encode(), "root_path": "", "headers": headers,
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+    first = asyncio.Event()
+    status_code = 0
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await first.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+        elif message["type"] == "http.response.body":
+            first.set()
+
+    await asyncio.wait_for(app(scope, receive, send), 10)
+    return status_code
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, ctx: Context,
+                       requests: int, concurrency: int, warmup: int, app=None) -> dict:
+    async def send(args: dict) -> int:
+        if scenario.stream:
+            return await _first_chunk(app, args)
+        return (await client.request(**args)).status_code
+
+    for _ in range(warmup):
+        if scenario.before:
+            await scenario.before(ctx)
+        await send(_request_args(scenario, ctx))
+
+    latencies: List[float] = []
+    errors = 0
+    statuses: Dict[int, int] = {}
+    remaining = requests
+    # Commands sent by the untimed before hooks, left out of round_trips
+    prepare_commands = 0
+
+    async def worker():
+        nonlocal remaining, errors, prepare_commands
+        while remaining > 0:
+            remaining -= 1
+            if scenario.before:
+                before = round_trips.count
+                await scenario.before(ctx)
+                prepare_commands += round_trips.count - before
+            args = _request_args(scenario, ctx)
+            started = time.perf_counter()
+            status_code = await send(args)
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[status_code] = statuses.get(status_code, 0) + 1
+            if status_code not in scenario.expect:
+                errors += 1
+
+    commands_before = round_trips.count
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(1 if scenario.serial else concurrency)])
+    elapsed = time.perf_counter() - started
+    commands = round_trips.count - commands_before - prepare_commands
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        # Includes background work the requests started, e.g. cache version bumps
+        "round_trips": round(commands / len(latencies), 2) if latencies else 0.0,
+    }
+
+
+def uncovered_routes(app, scenarios: List[Scenario]) -> List[str]:
+    covered = {s.name for s in scenarios}
+    missing = []
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        for method in sorted(route.methods):
+            name = f"{method} {route.path}"
+            if name not in covered:
+                missing.append(name)
+    return missing
+
+
+async def run_all(app, ctx: Context, requests: int, concurrency: int, warmup: int,
+                  only: str = None) -> Dict[str, dict]:
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for scenario in SCENARIOS:
+            if only and only not in scenario.name:
+                continue
+            results[scenario.name] = await run_scenario(
+                client, scenario, ctx, requests, concurrency, warmup, app=app
+            )
+            r = results[scenario.name]
+            print(
+                f"{scenario.name:<45} {r['throughput_rps']:>9.1f} rps  "
+                f"p50 {r['p50_ms']:>8.2f}  p95 {r['p95_ms']:>8.2f}  p99 {r['p99_ms']:>8.2f} ms  "
+                f"{r['round_trips']:>5.1f} rt/req"
+                + (f"  errors {r['errors']} {r['statuses']}" if r["errors"] else "")
+            )
+    return results
+
+
+# ======================================================
+# BASELINE COMPARISON
+# ======================================================
+def compare(current: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """Routes whose p95 grew, throughput fell (by more than ``tolerance``, 0.2 = 20%) or round-trips rose."""
+    regressions = []
+    for name, now in current.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        if before["p95_ms"] and now["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']} -> {now['p95_ms']} ms")
+        if before["throughput_rps"] and now["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {before['throughput_rps']} -> {now['throughput_rps']} rps"
+            )
+        if "round_trips" in before and now["round_trips"] > before["round_trips"]:
+            regressions.append(f"{name}: round-trips {before['round_trips']} -> {now['round_trips']} per request")
+        if now["errors"] > before.get("errors", 0):
+            regressions.append(f"{name}: errors {before.get('errors', 0)} -> {now['errors']}")
+    return regressions
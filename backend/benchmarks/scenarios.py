@@ -0,0 +1,282 @@
+import hashlib
+import hmac
+import itertools
+import json
+import random
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+ADMIN_EMAIL = "bench-admin@rids.org"
+ADMIN_PASSWORD = "bench-password"
+WEBHOOK_SECRET = "bench-webhook-secret"
+
+
+class Context:
+    """Ids from the synthetic dataset plus per-run helpers for building requests."""
+
+    def __init__(self, data: Dict[str, List[dict]], token: str, image_url: str, seed: int, database=None):
+        self.rng = random.Random(seed)
+        self.db = database
+        self.ids = {
+            coll: [d["id"] for d in docs if not d.get("_bench_disposable")]
+            for coll, docs in data.items()
+        }
+        self.disposable = {
+            coll: [d["id"] for d in docs if d.get("_bench_disposable")]
+            for coll, docs in data.items()
+        }
+        self.emails = {
+            coll: [d["email"] for d in docs if "email" in d and not d.get("_bench_disposable")]
+            for coll, docs in data.items()
+        }
+        self.auth = {"Authorization": f"Bearer {token}"}
+        self.image_url = image_url
+        self._counter = itertools.count()
+
+    def any_id(self, collection: str) -> str:
+        return self.rng.choice(self.ids[collection])
+
+    def take(self, collection: str) -> str:
+        """A record that may be deleted; falls back to a missing id once the pool is empty."""
+        pool = self.disposable.get(collection)
+        return pool.pop() if pool else f"missing-{next(self._counter)}"
+
+    def unique(self) -> int:
+        return next(self._counter)
+
+
+@dataclass
+class Scenario:
+    method: str
+    path: str
+    build: Callable[[Context], dict] = lambda ctx: {}
+    auth: bool = False
+    expect: Set[int] = field(default_factory=lambda: {200, 201})
+    # Untimed preparation before every request
+    before: Optional[Callable[[Context], Awaitable]] = None
+    # One request at a time, for endpoints that only succeed once per state
+    serial: bool = False
+    # Never-ending response: timed until its first chunk
+    stream: bool = False
+
+    @property
+    def name(self) -> str:
+        return f"{self.method} {self.path}"
+
+
+def _program(ctx):
+    return {"title": f"Bench program {ctx.unique()}", "category": "Education",
+            "description": "Benchmark", "image": ctx.image_url, "beneficiaries": 10}
+
+
+def _news(ctx):
+    return {"title": f"Bench news {ctx.unique()}", "excerpt": "Benchmark",
+            "category": "Event", "image": ctx.image_url}
+
+
+def _story(ctx):
+    return {"name": f"Bench story {ctx.unique()}", "location": "Banswara",
+            "story": "Benchmark", "image": ctx.image_url, "program": "Education"}
+
+
+def _gallery(ctx):
+    return {"url": f"{ctx.image_url}?bench={ctx.unique()}", "title": "Bench", "category": "Community"}
+
+
+def _inquiry(ctx):
+    return {"name": "Bench", "email": f"bench{ctx.unique()}@example.org",
+            "subject": "Benchmark", "message": "Benchmark inquiry"}
+
+
+def _volunteer(ctx):
+    return {"name": "Bench", "email": f"bench{ctx.unique()}@example.org", "phone": "9876543210",
+            "city": "Udaipur", "interest": "Education", "availability": "Weekends"}
+
+
+def _admin(ctx):
+    return {"email": f"bench-user{ctx.unique()}@rids.org", "name": "Bench", "password": "bench-pass"}
+
+
+def _ndjson(ctx, lines: int = 100):
+    return "\n".join(json.dumps(_gallery(ctx)) for _ in range(lines))
+
+
+def _webhook(ctx):
+    order_id = f"order_{ctx.any_id('donations')}"
+    body = json.dumps({
+        "event": "payment.captured",
+        "payload": {"payment": {"entity": {"id": f"pay_bench_{ctx.unique()}", "order_id": order_id}}},
+    })
+    signature = hmac.new(WEBHOOK_SECRET.encode(), body.encode(), hashlib.sha256).hexdigest()
+    return {"content": body, "headers": {"X-Razorpay-Signature": signature}}
+
+
+def _explainable_shape(ctx):
+    from utils.querystats import query_stats
+    shapes = [s["shape_id"] for s in query_stats.top(100) if s["sample"]]
+    return ctx.rng.choice(shapes) if shapes else "none-recorded"
+
+
+async def _no_admins(ctx):
+    await ctx.db.admin_users.delete_many({})
+
+
+def _snapshot_file(ctx):
+    from utils.snapshots import read_manifest
+    files = read_manifest()["files"]
+    return files[ctx.rng.choice(sorted(files))] if files else "missing.json"
+
+
+def _status_routes(collection: str, param: str, statuses: List[str], create) -> List[Scenario]:
+    base = f"/api/{collection}"
+    return [
+        Scenario("GET", f"{base}/health"),
+        Scenario("POST", base, lambda ctx: {"json": create(ctx)}),
+        Scenario("GET", base, auth=True),
+        Scenario("PUT", f"{base}/bulk/status", lambda ctx: {"json": {
+            "ids": [ctx.any_id(collection) for _ in range(20)],
+            "status": ctx.rng.choice(statuses),
+        }}, auth=True),
+        Scenario("POST", f"{base}/bulk/delete",
+                 lambda ctx: {"json": {"ids": [ctx.take(collection)]}}, auth=True),
+        Scenario("PUT", f"{base}/{{{param}}}", lambda ctx: {
+            "path": {param: ctx.any_id(collection)}, "json": {"status": ctx.rng.choice(statuses)},
+        }, auth=True),
+        Scenario("DELETE", f"{base}/{{{param}}}", lambda ctx: {"path": {param: ctx.take(collection)}},
+                 auth=True, expect={200, 404}),
+    ]
+
+
+def _content_routes(collection: str, param: str, create, update: dict, list_path: str = None) -> List[Scenario]:
+    base = f"/api/{collection}"
+    list_path = list_path or base
+    return [
+        Scenario("GET", list_path),
+        Scenario("GET", f"{base}/{{{param}}}", lambda ctx: {"path": {param: ctx.any_id(collection)}}),
+        Scenario("POST", list_path, lambda ctx: {"json": create(ctx)}, auth=True),
+        Scenario("PUT", f"{base}/{{{param}}}",
+                 lambda ctx: {"path": {param: ctx.any_id(collection)}, "json": update}, auth=True),
+        Scenario("DELETE", f"{base}/{{{param}}}", lambda ctx: {"path": {param: ctx.take(collection)}},
+                 auth=True, expect={200, 404}),
+    ]
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario("GET", "/"),
+    Scenario("GET", "/ready"),
+    Scenario("GET", "/metrics"),
+
+    # Auth and users
+    Scenario("POST", "/api/auth/login",
+             lambda ctx: {"json": {"email": ADMIN_EMAIL, "password": ADMIN_PASSWORD}}),
+    Scenario("GET", "/api/auth/me", auth=True),
+    Scenario("POST", "/api/auth/register", lambda ctx: {"json": _admin(ctx)}, auth=True),
+    Scenario("GET", "/api/users", auth=True),
+    Scenario("POST", "/api/users", lambda ctx: {"json": _admin(ctx)}, auth=True),
+    Scenario("PUT", "/api/users/{user_id}",
+             lambda ctx: {"path": {"user_id": ctx.any_id("admin_users")}, "params": {"name": "Bench"}},
+             auth=True),
+    Scenario("DELETE", "/api/users/{user_id}", lambda ctx: {"path": {"user_id": ctx.take("admin_users")}},
+             auth=True, expect={200, 404}),
+
+    # Public content
+    Scenario("GET", "/api/programs/health"),
+    *_content_routes("programs", "program_id", _program, {"beneficiaries": 42}, list_path="/api/programs/"),
+    *_content_routes("news", "news_id", _news, {"excerpt": "Updated"}),
+    *_content_routes("stories", "story_id", _story, {"location": "Udaipur"}),
+    Scenario("GET", "/api/gallery"),
+    Scenario("POST", "/api/gallery", lambda ctx: {"json": _gallery(ctx)}, auth=True),
+    Scenario("POST", "/api/gallery/bulk",
+             lambda ctx: {"json": [_gallery(ctx) for _ in range(20)]}, auth=True),
+    Scenario("DELETE", "/api/gallery/{image_id}", lambda ctx: {"path": {"image_id": ctx.take("gallery")}},
+             auth=True, expect={200, 404}),
+
+    # Forms and admin triage
+    *_status_routes("inquiries", "inquiry_id", ["new", "replied", "closed"], _inquiry),
+    *_status_routes("volunteers", "volunteer_id", ["new", "contacted", "accepted", "rejected"], _volunteer),
+    Scenario("GET", "/api/volunteers/matches/{program_id}", lambda ctx: {
+        "path": {"program_id": ctx.any_id("programs")},
+        "params": {"city": ctx.rng.choice(["Udaipur", "Banswara"]), "page": ctx.rng.randint(1, 3)},
+    }, auth=True),
+
+    # Newsletter
+    Scenario("GET", "/api/newsletter", auth=True),
+    Scenario("GET", "/api/newsletter/stats", auth=True),
+    Scenario("POST", "/api/newsletter",
+             lambda ctx: {"json": {"email": f"bench{ctx.unique()}@example.org"}}),
+    Scenario("DELETE", "/api/newsletter/{subscriber_id}",
+             lambda ctx: {"path": {"subscriber_id": ctx.take("newsletter")}},
+             auth=True, expect={200, 404}),
+    Scenario("POST", "/api/newsletter/unsubscribe",
+             lambda ctx: {"params": {"email": ctx.rng.choice(ctx.emails["newsletter"])}}),
+
+    # Donations and reporting
+    Scenario("GET", "/api/donations/health"),
+    Scenario("GET", "/api/donations", auth=True),
+    Scenario("POST", "/api/donations/create-order", lambda ctx: {"json": {
+        "name": "Bench Donor", "email": f"donor{ctx.unique()}@example.org",
+        "phone": "9876543210", "amount": 1000,
+    }}),
+    Scenario("GET", "/api/donations/stats",
+             lambda ctx: {"params": {"period": ctx.rng.choice(["day", "week", "month"])}}, auth=True),
+    Scenario("POST", "/api/donations/webhook", _webhook),
+    Scenario("GET", "/api/donors/top", lambda ctx: {"params": {
+        "order_by": ctx.rng.choice(["total_amount", "donation_count", "last_gift_at"]),
+    }}, auth=True),
+    Scenario("GET", "/api/donors/{donor_id}",
+             lambda ctx: {"path": {"donor_id": ctx.any_id("donors")}}, auth=True),
+    # Queued only: the benchmark runs no job workers. Downloads read the
+    # receipts load_dataset generated up front.
+    Scenario("POST", "/api/donations/receipts", auth=True, expect={202}),
+    Scenario("GET", "/api/donations/{donation_id}/receipt",
+             lambda ctx: {"path": {"donation_id": ctx.any_id("receipts")}}, auth=True),
+    Scenario("GET", "/api/export/donations", auth=True),
+    Scenario("GET", "/api/dashboard/stats", auth=True),
+    Scenario("GET", "/api/dashboard/recent", auth=True),
+    Scenario("POST", "/api/seed/all", auth=True),
+    Scenario("POST", "/api/seed/generate", lambda ctx: {"json": {
+        "seed": ctx.unique(), "donations": 200, "volunteers": 50, "batch_size": 100,
+    }}, auth=True),
+
+    # Images and imports
+    Scenario("GET", "/api/images", lambda ctx: {"params": {
+        "url": ctx.image_url, "w": ctx.rng.choice([320, 640, 1280]),
+    }}),
+    Scenario("GET", "/api/images/stats", auth=True),
+    Scenario("POST", "/api/import/{collection}",
+             lambda ctx: {"path": {"collection": "gallery"}, "content": _ndjson(ctx)}, auth=True),
+
+    # Snapshots; published first so the reads find files
+    Scenario("POST", "/api/snapshots/publish", auth=True),
+    Scenario("GET", "/api/snapshots/manifest"),
+    Scenario("GET", "/api/snapshots/files/{relative:path}",
+             lambda ctx: {"path": {"relative": _snapshot_file(ctx)}}),
+    Scenario("GET", "/api/snapshots/{collection}",
+             lambda ctx: {"path": {"collection": ctx.rng.choice(["programs", "news", "stories", "gallery"])}}),
+    Scenario("GET", "/api/snapshots/{collection}/{item_id}",
+             lambda ctx: {"path": {"collection": "programs", "item_id": ctx.any_id("programs")}}),
+
+    # Diagnostics; explain runs before reset so it finds the shapes recorded
+    # so far. mongomock emits no command events, so under --mock it is a 404
+    Scenario("GET", "/api/diagnostics/queries", auth=True),
+    Scenario("POST", "/api/diagnostics/queries/{shape_id}/explain",
+             lambda ctx: {"path": {"shape_id": _explainable_shape(ctx)}}, auth=True, expect={200, 404}),
+    Scenario("POST", "/api/diagnostics/queries/reset", auth=True),
+    Scenario("GET", "/api/diagnostics/blocking", auth=True),
+    Scenario("POST", "/api/diagnostics/blocking/reset", auth=True),
+
+    Scenario("POST", "/api/events/ticket", auth=True),
+    # Time to the opening "retry:" line of an authenticated stream
+    Scenario("GET", "/api/events/stream", auth=True, stream=True),
+
+    # Jobs; retries use the failed jobs load_dataset reserved
+    Scenario("GET", "/api/jobs", lambda ctx: {"params": {"status_filter": "failed"}}, auth=True),
+    Scenario("GET", "/api/jobs/stats", auth=True),
+    Scenario("GET", "/api/jobs/{job_id}", lambda ctx: {"path": {"job_id": ctx.any_id("jobs")}}, auth=True),
+    Scenario("POST", "/api/jobs/{job_id}/retry",
+             lambda ctx: {"path": {"job_id": ctx.take("jobs")}}, auth=True),
+
+    # Last: the one-time setup only succeeds on an empty admin_users, so
+    # every request starts by emptying it
+    Scenario("POST", "/api/auth/setup", before=_no_admins, serial=True),
+]
@@ -0,0 +1,78 @@
+"""
+Contact-form submissions with and without the write-behind queue.
+
+Posts inquiries through the app, first inserted one per request and then
+handed to ``write_behind``, and reports throughput, latency and Mongo
+round-trips per submission for both. The write-behind figures include
+draining the queue at the end, so round-trips show the batching.
+
+    cd backend
+    python -m benchmarks.write_behind --mock
+    python -m benchmarks.write_behind --mongo-url mongodb://localhost:27017 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import time
+
+
+async def run(app, database, requests: int, concurrency: int) -> dict:
+    import httpx
+    from benchmarks.runner import round_trips, run_scenario
+    from benchmarks.scenarios import Context, Scenario, _inquiry
+    from utils.write_behind import write_behind
+
+    await database.inquiries.drop()
+    scenario = Scenario("POST", "/api/inquiries", lambda ctx: {"json": _inquiry(ctx)}, expect={201})
+    ctx = Context({}, "", "", seed=42)
+    results = {}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        write_behind.enabled = False
+        results["per request"] = await run_scenario(client, scenario, ctx, requests, concurrency, warmup=5)
+
+        write_behind.enabled = True
+        before = round_trips.count
+        result = await run_scenario(client, scenario, ctx, requests, concurrency, warmup=5)
+        started = time.perf_counter()
+        await write_behind.close()
+        result["drain_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        # Flushes of the warm-up requests included; batches make this a fraction
+        result["round_trips"] = round((round_trips.count - before) / requests, 3)
+        results["write-behind"] = result
+
+    stored = await database.inquiries.count_documents({})
+    expected = 2 * (requests + 5)
+    if stored != expected:
+        raise SystemExit(f"Expected {expected} stored inquiries, found {stored}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.write_behind", description=__doc__.splitlines()[1])
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--mock", action="store_true", help="use mongomock-motor instead of a mongod")
+    parser.add_argument("--db-name", default="rids_bench")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ["MONGO_URL"] = args.mongo_url
+    os.environ["DB_NAME"] = args.db_name
+    os.environ["TIMING_LOG"] = "false"
+    # Every request comes from one address; limits would measure the limiter
+    os.environ["RATE_LIMITS_ENABLED"] = "false"
+
+    from benchmarks.runner import build_app
+    app, database = build_app(args.mock)
+
+    results = asyncio.run(run(app, database, args.requests, args.concurrency))
+    for name, r in results.items():
+        drain = f"  drain {r['drain_ms']:.1f} ms" if "drain_ms" in r else ""
+        print(f"{name:<14} {r['throughput_rps']:>8.1f} rps  p50 {r['p50_ms']:>7.2f}  p95 {r['p95_ms']:>7.2f}  "
+              f"p99 {r['p99_ms']:>7.2f} ms  {r['round_trips']:>6.3f} rt/req{drain}")
+
+
+if __name__ == "__main__":
+    main()
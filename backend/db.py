@@ -1,9 +1,20 @@
 import os
 from motor.motor_asyncio import AsyncIOMotorClient
 
+from utils.metrics import mongo_metrics_listener
+from utils.querystats import query_stats
+from utils.timing import mongo_listener
+
+# Connections opened up front and kept open; see utils.warmup
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", 2))
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 100))
+
 # Global cached client (required for serverless)
 _client = None
 
+# Indexes already ensured by this process
+_ensured_indexes = set()
+
 def get_db():
     """
     Returns a MongoDB database instance.
@@ -20,7 +31,23 @@ def get_db():
             mongo_url,
             serverSelectionTimeoutMS=5000,   # ⏱ fail fast
             connectTimeoutMS=5000,
+            minPoolSize=MONGO_MIN_POOL_SIZE,
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            event_listeners=[mongo_listener, mongo_metrics_listener, query_stats],
         )
 
     db_name = os.getenv("DB_NAME", "rids_ngo")
     return _client[db_name]
+
+
+async def ensure_index(collection: str, keys, **kwargs):
+    """
+    Create an index once per process.
+    create_index is idempotent on the server, this only skips the round-trip.
+    """
+    marker = (collection, repr(keys), repr(sorted(kwargs.items())))
+    if marker in _ensured_indexes:
+        return
+
+    await get_db()[collection].create_index(keys, **kwargs)
+    _ensured_indexes.add(marker)
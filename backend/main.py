@@ -1,5 +1,9 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from typing import Optional
+import logging
+import os
 
 from routers.auth import router as auth_router
 from routers.users import router as users_router
@@ -8,21 +12,85 @@ from routers.inquiries import router as inquiries_router
 from routers.volunteers import router as volunteers_router
 from routers.donations import router as donations_router
 from routers.export import router as export_router
+from routers.images import router as images_router
+from routers.imports import router as imports_router
+from routers.diagnostics import router as diagnostics_router
+from routers.donors import router as donors_router
+from routers.snapshots import router as snapshots_router
+from routers.jobs import router as jobs_router
+from routers.events import router as events_router
+from routers.newsletter import router as newsletter_router
+from routers.seed import router as seed_router
+from utils.images import image_proxy
+from utils.write_behind import write_behind
+from utils.timing import TimingMiddleware
+from utils.metrics import MetricsMiddleware, loop_lag_monitor, registry
+from utils.blocking import blocking_detector, BLOCKING_DETECTOR
+from utils.cache import versions as cache_versions
+from utils.jobs import JOBS_ENABLED, worker as job_worker
+from utils.warmup import warmup, readiness
+from utils.events import events
 
 app = FastAPI(title="RIDS Backend")
 
+logger = logging.getLogger("main")
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# Added last so they wrap everything, CORS included
+app.add_middleware(TimingMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+# Optional bearer token for scrapers; unset leaves /metrics open
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
 @app.get("/")
 def root():
     return {"status": "ok"}
 
+@app.get("/ready")
+async def ready():
+    """Readiness: 200 once warmed up and Mongo answers a ping, 503 otherwise."""
+    report = await readiness()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+@app.get("/metrics", include_in_schema=False)
+def metrics(authorization: Optional[str] = Header(None)):
+    if METRICS_TOKEN and authorization != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.on_event("startup")
+async def startup():
+    loop_lag_monitor.start()
+    cache_versions.start()
+    warmup.start()
+    events.start()
+    if job_worker.concurrency:
+        job_worker.start()
+    elif JOBS_ENABLED:
+        logger.warning("JOBS_ENABLED is set but JOBS_WORKERS=0: jobs wait for a `python -m worker` process")
+    if BLOCKING_DETECTOR:
+        blocking_detector.start(app)
+
+@app.on_event("shutdown")
+async def shutdown():
+    await loop_lag_monitor.stop()
+    await cache_versions.stop()
+    await warmup.stop()
+    await events.stop()
+    await job_worker.stop()
+    await blocking_detector.stop()
+    await write_behind.close()
+    image_proxy.shutdown()
+
 API_PREFIX = "/api"
 
 app.include_router(auth_router, prefix=API_PREFIX)
@@ -32,3 +100,12 @@ app.include_router(inquiries_router, prefix=API_PREFIX)
 app.include_router(volunteers_router, prefix=API_PREFIX)
 app.include_router(donations_router, prefix=API_PREFIX)
 app.include_router(export_router, prefix=API_PREFIX)
+app.include_router(images_router, prefix=API_PREFIX)
+app.include_router(imports_router, prefix=API_PREFIX)
+app.include_router(diagnostics_router, prefix=API_PREFIX)
+app.include_router(donors_router, prefix=API_PREFIX)
+app.include_router(snapshots_router, prefix=API_PREFIX)
+app.include_router(jobs_router, prefix=API_PREFIX)
+app.include_router(events_router, prefix=API_PREFIX)
+app.include_router(newsletter_router, prefix=API_PREFIX)
+app.include_router(seed_router, prefix=API_PREFIX)
@@ -134,6 +134,25 @@ class Donation(DonationBase):
     payment_id: Optional[str] = None
     created_at: datetime = Field(default_factory=get_current_time)
 
+# ============ Donor Models ============
+class Donor(BaseModel):
+    id: str
+    name: str
+    email: str
+    phone: Optional[str] = None
+    total_amount: float = 0
+    donation_count: int = 0
+    largest_gift: float = 0
+    first_gift_at: Optional[datetime] = None
+    last_gift_at: Optional[datetime] = None
+    is_monthly: bool = False
+
+class DonorPage(BaseModel):
+    items: List[Donor]
+    page: int
+    page_size: int
+    total: int
+
 # ============ Contact Inquiry Models ============
 class InquiryBase(BaseModel):
     name: str
@@ -175,6 +194,16 @@ class Volunteer(VolunteerBase):
     status: str = "new"
     created_at: datetime = Field(default_factory=get_current_time)
 
+class VolunteerMatch(Volunteer):
+    match_score: int
+
+class VolunteerMatchPage(BaseModel):
+    items: List[VolunteerMatch]
+    page: int
+    page_size: int
+    total: int
+    tokens: List[str]  # the program's interest tokens that were matched on
+
 # ============ Newsletter Models ============
 class NewsletterBase(BaseModel):
     email: EmailStr
@@ -187,6 +216,39 @@ class Newsletter(NewsletterBase):
     status: str = "active"
     subscribed_at: datetime = Field(default_factory=get_current_time)
 
+# ============ Bulk Action Models ============
+class BulkFilter(BaseModel):
+    status: Optional[str] = None
+    created_before: Optional[datetime] = None
+    created_after: Optional[datetime] = None
+
+class BulkSelection(BaseModel):
+    ids: Optional[List[str]] = None
+    filter: Optional[BulkFilter] = None
+
+    def to_query(self) -> Optional[dict]:
+        """Mongo query for the selected records, or None if nothing was selected."""
+        if self.ids:
+            return {"id": {"$in": self.ids}}
+
+        if not self.filter:
+            return None
+
+        query = {}
+        if self.filter.status:
+            query["status"] = self.filter.status
+        created = {}
+        if self.filter.created_before:
+            created["$lt"] = self.filter.created_before
+        if self.filter.created_after:
+            created["$gte"] = self.filter.created_after
+        if created:
+            query["created_at"] = created
+        return query or None
+
+class BulkStatusUpdate(BulkSelection):
+    status: str
+
 # ============ Token Models ============
 class Token(BaseModel):
     access_token: str
@@ -0,0 +1,113 @@
+from typing import Any, Dict, Generic, List, Optional, Type, TypeVar
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from pymongo import ReturnDocument
+
+from db import get_db
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# Never ship Mongo's ObjectId back to the API layer
+PROJECTION = {"_id": 0}
+
+
+class Repository(Generic[ModelT]):
+    """
+    Async data access for one collection, keyed by the model's ``id`` field.
+    Every write that returns a record does so in a single round-trip and
+    every "missing record" surfaces as the same 404.
+    """
+
+    def __init__(self, collection: str, model: Type[ModelT], label: str):
+        self.collection_name = collection
+        self.model = model
+        self.label = label
+
+    @property
+    def collection(self):
+        return get_db()[self.collection_name]
+
+    def not_found(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"{self.label} not found"
+        )
+
+    # ======================================================
+    # READS
+    # ======================================================
+    async def get(self, record_id: str) -> ModelT:
+        doc = await self.collection.find_one({"id": record_id}, PROJECTION)
+        if not doc:
+            raise self.not_found()
+        return self.model(**doc)
+
+    async def get_many(self, ids: List[str]) -> List[ModelT]:
+        """Fetch several records in one query, in the order of ``ids``; unknown ids are skipped."""
+        docs = await self.collection.find(
+            {"id": {"$in": ids}}, PROJECTION
+        ).to_list(len(ids))
+        by_id = {d["id"]: d for d in docs}
+        return [self.model(**by_id[i]) for i in ids if i in by_id]
+
+    async def list(
+        self,
+        query: Optional[Dict[str, Any]] = None,
+        sort: str = "created_at",
+        limit: int = 100,
+    ) -> List[ModelT]:
+        docs = await (
+            self.collection
+            .find(query or {}, PROJECTION)
+            .sort(sort, -1)
+            .to_list(limit)
+        )
+        return [self.model(**d) for d in docs]
+
+    # ======================================================
+    # WRITES
+    # ======================================================
+    async def create(self, obj: ModelT) -> ModelT:
+        await self.collection.insert_one(obj.dict())
+        return obj
+
+    async def update(self, record_id: str, data: Dict[str, Any]) -> ModelT:
+        """Apply ``$set`` and return the updated record in one round-trip."""
+        if not data:
+            return await self.get(record_id)
+
+        doc = await self.collection.find_one_and_update(
+            {"id": record_id},
+            {"$set": data},
+            projection=PROJECTION,
+            return_document=ReturnDocument.AFTER,
+        )
+        if not doc:
+            raise self.not_found()
+        return self.model(**doc)
+
+    async def upsert(
+        self,
+        query: Dict[str, Any],
+        data: Dict[str, Any],
+        on_insert: Optional[Dict[str, Any]] = None,
+    ) -> ModelT:
+        """Update the record matching ``query`` or create it, returning the result."""
+        update = {"$set": data}
+        if on_insert:
+            update["$setOnInsert"] = on_insert
+
+        doc = await self.collection.find_one_and_update(
+            query,
+            update,
+            projection=PROJECTION,
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return self.model(**doc)
+
+    async def delete(self, record_id: str) -> None:
+        result = await self.collection.delete_one({"id": record_id})
+        if result.deleted_count == 0:
+            raise self.not_found()
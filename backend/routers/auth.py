@@ -1,8 +1,9 @@
 from fastapi import APIRouter, HTTPException, status, Depends
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
 from datetime import datetime, timedelta
 
+from db import get_db
+from utils.cache import bump_version
+from utils.rate_limit import rate_limit
 from models import AdminUserCreate, AdminUserLogin, AdminUser, Token
 from auth import (
     get_password_hash,
@@ -17,18 +18,6 @@ from auth import (
 # ======================================================
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
-# ======================================================
-# DATABASE
-# ======================================================
-MONGO_URL = os.environ.get("MONGO_URL")
-DB_NAME = os.environ.get("DB_NAME", "rids_ngo")
-
-if not MONGO_URL:
-    raise RuntimeError("MONGO_URL not set")
-
-client = AsyncIOMotorClient(MONGO_URL)
-db = client[DB_NAME]
-
 # ======================================================
 # SETUP INITIAL ADMIN (ONE TIME ONLY)
 # ======================================================
@@ -38,6 +27,7 @@ async def setup_initial_admin():
     Create the first admin user if none exists.
     Can be executed ONLY ONCE.
     """
+    db = get_db()
     admin_count = await db.admin_users.count_documents({})
     if admin_count > 0:
         raise HTTPException(
@@ -60,6 +50,7 @@ async def setup_initial_admin():
     user_data["id"] = admin_user.id
 
     await db.admin_users.insert_one(user_data)
+    await bump_version("admin_users")
 
     return {
         "message": "Initial admin created successfully",
@@ -71,11 +62,12 @@ async def setup_initial_admin():
 # ======================================================
 # ADMIN LOGIN
 # ======================================================
-@router.post("/login", response_model=Token)
+@router.post("/login", response_model=Token, dependencies=[Depends(rate_limit("auth.login"))])
 async def login(credentials: AdminUserLogin):
     """
     Admin login with email & password
     """
+    db = get_db()
     try:
         user = await db.admin_users.find_one(
             {"email": credentials.email}
@@ -133,6 +125,7 @@ async def login(credentials: AdminUserLogin):
 async def get_current_admin(
     current_user: dict = Depends(get_current_user)
 ):
+    db = get_db()
     user = await db.admin_users.find_one(
         {"email": current_user["email"]}
     )
@@ -158,6 +151,7 @@ async def register_admin(
     user: AdminUserCreate,
     current_user: dict = Depends(get_current_user),
 ):
+    db = get_db()
     existing = await db.admin_users.find_one(
         {"email": user.email}
     )
@@ -179,5 +173,6 @@ async def register_admin(
     user_data["id"] = admin_user.id
 
     await db.admin_users.insert_one(user_data)
+    await bump_version("admin_users")
 
     return admin_user
@@ -1,20 +1,22 @@
 from fastapi import APIRouter, Depends
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
 from datetime import datetime, timedelta
 
+from db import get_db
 from auth import get_current_user
+from utils.singleflight import SingleFlight
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
-# Database connection
-mongo_url = os.environ.get('MONGO_URL')
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ.get('DB_NAME', 'rids_ngo')]
+# A dashboard refresh by several admins at once runs the counts once
+stats_flight = SingleFlight("dashboard.stats")
 
 @router.get("/stats")
 async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
     """Get comprehensive dashboard statistics (admin only)."""
+    return await stats_flight.do("stats", _load_dashboard_stats)
+
+async def _load_dashboard_stats():
+    db = get_db()
     
     # Donation stats
     donation_pipeline = [
@@ -57,6 +59,7 @@ async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
 @router.get("/recent")
 async def get_recent_activity(current_user: dict = Depends(get_current_user)):
     """Get recent activity across all modules (admin only)."""
+    db = get_db()
     
     # Recent donations
     recent_donations = await db.donations.find().sort("created_at", -1).to_list(5)
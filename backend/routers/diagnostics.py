@@ -0,0 +1,87 @@
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from pymongo.errors import OperationFailure
+
+from db import get_db
+from auth import get_current_user
+from utils.querystats import query_stats
+from utils.blocking import blocking_detector
+
+# ======================================================
+# ROUTER
+# ======================================================
+router = APIRouter(prefix="/diagnostics", tags=["Diagnostics"])
+
+QUERY_ORDERINGS = ("total_ms", "avg_ms", "max_ms", "count", "slow", "returned")
+
+# ======================================================
+# QUERY SHAPES (ADMIN)
+# ======================================================
+@router.get("/queries")
+async def top_query_shapes(
+    limit: int = Query(20, ge=1, le=500),
+    order_by: str = "total_ms",
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Query shapes seen by this process, heaviest first.
+    Literal values are redacted; shapes differ only by fields and operators.
+    """
+    if order_by not in QUERY_ORDERINGS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"order_by must be one of: {', '.join(QUERY_ORDERINGS)}"
+        )
+    return {
+        "slow_threshold_ms": query_stats.slow_ms,
+        "shapes": query_stats.top(limit, order_by),
+    }
+
+
+@router.post("/queries/reset")
+async def reset_query_shapes(current_user: dict = Depends(get_current_user)):
+    query_stats.reset()
+    return {"message": "Query statistics reset"}
+
+
+@router.post("/queries/{shape_id}/explain")
+async def explain_query_shape(shape_id: str, current_user: dict = Depends(get_current_user)):
+    """Explain the latest query of a shape: documents examined vs returned and the plan used."""
+    stats = query_stats.get(shape_id)
+    if not stats:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Query shape not found"
+        )
+    if not stats.sample:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="This shape cannot be explained"
+        )
+
+    try:
+        summary = await query_stats.explain(get_db(), shape_id)
+    except OperationFailure as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Explain failed: {e}"
+        )
+    return {"shape_id": shape_id, **summary}
+
+
+# ======================================================
+# EVENT LOOP BLOCKING (ADMIN)
+# ======================================================
+@router.get("/blocking")
+async def blocking_offenders(current_user: dict = Depends(get_current_user)):
+    """Stalls of the event loop, grouped by route and the line of our code that blocked."""
+    return {
+        "enabled": blocking_detector.running,
+        "threshold_ms": blocking_detector.threshold * 1000,
+        "offenders": blocking_detector.offenders(),
+    }
+
+
+@router.post("/blocking/reset")
+async def reset_blocking_offenders(current_user: dict = Depends(get_current_user)):
+    blocking_detector.reset()
+    return {"message": "Blocking offenders reset"}
@@ -1,13 +1,27 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, HTTPException, status, Header, Depends, Request, Response
+import re
 import os
+import hmac
+import hashlib
+import json
 import razorpay
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Optional
 from uuid import uuid4
 
 from models import DonationCreate
 from db import get_db
-from utils.email import send_donation_emails   # ✅ EMAIL
+from auth import get_current_user
+from utils.email import send_donation_emails, enqueue_donation_emails   # ✅ EMAIL
+from utils.jobs import JOBS_ENABLED, enqueue
+from utils.idempotency import run_idempotent
+from utils.timing import span
+from utils.rate_limit import rate_limit
+from utils.donation_rollups import PERIODS, load_series
+from utils.donation_status import record_donation_created, set_donation_status
+from utils.retention import find_archived
+from utils.receipts import financial_year, generate, read_receipt, member_name
 
 router = APIRouter(prefix="/donations", tags=["Donations"])
 
@@ -21,10 +35,13 @@ async def health_check():
 
 
 @router.get("", status_code=200)
-async def get_all_donations():
+async def get_all_donations(archived: bool = False, current_user: dict = Depends(get_current_user)):
     """
-    Admin: Fetch all donations
+    Admin: Fetch all donations, or with ``archived`` the ones retention moved out
     """
+    if archived:
+        return await find_archived("donations", {}, 500)
+
     db = get_db()
     donations = await db.donations.find().sort("created_at", -1).to_list(500)
 
@@ -34,8 +51,69 @@ async def get_all_donations():
     return donations
 
 
-@router.post("/create-order", status_code=status.HTTP_201_CREATED)
-async def create_razorpay_order(donation: DonationCreate):
+# Default window per period when no range is given
+STATS_DEFAULT_WINDOW = {"day": timedelta(days=90), "week": timedelta(weeks=52), "month": timedelta(days=730)}
+
+
+@router.get("/stats")
+async def get_donation_stats(
+    period: str = "month",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Admin: completed donation totals, counts and averages per day, week or
+    month, with a breakdown by type. Served from the rollup collection.
+    """
+    if period not in PERIODS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"period must be one of: {', '.join(PERIODS)}"
+        )
+
+    end = end or datetime.utcnow()
+    start = start or end - STATS_DEFAULT_WINDOW[period]
+    series = await load_series(period, start, end)
+
+    total_count = sum(b["count"] for b in series)
+    total_amount = sum(b["amount"] for b in series)
+    return {
+        "period": period,
+        "start": start,
+        "end": end,
+        "totals": {
+            "count": total_count,
+            "amount": round(total_amount, 2),
+            "average": round(total_amount / total_count, 2) if total_count else 0,
+        },
+        "series": series,
+    }
+
+
+@router.post(
+    "/create-order",
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit("donations.create-order"))],
+)
+async def create_razorpay_order(
+    donation: DonationCreate,
+    idempotency_key: Optional[str] = Header(None),
+):
+    """
+    Create a donation and its Razorpay order.
+    Retries carrying the same Idempotency-Key replay the first response.
+    """
+    return await run_idempotent(
+        idempotency_key,
+        "donations.create-order",
+        donation,
+        lambda: _create_razorpay_order(donation),
+        status_code=status.HTTP_201_CREATED,
+    )
+
+
+async def _create_razorpay_order(donation: DonationCreate):
     RAZORPAY_KEY_ID = os.getenv("RAZORPAY_KEY_ID")
     RAZORPAY_KEY_SECRET = os.getenv("RAZORPAY_KEY_SECRET")
 
@@ -59,25 +137,35 @@ async def create_razorpay_order(donation: DonationCreate):
         "phone": donation.phone,
         "amount": donation.amount,
         "type": donation.type,
+        # An 80G receipt is only issued to a donation that carries a PAN
+        "pan": donation.pan,
+        "address": donation.address,
         "status": "pending",
         "created_at": datetime.utcnow(),
     }
 
+    recorded = False
     try:
         # Save donation
         await db.donations.insert_one(donation_doc)
+        await record_donation_created(donation_doc)
+        recorded = True
 
         # 🔔 SEND EMAILS (DONOR + OFFICIAL)
-        send_donation_emails(donation_doc)
+        if JOBS_ENABLED:
+            await enqueue_donation_emails(donation_doc)
+        else:
+            send_donation_emails(donation_doc)
 
         amount_paise = int(donation.amount * 100)
 
-        razorpay_order = razorpay_client.order.create({
-            "amount": amount_paise,
-            "currency": "INR",
-            "receipt": donation_id,
-            "payment_capture": 1,
-        })
+        with span("razorpay"):
+            razorpay_order = razorpay_client.order.create({
+                "amount": amount_paise,
+                "currency": "INR",
+                "receipt": donation_id,
+                "payment_capture": 1,
+            })
 
         await db.donations.update_one(
             {"id": donation_id},
@@ -102,12 +190,127 @@ async def create_razorpay_order(donation: DonationCreate):
     except Exception as e:
         logger.exception("Donation failed")
 
-        await db.donations.update_one(
-            {"id": donation_id},
-            {"$set": {"status": "failed", "error": str(e)}}
-        )
+        if recorded:
+            await set_donation_status({"id": donation_id}, "failed", error=str(e))
+        else:
+            # Never counted in the rollups, so there is no pending to move
+            await db.donations.update_one(
+                {"id": donation_id},
+                {"$set": {"status": "failed", "status_updated_at": datetime.utcnow(), "error": str(e)}}
+            )
 
         raise HTTPException(
             status_code=500,
             detail="Failed to create donation"
         )
+
+
+# ======================================================
+# RAZORPAY WEBHOOK
+# ======================================================
+@router.post("/webhook")
+async def razorpay_webhook(request: Request, x_razorpay_signature: Optional[str] = Header(None)):
+    """
+    Payment status from Razorpay. Deliveries are retried, so applying the
+    same event twice must be harmless; set_donation_status guarantees that.
+    """
+    secret = os.getenv("RAZORPAY_WEBHOOK_SECRET")
+    if not secret:
+        raise HTTPException(
+            status_code=503,
+            detail="Payment webhook not configured"
+        )
+
+    body = await request.body()
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    if not x_razorpay_signature or not hmac.compare_digest(expected, x_razorpay_signature):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid webhook signature"
+        )
+
+    try:
+        event = json.loads(body)
+    except ValueError:
+        event = None
+    if not isinstance(event, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid webhook payload"
+        )
+
+    payment = event.get("payload", {}).get("payment", {}).get("entity", {})
+    order_id = payment.get("order_id")
+    if not order_id:
+        return {"status": "ignored"}
+
+    if event.get("event") in ("payment.captured", "order.paid"):
+        updated = await set_donation_status(
+            {"razorpay_order_id": order_id}, "completed", payment_id=payment.get("id")
+        )
+    elif event.get("event") == "payment.failed":
+        updated = await set_donation_status(
+            {"razorpay_order_id": order_id}, "failed", error=payment.get("error_description")
+        )
+    else:
+        return {"status": "ignored"}
+
+    return {"status": "applied" if updated else "unchanged"}
+
+
+# ======================================================
+# 80G RECEIPTS (ADMIN ONLY)
+# ======================================================
+FY_PATTERN = re.compile(r"^\d{4}-\d{2}$")
+
+
+@router.post("/receipts", status_code=status.HTTP_202_ACCEPTED)
+async def generate_receipts(
+    background_tasks: BackgroundTasks,
+    fy: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Generate receipts for a financial year (default: the current one) on the
+    job workers, or after the response when jobs are disabled; running it
+    again resumes or tops up the year.
+    """
+    fy = fy or financial_year(datetime.utcnow())
+    if not FY_PATTERN.match(fy):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="fy must look like 2025-26"
+        )
+
+    if not JOBS_ENABLED:
+        # No worker would ever claim the job, as with the donation emails
+        background_tasks.add_task(generate, fy)
+        return {"job_id": None, "fy": fy}
+
+    job = await enqueue("receipts.generate", {"fy": fy})
+    return {"job_id": job["id"], "fy": fy}
+
+
+@router.get("/{donation_id}/receipt")
+async def download_receipt(donation_id: str, current_user: dict = Depends(get_current_user)):
+    donation = await get_db().donations.find_one(
+        {"id": donation_id}, {"_id": 0, "id": 1, "receipt_no": 1, "receipt_file": 1}
+    )
+    if not donation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Donation not found"
+        )
+
+    pdf = await read_receipt(donation)
+    if pdf is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Receipt not generated yet"
+        )
+
+    return Response(
+        pdf,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="{member_name(donation["receipt_no"])}"'},
+    )
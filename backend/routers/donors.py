@@ -0,0 +1,68 @@
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+
+from models import Donor, DonorPage
+from auth import get_current_user
+from repository import Repository, PROJECTION
+from utils.donors import DONORS, ensure_donor_indexes
+
+# ======================================================
+# ROUTER
+# ======================================================
+router = APIRouter(prefix="/donors", tags=["Donors"])
+
+# ======================================================
+# DATABASE
+# ======================================================
+donors_repo = Repository(DONORS, Donor, "Donor")
+
+TOP_ORDERINGS = ("total_amount", "donation_count", "last_gift_at")
+
+# ======================================================
+# TOP DONORS (ADMIN)
+# ======================================================
+@router.get("/top", response_model=DonorPage)
+async def get_top_donors(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    order_by: str = "total_amount",
+    monthly: bool = None,
+    current_user: dict = Depends(get_current_user),
+):
+    """Donors ranked by lifetime giving, gift count or most recent gift."""
+    if order_by not in TOP_ORDERINGS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"order_by must be one of: {', '.join(TOP_ORDERINGS)}"
+        )
+    await ensure_donor_indexes()
+
+    query = {}
+    if monthly is not None:
+        query["is_monthly"] = monthly
+
+    collection = donors_repo.collection
+    cursor = collection.find(query, PROJECTION).sort(order_by, -1)
+    items = await cursor.skip((page - 1) * page_size).to_list(page_size)
+    total = await collection.count_documents(query)
+    return {"items": items, "page": page, "page_size": page_size, "total": total}
+
+# ======================================================
+# DONOR DETAIL (ADMIN)
+# ======================================================
+@router.get("/{donor_id}")
+async def get_donor(
+    donor_id: str,
+    limit: int = Query(20, ge=1, le=200),
+    current_user: dict = Depends(get_current_user),
+):
+    """A donor's lifetime figures and their most recent completed donations."""
+    # id mirrors _id, so this is a primary-key lookup rather than a scan on id
+    doc = await donors_repo.collection.find_one({"_id": donor_id}, PROJECTION)
+    if not doc:
+        raise donors_repo.not_found()
+    donor = Donor(**doc)
+    cursor = donors_repo.collection.database.donations.find(
+        {"donor_id": donor_id}, PROJECTION
+    ).sort("created_at", -1)
+    donations = await cursor.to_list(limit)
+    return {**donor.dict(), "donations": donations}
@@ -0,0 +1,106 @@
+from fastapi import APIRouter, HTTPException, status, Header, Query, Depends
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from datetime import timedelta
+from typing import Optional
+import json
+import os
+
+from auth import create_access_token, decode_token, get_current_user
+from utils.events import events
+
+# ======================================================
+# ROUTER
+# ======================================================
+router = APIRouter(prefix="/events", tags=["Events"])
+
+# A comment line this often keeps proxies from closing an idle stream
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", 15))
+# Reconnect delay suggested to EventSource
+EVENTS_RETRY_MS = int(os.getenv("EVENTS_RETRY_MS", 3000))
+# Lifetime of a stream ticket; it ends up in access logs, so keep it short
+EVENTS_TICKET_SECONDS = int(os.getenv("EVENTS_TICKET_SECONDS", 60))
+TICKET_SCOPE = "events.stream"
+
+
+def _authorize(ticket: Optional[str], authorization: Optional[str]):
+    # EventSource cannot set headers, so it passes a stream ticket in the
+    # query string instead of the admin token
+    payload = None
+    if ticket:
+        payload = decode_token(ticket)
+        if payload is not None and payload.get("scope") != TICKET_SCOPE:
+            payload = None
+    elif authorization and authorization.startswith("Bearer "):
+        payload = decode_token(authorization[len("Bearer "):])
+    if payload is None or payload.get("sub") is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+def _message(event_type: str, data: dict, event_id: Optional[str] = None) -> str:
+    lines = [f"id: {event_id}"] if event_id else []
+    lines += [f"event: {event_type}", f"data: {json.dumps(jsonable_encoder(data), separators=(',', ':'))}"]
+    return "\n".join(lines) + "\n\n"
+
+
+async def _stream(after: int, reset: bool):
+    events.subscribers += 1
+    try:
+        yield f"retry: {EVENTS_RETRY_MS}\n\n"
+        if reset:
+            yield _message("reset", {}, events.event_id(after))
+
+        while not events.closed:
+            batch = await events.wait(after, EVENTS_HEARTBEAT_SECONDS)
+            if batch is None:
+                # Fell behind the buffer: the client reloads instead of missing events
+                after = events.last_seq
+                yield _message("reset", {}, events.event_id(after))
+            elif not batch:
+                yield ": keep-alive\n\n"
+            for event in batch or []:
+                after = event["seq"]
+                yield _message(event["type"], {**event["data"], "at": event["at"]}, events.event_id(after))
+    finally:
+        events.subscribers -= 1
+
+
+# ======================================================
+# LIVE ACTIVITY STREAM (ADMIN ONLY)
+# ======================================================
+@router.post("/ticket")
+async def create_stream_ticket(current_user: dict = Depends(get_current_user)):
+    """
+    A short-lived ticket for ``/stream?ticket=``: it opens the stream and
+    nothing else. Fetch a fresh one before each (re)connect.
+    """
+    ticket = create_access_token(
+        {"sub": current_user["email"], "scope": TICKET_SCOPE},
+        expires_delta=timedelta(seconds=EVENTS_TICKET_SECONDS),
+    )
+    return {"ticket": ticket, "expires_in": EVENTS_TICKET_SECONDS}
+
+
+@router.get("/stream")
+async def stream_events(
+    ticket: Optional[str] = Query(None),
+    last_event_id: Optional[str] = Header(None),
+    authorization: Optional[str] = Header(None),
+):
+    """
+    Server-Sent Events: donation, inquiry and volunteer creations and status
+    changes as they happen. Reconnects resume from Last-Event-ID; a ``reset``
+    event means some were missed and the dashboard should reload.
+    """
+    _authorize(ticket, authorization)
+    after, reset = events.resume_point(last_event_id)
+
+    return StreamingResponse(
+        _stream(after, reset),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,53 +1,64 @@
 from fastapi import APIRouter, HTTPException, status, Depends
-from motor.motor_asyncio import AsyncIOMotorClient
 from typing import List
-import os
 
 from models import GalleryImage, GalleryCreate
+from db import get_db
 from auth import get_current_user
+from utils.cache import content_cache, bump_version
+from utils.singleflight import query_key
+from utils.warmup import warmup_step
 
 router = APIRouter(prefix="/gallery", tags=["Gallery"])
 
-# Database connection
-mongo_url = os.environ.get('MONGO_URL')
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ.get('DB_NAME', 'rids_ngo')]
-
 @router.get("", response_model=List[GalleryImage])
 async def get_gallery(category: str = None, limit: int = 50):
     """Get all gallery images with optional filtering."""
+    db = get_db()
     query = {}
     if category:
         query["category"] = category
-    
-    images = await db.gallery.find(query).sort("created_at", -1).to_list(limit)
-    return [GalleryImage(**image) for image in images]
+
+    async def load():
+        images = await db.gallery.find(query).sort("created_at", -1).to_list(limit)
+        return [GalleryImage(**image) for image in images]
+
+    return await content_cache.get_or_load("gallery", query_key("gallery", query, limit=limit), load)
+
+@warmup_step("cache.gallery")
+async def prime_gallery():
+    await get_gallery()
 
 @router.post("", response_model=GalleryImage)
 async def add_image(image: GalleryCreate, current_user: dict = Depends(get_current_user)):
     """Add a new image to gallery (admin only)."""
+    db = get_db()
     image_obj = GalleryImage(**image.dict())
     image_dict = image_obj.dict()
     
     await db.gallery.insert_one(image_dict)
+    await bump_version("gallery")
     return image_obj
 
 @router.post("/bulk", response_model=List[GalleryImage])
 async def add_images_bulk(images: List[GalleryCreate], current_user: dict = Depends(get_current_user)):
     """Add multiple images to gallery (admin only)."""
+    db = get_db()
     image_objs = [GalleryImage(**img.dict()) for img in images]
     image_dicts = [img.dict() for img in image_objs]
     
     await db.gallery.insert_many(image_dicts)
+    await bump_version("gallery")
     return image_objs
 
 @router.delete("/{image_id}")
 async def delete_image(image_id: str, current_user: dict = Depends(get_current_user)):
     """Delete an image from gallery (admin only)."""
+    db = get_db()
     result = await db.gallery.delete_one({"id": image_id})
     if result.deleted_count == 0:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Image not found"
         )
+    await bump_version("gallery")
     return {"message": "Image deleted successfully"}
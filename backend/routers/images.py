@@ -0,0 +1,82 @@
+from fastapi import APIRouter, HTTPException, Request, Response, status, Depends
+from fastapi.responses import FileResponse
+from typing import Optional
+import os
+
+from utils.images import (
+    image_proxy,
+    is_allowed_url,
+    ImageFetchError,
+    IMAGE_FORMATS,
+    IMAGE_WIDTHS,
+)
+from auth import get_current_user
+
+# ======================================================
+# ROUTER
+# ======================================================
+router = APIRouter(prefix="/images", tags=["Images"])
+
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# ======================================================
+# RESIZED VARIANT (PUBLIC)
+# ======================================================
+@router.get("")
+async def get_image_variant(
+    request: Request,
+    url: str,
+    w: int = 640,
+    format: Optional[str] = None,
+):
+    """
+    Serve a resized WebP/JPEG variant of a remote original.
+    Without an explicit format, WebP is chosen when the client accepts it.
+    """
+    if not is_allowed_url(url):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Image host not allowed"
+        )
+
+    if w <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Width must be positive"
+        )
+
+    negotiated = format is None
+    if negotiated:
+        format = "webp" if "image/webp" in request.headers.get("accept", "") else "jpeg"
+    elif format not in IMAGE_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Format must be one of {list(IMAGE_FORMATS)}"
+        )
+
+    try:
+        path = await image_proxy.get_variant(url, w, format)
+    except ImageFetchError as e:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(e))
+
+    etag = '"' + os.path.basename(path) + '"'
+    headers = {"Cache-Control": CACHE_CONTROL, "ETag": etag}
+    if negotiated:
+        headers["Vary"] = "Accept"
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    return FileResponse(
+        path,
+        media_type=IMAGE_FORMATS[format],
+        headers=headers,
+    )
+
+
+# ======================================================
+# CACHE STATS (ADMIN ONLY)
+# ======================================================
+@router.get("/stats")
+async def image_cache_stats(current_user: dict = Depends(get_current_user)):
+    return {"widths": list(IMAGE_WIDTHS), **image_proxy.cache.stats()}
@@ -0,0 +1,188 @@
+from fastapi import APIRouter, HTTPException, Request, status, Depends
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+import json
+import os
+
+from models import GalleryImage, Program, News, Story
+from auth import get_current_user
+import db
+from db import get_db, ensure_index
+from utils.cache import bump_version
+from utils.warmup import warmup_step
+
+# ======================================================
+# ROUTER
+# ======================================================
+router = APIRouter(prefix="/import", tags=["Bulk Import"])
+
+# Collections that accept NDJSON imports and the model each line must satisfy
+IMPORT_MODELS = {
+    "gallery": GalleryImage,
+    "programs": Program,
+    "news": News,
+    "stories": Story,
+}
+
+DEFAULT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 500))
+MAX_BATCH_SIZE = 5000
+MAX_LINE_BYTES = 1024 * 1024
+DUPLICATE_KEY = 11000
+ID_INDEX = ("id", 1)
+
+
+@warmup_step("indexes.imports")
+async def ensure_import_indexes():
+    """Unique ids are what flags duplicates; fails on collections already holding some."""
+    for collection in IMPORT_MODELS:
+        await ensure_index(collection, "id", unique=True)
+
+
+async def _id_index_ready(collection: str) -> bool:
+    if (collection, repr("id"), repr([("unique", True)])) in db._ensured_indexes:
+        return True
+    info = await get_db()[collection].index_information()
+    return any(index["key"] == [ID_INDEX] and index.get("unique") for index in info.values())
+
+
+class _ImportReport:
+    """
+    Counters plus per-line entries for every line that was NOT inserted.
+    Lines absent from ``errors`` were inserted; entries are capped so a
+    100k-line import with bad data still reports in bounded memory.
+    """
+
+    def __init__(self, max_errors: int):
+        self.max_errors = max_errors
+        self.lines = 0
+        self.inserted = 0
+        self.invalid = 0
+        self.duplicates = 0
+        self.errors = []
+
+    def add(self, line_no: int, result: str, detail: str, record_id: str = None):
+        if result == "duplicate":
+            self.duplicates += 1
+        else:
+            self.invalid += 1
+
+        if len(self.errors) < self.max_errors:
+            entry = {"line": line_no, "result": result, "detail": detail}
+            if record_id:
+                entry["id"] = record_id
+            self.errors.append(entry)
+
+    def as_dict(self):
+        return {
+            "lines": self.lines,
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+            "errors": self.errors,
+            "errors_truncated": self.duplicates + self.invalid > len(self.errors),
+        }
+
+
+async def _iter_lines(request: Request):
+    """Yield raw NDJSON lines as the body streams in."""
+    pending = b""
+    async for chunk in request.stream():
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        if len(pending) > MAX_LINE_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Line exceeds {MAX_LINE_BYTES} bytes"
+            )
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+async def _flush(collection, batch, report: _ImportReport):
+    """Insert one unordered batch of (line_no, doc) and record the outcome."""
+    docs = [doc for _, doc in batch]
+    try:
+        result = await collection.insert_many(docs, ordered=False)
+        report.inserted += len(result.inserted_ids)
+    except BulkWriteError as e:
+        report.inserted += e.details.get("nInserted", 0)
+        for err in e.details.get("writeErrors", []):
+            line_no, doc = batch[err["index"]]
+            if err.get("code") == DUPLICATE_KEY:
+                report.add(line_no, "duplicate", "Record with this id already exists", doc["id"])
+            else:
+                report.add(line_no, "error", err.get("errmsg", "Write failed"), doc["id"])
+
+
+# ======================================================
+# STREAMING NDJSON IMPORT (ADMIN ONLY)
+# ======================================================
+@router.post("/{collection}")
+async def import_ndjson(
+    collection: str,
+    request: Request,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_errors: int = 1000,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Import newline-delimited JSON, one record per line.
+    Lines are validated as they arrive and inserted in unordered batches;
+    a line may carry its own ``id``, which is used to flag duplicates.
+    """
+    model = IMPORT_MODELS.get(collection)
+    if model is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Import not supported for '{collection}'"
+        )
+
+    if not 1 <= batch_size <= MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"batch_size must be between 1 and {MAX_BATCH_SIZE}"
+        )
+
+    # Built at warm-up, not here: a build would hold up the request and
+    # fail halfway through an import on legacy duplicate ids
+    if not await _id_index_ready(collection):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"The unique id index on '{collection}' does not exist yet; see the indexes.imports warm-up step"
+        )
+    target = get_db()[collection]
+
+    report = _ImportReport(max_errors)
+    batch = []
+    line_no = 0
+
+    async for raw in _iter_lines(request):
+        line_no += 1
+        raw = raw.strip()
+        if not raw:
+            continue
+        report.lines += 1
+
+        try:
+            data = json.loads(raw)
+            if not isinstance(data, dict):
+                raise ValueError("Line must be a JSON object")
+            doc = model(**data).dict()
+        except (ValueError, ValidationError) as e:
+            report.add(line_no, "invalid", str(e))
+            continue
+
+        batch.append((line_no, doc))
+        if len(batch) >= batch_size:
+            await _flush(target, batch, report)
+            batch = []
+
+    if batch:
+        await _flush(target, batch, report)
+
+    if report.inserted:
+        await bump_version(collection)
+
+    return report.as_dict()
@@ -1,13 +1,22 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Header
 from typing import List, Optional
 from datetime import datetime
 from uuid import uuid4
-import os
 
-from motor.motor_asyncio import AsyncIOMotorClient
-
-from models import Inquiry, InquiryCreate, InquiryUpdate
+from models import (
+    Inquiry,
+    InquiryCreate,
+    InquiryUpdate,
+    BulkSelection,
+    BulkStatusUpdate,
+)
 from auth import get_current_user
+from repository import Repository
+from utils.write_behind import write_behind
+from utils.events import events
+from utils.idempotency import run_idempotent
+from utils.rate_limit import rate_limit
+from utils.retention import find_archived
 
 # ======================================================
 # ROUTER
@@ -20,14 +29,9 @@ router = APIRouter(
 # ======================================================
 # DATABASE
 # ======================================================
-MONGO_URL = os.getenv("MONGO_URL")
-DB_NAME = os.getenv("DB_NAME", "rids_ngo")
-
-if not MONGO_URL:
-    raise RuntimeError("MONGO_URL is not set")
+inquiries_repo = Repository("inquiries", Inquiry, "Inquiry")
 
-client = AsyncIOMotorClient(MONGO_URL)
-db = client[DB_NAME]
+VALID_STATUSES = ["new", "replied", "closed"]
 
 # ======================================================
 # HEALTH CHECK
@@ -39,8 +43,25 @@ def inquiries_health():
 # ======================================================
 # CREATE INQUIRY (PUBLIC – CONTACT FORM)
 # ======================================================
-@router.post("", response_model=Inquiry, status_code=status.HTTP_201_CREATED)
-async def create_inquiry(inquiry: InquiryCreate):
+@router.post(
+    "",
+    response_model=Inquiry,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit("inquiries.create"))],
+)
+async def create_inquiry(
+    inquiry: InquiryCreate,
+    idempotency_key: Optional[str] = Header(None),
+):
+    return await run_idempotent(
+        idempotency_key,
+        "inquiries.create",
+        inquiry,
+        lambda: _create_inquiry(inquiry),
+        status_code=status.HTTP_201_CREATED,
+    )
+
+async def _create_inquiry(inquiry: InquiryCreate):
     inquiry_doc = {
         "id": str(uuid4()),
         "name": inquiry.name,
@@ -52,10 +73,16 @@ async def create_inquiry(inquiry: InquiryCreate):
         "created_at": datetime.utcnow(),
     }
 
-    await db.inquiries.insert_one(inquiry_doc)
+    inquiry_obj = Inquiry(**inquiry_doc)
 
-    inquiry_doc.pop("_id", None)
-    return Inquiry(**inquiry_doc)
+    if write_behind.enabled:
+        await write_behind.insert("inquiries", inquiry_obj.dict())
+    else:
+        await inquiries_repo.create(inquiry_obj)
+
+    # Only once the write is accepted, so the feed never shows a lost inquiry
+    events.publish_created("inquiries", inquiry_obj.dict())
+    return inquiry_obj
 
 # ======================================================
 # GET ALL INQUIRIES (ADMIN ONLY)
@@ -64,23 +91,68 @@ async def create_inquiry(inquiry: InquiryCreate):
 async def get_inquiries(
     status_filter: Optional[str] = None,
     limit: int = 100,
+    archived: bool = False,
     current_user: dict = Depends(get_current_user)
 ):
     query = {}
     if status_filter:
         query["status"] = status_filter
 
-    inquiries = (
-        await db.inquiries
-        .find(query)
-        .sort("created_at", -1)
-        .to_list(limit)
+    if archived:
+        return await find_archived("inquiries", query, limit)
+    return await inquiries_repo.list(query, limit=limit)
+
+# ======================================================
+# BULK STATUS UPDATE (ADMIN ONLY)
+# ======================================================
+@router.put("/bulk/status")
+async def bulk_update_inquiries_status(
+    bulk_update: BulkStatusUpdate,
+    current_user: dict = Depends(get_current_user)
+):
+    if bulk_update.status not in VALID_STATUSES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Status must be one of {VALID_STATUSES}"
+        )
+
+    query = bulk_update.to_query()
+    if query is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Provide ids or a filter"
+        )
+
+    result = await inquiries_repo.collection.update_many(
+        query,
+        {"$set": {"status": bulk_update.status}}
     )
+    if result.modified_count:
+        events.publish("inquiry.bulk_status", {"status": bulk_update.status, "modified": result.modified_count})
 
-    for i in inquiries:
-        i.pop("_id", None)
+    return {
+        "matched": result.matched_count,
+        "modified": result.modified_count,
+    }
 
-    return [Inquiry(**i) for i in inquiries]
+# ======================================================
+# BULK DELETE (ADMIN ONLY)
+# ======================================================
+@router.post("/bulk/delete")
+async def bulk_delete_inquiries(
+    selection: BulkSelection,
+    current_user: dict = Depends(get_current_user)
+):
+    query = selection.to_query()
+    if query is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Provide ids or a filter"
+        )
+
+    result = await inquiries_repo.collection.delete_many(query)
+
+    return {"deleted": result.deleted_count}
 
 # ======================================================
 # UPDATE INQUIRY STATUS (ADMIN ONLY)
@@ -91,24 +163,18 @@ async def update_inquiry_status(
     inquiry_update: InquiryUpdate,
     current_user: dict = Depends(get_current_user)
 ):
-    valid_statuses = ["new", "replied", "closed"]
-    if inquiry_update.status not in valid_statuses:
+    if inquiry_update.status not in VALID_STATUSES:
         raise HTTPException(
             status_code=400,
-            detail=f"Status must be one of {valid_statuses}"
+            detail=f"Status must be one of {VALID_STATUSES}"
         )
 
-    result = await db.inquiries.update_one(
-        {"id": inquiry_id},
-        {"$set": {"status": inquiry_update.status}}
+    updated = await inquiries_repo.update(
+        inquiry_id,
+        {"status": inquiry_update.status}
     )
-
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Inquiry not found")
-
-    updated = await db.inquiries.find_one({"id": inquiry_id})
-    updated.pop("_id", None)
-    return Inquiry(**updated)
+    events.publish_status("inquiries", updated.dict())
+    return updated
 
 # ======================================================
 # DELETE INQUIRY (ADMIN ONLY)
@@ -118,9 +184,6 @@ async def delete_inquiry(
     inquiry_id: str,
     current_user: dict = Depends(get_current_user)
 ):
-    result = await db.inquiries.delete_one({"id": inquiry_id})
-
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Inquiry not found")
+    await inquiries_repo.delete(inquiry_id)
 
     return {"message": "Inquiry deleted successfully"}
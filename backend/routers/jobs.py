@@ -0,0 +1,90 @@
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from typing import Optional
+from datetime import datetime
+
+from auth import get_current_user
+from repository import PROJECTION
+from db import get_db
+from utils.jobs import JOBS, JOB_STATUSES, job_counts, worker, wake_local_workers
+
+# ======================================================
+# ROUTER
+# ======================================================
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+# Payloads can hold whole emails; the list leaves them out
+LIST_PROJECTION = {**PROJECTION, "payload": 0}
+
+
+def _not_found():
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Job not found"
+    )
+
+# ======================================================
+# LIST JOBS (ADMIN ONLY)
+# ======================================================
+@router.get("")
+async def get_jobs(
+    status_filter: Optional[str] = None,
+    type: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    current_user: dict = Depends(get_current_user)
+):
+    if status_filter and status_filter not in JOB_STATUSES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Status must be one of {JOB_STATUSES}"
+        )
+
+    query = {}
+    if status_filter:
+        query["status"] = status_filter
+    if type:
+        query["type"] = type
+
+    cursor = get_db()[JOBS].find(query, LIST_PROJECTION).sort("created_at", -1)
+    return await cursor.to_list(limit)
+
+# ======================================================
+# COUNTS PER TYPE AND STATUS (ADMIN ONLY)
+# ======================================================
+@router.get("/stats")
+async def get_job_stats(current_user: dict = Depends(get_current_user)):
+    return {
+        "counts": await job_counts(),
+        "in_app_workers": worker.concurrency if worker.running else 0,
+    }
+
+# ======================================================
+# SINGLE JOB (ADMIN ONLY)
+# ======================================================
+@router.get("/{job_id}")
+async def get_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    job = await get_db()[JOBS].find_one({"id": job_id}, PROJECTION)
+    if not job:
+        raise _not_found()
+    return job
+
+# ======================================================
+# RETRY A FAILED JOB (ADMIN ONLY)
+# ======================================================
+@router.post("/{job_id}/retry")
+async def retry_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Queue a failed job again with a fresh set of attempts."""
+    now = datetime.utcnow()
+    result = await get_db()[JOBS].update_one(
+        {"id": job_id, "status": "failed"},
+        {"$set": {"status": "queued", "attempts": 0, "run_at": now, "finished_at": None, "updated_at": now}},
+    )
+    if result.matched_count == 0:
+        if await get_db()[JOBS].count_documents({"id": job_id}, limit=1):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Only failed jobs can be retried"
+            )
+        raise _not_found()
+
+    wake_local_workers()
+    return {"message": "Job queued for retry"}
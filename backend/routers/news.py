@@ -1,17 +1,16 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from motor.motor_asyncio import AsyncIOMotorClient
+from fastapi import APIRouter, Depends
 from typing import List
-import os
 
 from models import News, NewsCreate, NewsUpdate
 from auth import get_current_user
+from repository import Repository
+from utils.cache import content_cache, bump_version
+from utils.singleflight import query_key
+from utils.warmup import warmup_step
 
 router = APIRouter(prefix="/news", tags=["News"])
 
-# Database connection
-mongo_url = os.environ.get('MONGO_URL')
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ.get('DB_NAME', 'rids_ngo')]
+news_repo = Repository("news", News, "Article")
 
 @router.get("", response_model=List[News])
 async def get_news(status: str = None, category: str = None, limit: int = 20):
@@ -22,28 +21,26 @@ async def get_news(status: str = None, category: str = None, limit: int = 20):
     if category:
         query["category"] = category
     
-    news = await db.news.find(query).sort("date", -1).to_list(limit)
-    return [News(**article) for article in news]
+    return await content_cache.get_or_load(
+        "news", query_key("news", query, sort="date", limit=limit),
+        lambda: news_repo.list(query, sort="date", limit=limit)
+    )
+
+@warmup_step("cache.news")
+async def prime_news():
+    await get_news()
 
 @router.get("/{news_id}", response_model=News)
 async def get_news_article(news_id: str):
     """Get a single news article by ID."""
-    article = await db.news.find_one({"id": news_id})
-    if not article:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Article not found"
-        )
-    return News(**article)
+    return await content_cache.get_or_load("news", ("get", news_id), lambda: news_repo.get(news_id))
 
 @router.post("", response_model=News)
 async def create_news(news: NewsCreate, current_user: dict = Depends(get_current_user)):
     """Create a new news article (admin only)."""
-    news_obj = News(**news.dict())
-    news_dict = news_obj.dict()
-    
-    await db.news.insert_one(news_dict)
-    return news_obj
+    created = await news_repo.create(News(**news.dict()))
+    await bump_version("news")
+    return created
 
 @router.put("/{news_id}", response_model=News)
 async def update_news(
@@ -52,30 +49,15 @@ async def update_news(
     current_user: dict = Depends(get_current_user)
 ):
     """Update a news article (admin only)."""
-    existing = await db.news.find_one({"id": news_id})
-    if not existing:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Article not found"
-        )
-    
     update_data = {k: v for k, v in news_update.dict().items() if v is not None}
     
-    await db.news.update_one(
-        {"id": news_id},
-        {"$set": update_data}
-    )
-    
-    updated = await db.news.find_one({"id": news_id})
-    return News(**updated)
+    updated = await news_repo.update(news_id, update_data)
+    await bump_version("news")
+    return updated
 
 @router.delete("/{news_id}")
 async def delete_news(news_id: str, current_user: dict = Depends(get_current_user)):
     """Delete a news article (admin only)."""
-    result = await db.news.delete_one({"id": news_id})
-    if result.deleted_count == 0:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Article not found"
-        )
+    await news_repo.delete(news_id)
+    await bump_version("news")
     return {"message": "Article deleted successfully"}
@@ -1,17 +1,18 @@
 from fastapi import APIRouter, HTTPException, status, Depends
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 from typing import List
-import os
 
 from models import Newsletter, NewsletterCreate
 from auth import get_current_user
+from repository import Repository, PROJECTION
+from utils.write_behind import write_behind
+from utils.rate_limit import rate_limit
+from utils.newsletter import ensure_newsletter_indexes, normalize_email
 
 router = APIRouter(prefix="/newsletter", tags=["Newsletter"])
 
-# Database connection
-mongo_url = os.environ.get('MONGO_URL')
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ.get('DB_NAME', 'rids_ngo')]
+newsletter_repo = Repository("newsletter", Newsletter, "Subscriber")
 
 @router.get("", response_model=List[Newsletter])
 async def get_subscribers(
@@ -24,14 +25,13 @@ async def get_subscribers(
     if status_filter:
         query["status"] = status_filter
     
-    subscribers = await db.newsletter.find(query).sort("subscribed_at", -1).to_list(limit)
-    return [Newsletter(**sub) for sub in subscribers]
+    return await newsletter_repo.list(query, sort="subscribed_at", limit=limit)
 
 @router.get("/stats")
 async def get_newsletter_stats(current_user: dict = Depends(get_current_user)):
     """Get newsletter statistics (admin only)."""
-    total = await db.newsletter.count_documents({})
-    active = await db.newsletter.count_documents({"status": "active"})
+    total = await newsletter_repo.collection.count_documents({})
+    active = await newsletter_repo.collection.count_documents({"status": "active"})
     
     return {
         "total": total,
@@ -39,51 +39,78 @@ async def get_newsletter_stats(current_user: dict = Depends(get_current_user)):
         "unsubscribed": total - active
     }
 
-@router.post("", response_model=Newsletter)
+@router.post("", response_model=Newsletter, dependencies=[Depends(rate_limit("newsletter.subscribe"))])
 async def subscribe(subscription: NewsletterCreate):
-    """Subscribe to newsletter."""
-    # Check if already subscribed
-    existing = await db.newsletter.find_one({"email": subscription.email})
-    if existing:
-        if existing["status"] == "active":
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already subscribed"
-            )
-        else:
-            # Reactivate subscription
-            await db.newsletter.update_one(
-                {"email": subscription.email},
-                {"$set": {"status": "active"}}
+    """
+    Subscribe to newsletter.
+    One atomic upsert creates, reactivates or detects an active subscription;
+    the unique email index keeps concurrent sign-ups from creating duplicates.
+    """
+    # Normally built at warm-up; checked here (once per process) so the
+    # protection never silently depends on it
+    await ensure_newsletter_indexes()
+    email = normalize_email(subscription.email)
+    newsletter_obj = Newsletter(email=email)
+
+    upsert = {
+        "$set": {"status": "active"},
+        "$setOnInsert": {
+            "id": newsletter_obj.id,
+            "subscribed_at": newsletter_obj.subscribed_at,
+        },
+    }
+
+    # Deferred writes cannot tell an existing subscriber apart, so every
+    # sign-up is acknowledged as a fresh active subscription.
+    if write_behind.enabled:
+        await write_behind.submit("newsletter", UpdateOne({"email": email}, upsert, upsert=True))
+        return newsletter_obj
+
+    # Two racing upserts for a new address can both miss and both insert;
+    # the unique index rejects one, and a retry then matches the winner.
+    for attempt in range(2):
+        try:
+            previous = await newsletter_repo.collection.find_one_and_update(
+                {"email": email},
+                upsert,
+                projection=PROJECTION,
+                upsert=True,
+                return_document=ReturnDocument.BEFORE,
             )
-            updated = await db.newsletter.find_one({"email": subscription.email})
-            return Newsletter(**updated)
-    
-    newsletter_obj = Newsletter(**subscription.dict())
-    newsletter_dict = newsletter_obj.dict()
-    
-    await db.newsletter.insert_one(newsletter_dict)
-    return newsletter_obj
+            break
+        except DuplicateKeyError:
+            if attempt:
+                raise
+
+    if previous is None:
+        return newsletter_obj
+
+    if previous["status"] == "active":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already subscribed"
+        )
+
+    # Reactivated subscription
+    previous["status"] = "active"
+    return Newsletter(**previous)
 
 @router.delete("/{subscriber_id}")
 async def unsubscribe(subscriber_id: str, current_user: dict = Depends(get_current_user)):
     """Unsubscribe/remove from newsletter (admin only)."""
-    result = await db.newsletter.update_one(
+    result = await newsletter_repo.collection.update_one(
         {"id": subscriber_id},
         {"$set": {"status": "unsubscribed"}}
     )
     if result.matched_count == 0:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Subscriber not found"
-        )
+        raise newsletter_repo.not_found()
     return {"message": "Unsubscribed successfully"}
 
-@router.post("/unsubscribe")
+@router.post("/unsubscribe", dependencies=[Depends(rate_limit("newsletter.unsubscribe"))])
 async def unsubscribe_by_email(email: str):
     """Unsubscribe by email (public endpoint)."""
-    result = await db.newsletter.update_one(
-        {"email": email},
+    result = await newsletter_repo.collection.update_one(
+        {"email": normalize_email(email)},
         {"$set": {"status": "unsubscribed"}}
     )
     if result.matched_count == 0:
@@ -1,16 +1,21 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, Depends
 from typing import List, Optional
 from datetime import datetime
 
 from models import Program, ProgramCreate, ProgramUpdate
 from auth import get_current_user
-from db import get_db
+from repository import Repository
+from utils.cache import content_cache, bump_version
+from utils.singleflight import query_key
+from utils.warmup import warmup_step
 
 router = APIRouter(
     prefix="/programs",
     tags=["Programs"]
 )
 
+programs_repo = Repository("programs", Program, "Program")
+
 # ======================================================
 # HEALTH CHECK (MUST BE FIRST)
 # ======================================================
@@ -26,42 +31,29 @@ async def get_programs(
     status: Optional[str] = None,
     category: Optional[str] = None
 ):
-    db = get_db()
-
     query = {}
     if status:
         query["status"] = status
     if category:
         query["category"] = category
 
-    programs = await (
-        db.programs
-        .find(query)
-        .sort("created_at", -1)
-        .to_list(100)
+    return await content_cache.get_or_load(
+        "programs", query_key("programs", query, limit=100), lambda: programs_repo.list(query, limit=100)
     )
 
-    for p in programs:
-        p.pop("_id", None)
-
-    return [Program(**p) for p in programs]
+@warmup_step("cache.programs")
+async def prime_programs():
+    # The unfiltered list is what the home page asks for first
+    await get_programs()
 
 # ======================================================
 # GET SINGLE PROGRAM (PUBLIC)
 # ======================================================
 @router.get("/{program_id}", response_model=Program)
 async def get_program(program_id: str):
-    db = get_db()
-
-    program = await db.programs.find_one({"id": program_id})
-    if not program:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Program not found"
-        )
-
-    program.pop("_id", None)
-    return Program(**program)
+    return await content_cache.get_or_load(
+        "programs", ("get", program_id), lambda: programs_repo.get(program_id)
+    )
 
 # ======================================================
 # CREATE PROGRAM (ADMIN ONLY)
@@ -71,14 +63,9 @@ async def create_program(
     program: ProgramCreate,
     current_user: dict = Depends(get_current_user)
 ):
-    db = get_db()
-
-    program_obj = Program(**program.dict())
-    program_dict = program_obj.dict()
-    program_dict["created_at"] = datetime.utcnow()
-
-    await db.programs.insert_one(program_dict)
-    return program_obj
+    created = await programs_repo.create(Program(**program.dict()))
+    await bump_version("programs")
+    return created
 
 # ======================================================
 # UPDATE PROGRAM (ADMIN ONLY)
@@ -89,29 +76,15 @@ async def update_program(
     program_update: ProgramUpdate,
     current_user: dict = Depends(get_current_user)
 ):
-    db = get_db()
-
-    existing = await db.programs.find_one({"id": program_id})
-    if not existing:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Program not found"
-        )
-
     update_data = {
         k: v for k, v in program_update.dict().items()
         if v is not None
     }
     update_data["updated_at"] = datetime.utcnow()
 
-    await db.programs.update_one(
-        {"id": program_id},
-        {"$set": update_data}
-    )
-
-    updated = await db.programs.find_one({"id": program_id})
-    updated.pop("_id", None)
-    return Program(**updated)
+    updated = await programs_repo.update(program_id, update_data)
+    await bump_version("programs")
+    return updated
 
 # ======================================================
 # DELETE PROGRAM (ADMIN ONLY)
@@ -121,13 +94,7 @@ async def delete_program(
     program_id: str,
     current_user: dict = Depends(get_current_user)
 ):
-    db = get_db()
-
-    result = await db.programs.delete_one({"id": program_id})
-    if result.deleted_count == 0:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Program not found"
-        )
+    await programs_repo.delete(program_id)
+    await bump_version("programs")
 
     return {"message": "Program deleted successfully"}
@@ -1,5 +1,4 @@
-from fastapi import APIRouter, Depends
-from motor.motor_asyncio import AsyncIOMotorClient
+from fastapi import APIRouter, Depends, HTTPException, status
 import os
 from typing import List
 
@@ -7,15 +6,13 @@ from models import (
     Program, News, Story, GalleryImage,
     ProgramCreate, NewsCreate, StoryCreate, GalleryCreate
 )
+from db import get_db
 from auth import get_current_user
+from utils.datagen import GeneratorConfig, generate
+from utils.cache import bump_version
 
 router = APIRouter(prefix="/seed", tags=["Database Seeding"])
 
-# Database connection
-mongo_url = os.environ.get('MONGO_URL')
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ.get('DB_NAME', 'rids_ngo')]
-
 # Seed data
 SEED_PROGRAMS = [
     {
@@ -124,6 +121,7 @@ SEED_GALLERY = [
 @router.post("/all")
 async def seed_all_data(current_user: dict = Depends(get_current_user)):
     """Seed all initial data (admin only). Use with caution."""
+    db = get_db()
     results = {}
     
     # Seed programs
@@ -132,6 +130,7 @@ async def seed_all_data(current_user: dict = Depends(get_current_user)):
         program_objs = [Program(**p) for p in SEED_PROGRAMS]
         await db.programs.insert_many([p.dict() for p in program_objs])
         results["programs"] = len(SEED_PROGRAMS)
+        await bump_version("programs")
     else:
         results["programs"] = f"Skipped ({existing_programs} already exist)"
     
@@ -141,6 +140,7 @@ async def seed_all_data(current_user: dict = Depends(get_current_user)):
         news_objs = [News(**n) for n in SEED_NEWS]
         await db.news.insert_many([n.dict() for n in news_objs])
         results["news"] = len(SEED_NEWS)
+        await bump_version("news")
     else:
         results["news"] = f"Skipped ({existing_news} already exist)"
     
@@ -150,6 +150,7 @@ async def seed_all_data(current_user: dict = Depends(get_current_user)):
         story_objs = [Story(**s) for s in SEED_STORIES]
         await db.stories.insert_many([s.dict() for s in story_objs])
         results["stories"] = len(SEED_STORIES)
+        await bump_version("stories")
     else:
         results["stories"] = f"Skipped ({existing_stories} already exist)"
     
@@ -159,7 +160,31 @@ async def seed_all_data(current_user: dict = Depends(get_current_user)):
         gallery_objs = [GalleryImage(**g) for g in SEED_GALLERY]
         await db.gallery.insert_many([g.dict() for g in gallery_objs])
         results["gallery"] = len(SEED_GALLERY)
+        await bump_version("gallery")
     else:
         results["gallery"] = f"Skipped ({existing_gallery} already exist)"
     
     return {"message": "Database seeded", "results": results}
+
+
+# Largest run accepted over HTTP; bigger volumes belong to `python -m utils.datagen`
+GENERATE_API_LIMIT = int(os.environ.get('GENERATE_API_LIMIT', 500000))
+
+
+@router.post("/generate")
+async def generate_synthetic_data(config: GeneratorConfig, current_user: dict = Depends(get_current_user)):
+    """Generate synthetic donations, volunteers, inquiries and subscribers (admin only)."""
+    requested = config.donations + config.volunteers + config.inquiries + config.newsletter
+    if requested > GENERATE_API_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {GENERATE_API_LIMIT} records per request; use the CLI for larger runs"
+        )
+    if config.batch_size < 1 or config.concurrency < 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="batch_size and concurrency must be positive"
+        )
+
+    results = await generate(config)
+    return {"message": "Synthetic data generated", "seed": config.seed, "results": results}
@@ -0,0 +1,114 @@
+from fastapi import APIRouter, HTTPException, Request, Response, status, Depends
+from fastapi.responses import FileResponse, RedirectResponse
+from typing import List, Optional
+import os
+
+from auth import get_current_user
+from utils.snapshots import SNAPSHOT_DIR, SOURCES, MANIFEST, publish, read_manifest
+
+# ======================================================
+# ROUTER
+# ======================================================
+router = APIRouter(prefix="/snapshots", tags=["Snapshots"])
+
+# When set (e.g. a CDN in front of SNAPSHOT_DIR), lookups redirect there
+SNAPSHOT_BASE_URL = os.getenv("SNAPSHOT_BASE_URL", "").rstrip("/")
+MANIFEST_MAX_AGE = int(os.getenv("SNAPSHOT_MANIFEST_MAX_AGE", 60))
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_manifest = {"mtime": None, "data": None}
+
+
+def _current_manifest() -> dict:
+    """The manifest, re-read only when the publisher has replaced it."""
+    try:
+        mtime = os.stat(os.path.join(SNAPSHOT_DIR, MANIFEST)).st_mtime
+    except FileNotFoundError:
+        return {"files": {}, "collections": {}}
+    if _manifest["mtime"] != mtime:
+        _manifest["data"] = read_manifest(SNAPSHOT_DIR)
+        _manifest["mtime"] = mtime
+    return _manifest["data"]
+
+
+def _serve(request: Request, relative: str, cache_control: str):
+    path = os.path.realpath(os.path.join(SNAPSHOT_DIR, relative))
+    if not path.startswith(os.path.realpath(SNAPSHOT_DIR) + os.sep) or not os.path.isfile(path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Snapshot not found"
+        )
+
+    headers = {"Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    tag = os.path.basename(relative)
+    if "gzip" in request.headers.get("accept-encoding", "") and os.path.isfile(path + ".gz"):
+        headers["Content-Encoding"] = "gzip"
+        path += ".gz"
+        # Each encoding is its own representation and needs its own strong tag
+        tag += ".gz"
+    headers["ETag"] = f'"{tag}"'
+
+    if headers["ETag"] in [t.strip() for t in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type="application/json", headers=headers)
+
+# ======================================================
+# MANIFEST + HASHED FILES (PUBLIC)
+# ======================================================
+@router.get("/manifest")
+async def get_manifest(request: Request):
+    return _serve(request, MANIFEST, f"public, max-age={MANIFEST_MAX_AGE}")
+
+
+@router.get("/files/{relative:path}")
+async def get_snapshot_file(relative: str, request: Request):
+    return _serve(request, relative, CACHE_CONTROL)
+
+# ======================================================
+# STABLE URLS (PUBLIC)
+# ======================================================
+@router.get("/{collection}")
+async def get_collection_snapshot(collection: str, request: Request):
+    """The latest list payload: redirected to the CDN when configured, served otherwise."""
+    return _resolve(request, collection)
+
+
+@router.get("/{collection}/{item_id}")
+async def get_item_snapshot(collection: str, item_id: str, request: Request):
+    return _resolve(request, f"{collection}/{item_id}")
+
+
+def _resolve(request: Request, key: str):
+    relative = _current_manifest()["files"].get(key)
+    if relative is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Snapshot not found"
+        )
+    if SNAPSHOT_BASE_URL:
+        # Short-lived: the target changes with every publish
+        return RedirectResponse(
+            f"{SNAPSHOT_BASE_URL}/{relative}",
+            status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+            headers={"Cache-Control": f"public, max-age={MANIFEST_MAX_AGE}"},
+        )
+    # Same bytes as the hashed file, but this URL's content changes
+    return _serve(request, relative, f"public, max-age={MANIFEST_MAX_AGE}")
+
+# ======================================================
+# PUBLISH NOW (ADMIN ONLY)
+# ======================================================
+@router.post("/publish")
+async def publish_snapshots(
+    collections: Optional[List[str]] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    unknown = set(collections or []) - set(SOURCES)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown collections: {sorted(unknown)}"
+        )
+
+    manifest = await publish(collections)
+    return {"generated_at": manifest["generated_at"], "collections": manifest["collections"]}
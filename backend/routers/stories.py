@@ -1,17 +1,16 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from motor.motor_asyncio import AsyncIOMotorClient
+from fastapi import APIRouter, Depends
 from typing import List
-import os
 
 from models import Story, StoryCreate, StoryUpdate
 from auth import get_current_user
+from repository import Repository
+from utils.cache import content_cache, bump_version
+from utils.singleflight import query_key
+from utils.warmup import warmup_step
 
 router = APIRouter(prefix="/stories", tags=["Impact Stories"])
 
-# Database connection
-mongo_url = os.environ.get('MONGO_URL')
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ.get('DB_NAME', 'rids_ngo')]
+stories_repo = Repository("stories", Story, "Story")
 
 @router.get("", response_model=List[Story])
 async def get_stories(program: str = None, limit: int = 20):
@@ -20,28 +19,25 @@ async def get_stories(program: str = None, limit: int = 20):
     if program:
         query["program"] = program
     
-    stories = await db.stories.find(query).sort("created_at", -1).to_list(limit)
-    return [Story(**story) for story in stories]
+    return await content_cache.get_or_load(
+        "stories", query_key("stories", query, limit=limit), lambda: stories_repo.list(query, limit=limit)
+    )
+
+@warmup_step("cache.stories")
+async def prime_stories():
+    await get_stories()
 
 @router.get("/{story_id}", response_model=Story)
 async def get_story(story_id: str):
     """Get a single story by ID."""
-    story = await db.stories.find_one({"id": story_id})
-    if not story:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Story not found"
-        )
-    return Story(**story)
+    return await content_cache.get_or_load("stories", ("get", story_id), lambda: stories_repo.get(story_id))
 
 @router.post("", response_model=Story)
 async def create_story(story: StoryCreate, current_user: dict = Depends(get_current_user)):
     """Create a new impact story (admin only)."""
-    story_obj = Story(**story.dict())
-    story_dict = story_obj.dict()
-    
-    await db.stories.insert_one(story_dict)
-    return story_obj
+    created = await stories_repo.create(Story(**story.dict()))
+    await bump_version("stories")
+    return created
 
 @router.put("/{story_id}", response_model=Story)
 async def update_story(
@@ -50,30 +46,15 @@ async def update_story(
     current_user: dict = Depends(get_current_user)
 ):
     """Update an impact story (admin only)."""
-    existing = await db.stories.find_one({"id": story_id})
-    if not existing:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Story not found"
-        )
-    
     update_data = {k: v for k, v in story_update.dict().items() if v is not None}
     
-    await db.stories.update_one(
-        {"id": story_id},
-        {"$set": update_data}
-    )
-    
-    updated = await db.stories.find_one({"id": story_id})
-    return Story(**updated)
+    updated = await stories_repo.update(story_id, update_data)
+    await bump_version("stories")
+    return updated
 
 @router.delete("/{story_id}")
 async def delete_story(story_id: str, current_user: dict = Depends(get_current_user)):
     """Delete an impact story (admin only)."""
-    result = await db.stories.delete_one({"id": story_id})
-    if result.deleted_count == 0:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Story not found"
-        )
+    await stories_repo.delete(story_id)
+    await bump_version("stories")
     return {"message": "Story deleted successfully"}
@@ -1,19 +1,14 @@
 from fastapi import APIRouter, HTTPException, status, Depends
-from motor.motor_asyncio import AsyncIOMotorClient
 from typing import List
-import os
 from pydantic import BaseModel, EmailStr
 
 from models import AdminUser, AdminUserCreate
+from db import get_db
 from auth import get_password_hash, get_current_user
+from utils.cache import content_cache, bump_version
 
 router = APIRouter(prefix="/users", tags=["User Management"])
 
-# Database connection
-mongo_url = os.environ.get('MONGO_URL')
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ.get('DB_NAME', 'rids_ngo')]
-
 class AdminUserResponse(BaseModel):
     id: str
     email: str
@@ -28,21 +23,27 @@ class PasswordChange(BaseModel):
 @router.get("", response_model=List[AdminUserResponse])
 async def get_all_users(current_user: dict = Depends(get_current_user)):
     """Get all admin users (admin only)."""
-    users = await db.admin_users.find().to_list(100)
-    return [
-        AdminUserResponse(
-            id=user.get("id", ""),
-            email=user["email"],
-            name=user["name"],
-            role=user["role"],
-            created_at=str(user.get("created_at", ""))
-        ) for user in users
-    ]
+    db = get_db()
+
+    async def load():
+        users = await db.admin_users.find().to_list(100)
+        return [
+            AdminUserResponse(
+                id=user.get("id", ""),
+                email=user["email"],
+                name=user["name"],
+                role=user["role"],
+                created_at=str(user.get("created_at", ""))
+            ) for user in users
+        ]
+
+    return await content_cache.get_or_load("admin_users", "list", load)
 
 @router.post("", response_model=AdminUserResponse)
 async def create_user(user: AdminUserCreate, current_user: dict = Depends(get_current_user)):
     """Create a new admin user (admin only)."""
     # Check if user already exists
+    db = get_db()
     existing_user = await db.admin_users.find_one({"email": user.email})
     if existing_user:
         raise HTTPException(
@@ -62,6 +63,7 @@ async def create_user(user: AdminUserCreate, current_user: dict = Depends(get_cu
     user_dict["created_at"] = admin_user.created_at
     
     await db.admin_users.insert_one(user_dict)
+    await bump_version("admin_users")
     
     return AdminUserResponse(
         id=admin_user.id,
@@ -75,6 +77,7 @@ async def create_user(user: AdminUserCreate, current_user: dict = Depends(get_cu
 async def delete_user(user_id: str, current_user: dict = Depends(get_current_user)):
     """Delete an admin user (admin only). Cannot delete yourself."""
     # Get the user to be deleted
+    db = get_db()
     user_to_delete = await db.admin_users.find_one({"id": user_id})
     if not user_to_delete:
         raise HTTPException(
@@ -103,6 +106,7 @@ async def delete_user(user_id: str, current_user: dict = Depends(get_current_use
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
+    await bump_version("admin_users")
     
     return {"message": "User deleted successfully"}
 
@@ -113,6 +117,7 @@ async def update_user(
     current_user: dict = Depends(get_current_user)
 ):
     """Update user details (admin only)."""
+    db = get_db()
     update_data = {}
     if name:
         update_data["name"] = name
@@ -133,5 +138,6 @@ async def update_user(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
+    await bump_version("admin_users")
     
     return {"message": "User updated successfully"}
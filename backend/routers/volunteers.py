@@ -1,13 +1,25 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Header, Query
 from typing import List, Optional
 from datetime import datetime
 from uuid import uuid4
-import os
 
-from motor.motor_asyncio import AsyncIOMotorClient
-
-from models import Volunteer, VolunteerCreate, VolunteerUpdate
+from models import (
+    Volunteer,
+    VolunteerCreate,
+    VolunteerMatchPage,
+    Program,
+    VolunteerUpdate,
+    BulkSelection,
+    BulkStatusUpdate,
+)
 from auth import get_current_user
+from repository import Repository
+from utils.write_behind import write_behind
+from utils.events import events
+from utils.idempotency import run_idempotent
+from utils.rate_limit import rate_limit
+from utils.retention import find_archived
+from utils.matching import match_tokens, rank_candidates, STATUS_ORDER
 
 # ======================================================
 # ROUTER
@@ -20,14 +32,10 @@ router = APIRouter(
 # ======================================================
 # DATABASE
 # ======================================================
-MONGO_URL = os.getenv("MONGO_URL")
-DB_NAME = os.getenv("DB_NAME", "rids_ngo")
-
-if not MONGO_URL:
-    raise RuntimeError("MONGO_URL is not set")
+volunteers_repo = Repository("volunteers", Volunteer, "Volunteer")
+programs_repo = Repository("programs", Program, "Program")
 
-client = AsyncIOMotorClient(MONGO_URL)
-db = client[DB_NAME]
+VALID_STATUSES = ["new", "contacted", "accepted", "rejected"]
 
 # ======================================================
 # HEALTH CHECK
@@ -39,8 +47,25 @@ def volunteers_health():
 # ======================================================
 # CREATE VOLUNTEER (PUBLIC – FORM)
 # ======================================================
-@router.post("", response_model=Volunteer, status_code=status.HTTP_201_CREATED)
-async def create_volunteer(volunteer: VolunteerCreate):
+@router.post(
+    "",
+    response_model=Volunteer,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit("volunteers.create"))],
+)
+async def create_volunteer(
+    volunteer: VolunteerCreate,
+    idempotency_key: Optional[str] = Header(None),
+):
+    return await run_idempotent(
+        idempotency_key,
+        "volunteers.create",
+        volunteer,
+        lambda: _create_volunteer(volunteer),
+        status_code=status.HTTP_201_CREATED,
+    )
+
+async def _create_volunteer(volunteer: VolunteerCreate):
     volunteer_doc = {
         "id": str(uuid4()),
         "name": volunteer.name,
@@ -55,10 +80,18 @@ async def create_volunteer(volunteer: VolunteerCreate):
         "created_at": datetime.utcnow(),
     }
 
-    await db.volunteers.insert_one(volunteer_doc)
+    volunteer_obj = Volunteer(**volunteer_doc)
+    # Tokenized once here so matching never has to parse free text
+    stored = {**volunteer_obj.dict(), "match_tokens": match_tokens(volunteer_doc)}
+
+    if write_behind.enabled:
+        await write_behind.insert("volunteers", stored)
+    else:
+        await volunteers_repo.collection.insert_one(stored)
 
-    volunteer_doc.pop("_id", None)
-    return Volunteer(**volunteer_doc)
+    # Only once the write is accepted, so the feed never shows a lost application
+    events.publish_created("volunteers", volunteer_obj.dict())
+    return volunteer_obj
 
 # ======================================================
 # GET ALL VOLUNTEERS (ADMIN ONLY)
@@ -67,23 +100,97 @@ async def create_volunteer(volunteer: VolunteerCreate):
 async def get_volunteers(
     status_filter: Optional[str] = None,
     limit: int = 100,
+    archived: bool = False,
     current_user: dict = Depends(get_current_user)
 ):
     query = {}
     if status_filter:
         query["status"] = status_filter
 
-    volunteers = (
-        await db.volunteers
-        .find(query)
-        .sort("created_at", -1)
-        .to_list(limit)
+    if archived:
+        return await find_archived("volunteers", query, limit)
+    return await volunteers_repo.list(query, limit=limit)
+
+# ======================================================
+# CANDIDATES FOR A PROGRAM (ADMIN ONLY)
+# ======================================================
+@router.get("/matches/{program_id}", response_model=VolunteerMatchPage)
+async def get_program_matches(
+    program_id: str,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    city: Optional[str] = None,
+    availability: Optional[str] = None,
+    status_filter: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Volunteers ranked by how well their interests fit the program; rejected
+    applicants are left out unless asked for with status_filter.
+    """
+    if status_filter and status_filter not in VALID_STATUSES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Status must be one of {VALID_STATUSES}"
+        )
+
+    program = await programs_repo.get(program_id)
+    statuses = [status_filter] if status_filter else STATUS_ORDER
+    return await rank_candidates(
+        program.dict(), page, page_size, city=city, availability=availability, statuses=statuses
     )
 
-    for v in volunteers:
-        v.pop("_id", None)
+# ======================================================
+# BULK STATUS UPDATE (ADMIN ONLY)
+# ======================================================
+@router.put("/bulk/status")
+async def bulk_update_volunteers_status(
+    bulk_update: BulkStatusUpdate,
+    current_user: dict = Depends(get_current_user)
+):
+    if bulk_update.status not in VALID_STATUSES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Status must be one of {VALID_STATUSES}"
+        )
+
+    query = bulk_update.to_query()
+    if query is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Provide ids or a filter"
+        )
+
+    result = await volunteers_repo.collection.update_many(
+        query,
+        {"$set": {"status": bulk_update.status}}
+    )
+    if result.modified_count:
+        events.publish("volunteer.bulk_status", {"status": bulk_update.status, "modified": result.modified_count})
+
+    return {
+        "matched": result.matched_count,
+        "modified": result.modified_count,
+    }
+
+# ======================================================
+# BULK DELETE (ADMIN ONLY)
+# ======================================================
+@router.post("/bulk/delete")
+async def bulk_delete_volunteers(
+    selection: BulkSelection,
+    current_user: dict = Depends(get_current_user)
+):
+    query = selection.to_query()
+    if query is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Provide ids or a filter"
+        )
+
+    result = await volunteers_repo.collection.delete_many(query)
 
-    return [Volunteer(**v) for v in volunteers]
+    return {"deleted": result.deleted_count}
 
 # ======================================================
 # UPDATE VOLUNTEER STATUS (ADMIN ONLY)
@@ -94,24 +201,18 @@ async def update_volunteer_status(
     volunteer_update: VolunteerUpdate,
     current_user: dict = Depends(get_current_user)
 ):
-    valid_statuses = ["new", "contacted", "accepted", "rejected"]
-    if volunteer_update.status not in valid_statuses:
+    if volunteer_update.status not in VALID_STATUSES:
         raise HTTPException(
             status_code=400,
-            detail=f"Status must be one of {valid_statuses}"
+            detail=f"Status must be one of {VALID_STATUSES}"
         )
 
-    result = await db.volunteers.update_one(
-        {"id": volunteer_id},
-        {"$set": {"status": volunteer_update.status}}
+    updated = await volunteers_repo.update(
+        volunteer_id,
+        {"status": volunteer_update.status}
     )
-
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Volunteer not found")
-
-    updated = await db.volunteers.find_one({"id": volunteer_id})
-    updated.pop("_id", None)
-    return Volunteer(**updated)
+    events.publish_status("volunteers", updated.dict())
+    return updated
 
 # ======================================================
 # DELETE VOLUNTEER (ADMIN ONLY)
@@ -121,9 +222,6 @@ async def delete_volunteer(
     volunteer_id: str,
     current_user: dict = Depends(get_current_user)
 ):
-    result = await db.volunteers.delete_one({"id": volunteer_id})
-
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Volunteer not found")
+    await volunteers_repo.delete(volunteer_id)
 
     return {"message": "Volunteer deleted successfully"}
@@ -0,0 +1,190 @@
+"""
+Detects handlers that block the event loop.
+
+A heartbeat task ticks every few milliseconds. A watchdog thread notices when
+it stops ticking, grabs the loop thread's stack with ``sys._current_frames``
+and attributes the stall to the route whose endpoint is on that stack.
+"""
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Dict, List, Optional, Tuple
+
+BLOCKING_DETECTOR = os.getenv("BLOCKING_DETECTOR", "false").lower() == "true"
+BLOCKING_THRESHOLD_MS = float(os.getenv("BLOCKING_THRESHOLD_MS", 100))
+BLOCKING_INTERVAL_MS = float(os.getenv("BLOCKING_INTERVAL_MS", 20))
+STACK_DEPTH = 20
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+logger = logging.getLogger("blocking")
+
+
+def _is_app_frame(filename: str) -> bool:
+    return filename.startswith(APP_ROOT) and "site-packages" not in filename
+
+
+class Offender:
+    __slots__ = ("route", "location", "count", "total_ms", "max_ms", "stack", "last_seen")
+
+    def __init__(self, route: str, location: str, stack: List[str]):
+        self.route = route
+        self.location = location
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.stack = stack
+        self.last_seen = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "route": self.route,
+            "location": self.location,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 1),
+            "max_ms": round(self.max_ms, 1),
+            "last_seen": self.last_seen,
+            "stack": self.stack,
+        }
+
+
+class BlockingDetector:
+    def __init__(self, threshold_ms: float, interval_ms: float):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.routes: Dict[Any, str] = {}
+        self._offenders: Dict[Tuple[str, str], Offender] = {}
+        self._lock = threading.Lock()
+        self._loop_thread: Optional[int] = None
+        self._last_beat = 0.0
+        # Stack captured by the watchdog for the stall in progress
+        self._capture: Optional[Tuple[float, str, str, List[str]]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def map_routes(self, app):
+        """Remember each endpoint's code object so a stack can be traced to its route."""
+        for route in app.routes:
+            endpoint = getattr(route, "endpoint", None)
+            code = getattr(endpoint, "__code__", None)
+            if code is not None:
+                methods = ",".join(sorted(getattr(route, "methods", None) or []))
+                self.routes[code] = f"{methods} {route.path}".strip()
+
+    # ==================================================
+    # LOOP SIDE
+    # ==================================================
+    async def _heartbeat(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._last_beat = time.monotonic()
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            stalled = loop.time() - expected
+            if stalled >= self.threshold:
+                self._record(stalled)
+
+    def _record(self, stalled: float):
+        capture, self._capture = self._capture, None
+        if capture is None:
+            # Unblocked before the watchdog looked; nothing to attribute
+            route, location, stack = "unknown", "unknown", []
+        else:
+            _, route, location, stack = capture
+
+        with self._lock:
+            offender = self._offenders.get((route, location))
+            if offender is None:
+                offender = self._offenders[(route, location)] = Offender(route, location, stack)
+            offender.count += 1
+            offender.total_ms += stalled * 1000
+            offender.max_ms = max(offender.max_ms, stalled * 1000)
+            offender.last_seen = time.time()
+
+        logger.warning(json.dumps({
+            "event_loop_blocked_ms": round(stalled * 1000, 1),
+            "route": route,
+            "location": location,
+        }))
+
+    # ==================================================
+    # WATCHDOG THREAD
+    # ==================================================
+    def _watch(self):
+        while not self._stop.wait(self.interval / 2):
+            beat = self._last_beat
+            if not beat or time.monotonic() - beat < self.threshold:
+                continue
+            capture = self._capture
+            if capture is not None and capture[0] == beat:
+                continue  # this stall is already captured
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is not None:
+                self._capture = (beat, *self._attribute(frame))
+
+    def _attribute(self, frame) -> Tuple[str, str, List[str]]:
+        summary = traceback.extract_stack(frame)
+        route = "unknown"
+        walker = frame
+        while walker is not None:
+            if walker.f_code in self.routes:
+                route = self.routes[walker.f_code]
+                break
+            walker = walker.f_back
+
+        # Innermost frame in our own code is what needs fixing
+        location = "unknown"
+        for entry in reversed(summary):
+            if _is_app_frame(entry.filename):
+                location = f"{os.path.relpath(entry.filename, APP_ROOT)}:{entry.lineno} {entry.name}"
+                break
+        stack = [line.rstrip() for line in traceback.format_list(summary[-STACK_DEPTH:])]
+        return route, location, stack
+
+    # ==================================================
+    # LIFECYCLE + REPORTING
+    # ==================================================
+    def start(self, app=None):
+        if self._task is not None:
+            return
+        if app is not None:
+            self.map_routes(app)
+        self._loop_thread = threading.get_ident()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="blocking-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stop.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._last_beat = 0.0
+
+    def offenders(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            found = [o.to_dict() for o in self._offenders.values()]
+        return sorted(found, key=lambda o: o["total_ms"], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._offenders.clear()
+
+
+blocking_detector = BlockingDetector(BLOCKING_THRESHOLD_MS, BLOCKING_INTERVAL_MS)
@@ -0,0 +1,166 @@
+"""
+In-process cache kept coherent across instances by collection versions.
+
+Writers bump a counter per collection in the single ``cache_versions``
+document. Readers tag every cached entry with the version it was loaded
+under and serve it only while that is still the current version. The
+current versions are fetched in one read for all collections, at most once
+every CACHE_VERSION_CHECK_MS per process, and pushed instead of polled when
+a change stream is available (replica sets and Atlas).
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+from db import get_db
+from utils.metrics import cache_result, registry
+from utils.singleflight import SingleFlight
+
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+CACHE_VERSION_CHECK_MS = float(os.getenv("CACHE_VERSION_CHECK_MS", 1000))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 2000))
+# Needs a replica set; on a standalone server the watcher falls back to polling
+CACHE_CHANGE_STREAM = os.getenv("CACHE_CHANGE_STREAM", "false").lower() == "true"
+
+VERSIONS = "cache_versions"
+VERSIONS_ID = "collections"
+
+logger = logging.getLogger("cache")
+
+# Called with the collection name after each bump, e.g. to republish snapshots
+_bump_listeners: List[Callable[[str], None]] = []
+
+
+def on_version_bump(listener: Callable[[str], None]):
+    _bump_listeners.append(listener)
+
+
+async def bump_version(collection: str):
+    """Call after every write that changes what readers of ``collection`` would see."""
+    doc = await get_db()[VERSIONS].find_one_and_update(
+        {"_id": VERSIONS_ID},
+        {"$inc": {collection: 1}, "$set": {"updated_at": datetime.utcnow()}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    # This instance sees its own write without waiting for the next check
+    versions.observe(doc)
+    for listener in _bump_listeners:
+        listener(collection)
+
+
+class VersionTracker:
+    def __init__(self, check_interval_ms: float):
+        self.check_interval = check_interval_ms / 1000
+        self._versions: Dict[str, int] = {}
+        self._checked_at = float("-inf")
+        self._refresh: Optional[asyncio.Task] = None
+        self._watch: Optional[asyncio.Task] = None
+        self._streaming = False
+
+    def observe(self, doc: Optional[dict]):
+        if not doc:
+            return
+        # Entries are compared for equality, so a reset document (dropped
+        # database, restored backup) invalidates rather than wedges the cache
+        self._versions = {k: v for k, v in doc.items() if isinstance(v, int)}
+
+    async def _fetch(self):
+        self.observe(await get_db()[VERSIONS].find_one({"_id": VERSIONS_ID}))
+        self._checked_at = time.monotonic()
+
+    async def current(self, collection: str) -> int:
+        if not self._streaming and time.monotonic() - self._checked_at >= self.check_interval:
+            # Concurrent readers share one in-flight fetch
+            if self._refresh is None or self._refresh.done():
+                self._refresh = asyncio.ensure_future(self._fetch())
+            await asyncio.shield(self._refresh)
+        return self._versions.get(collection, 0)
+
+    # ==================================================
+    # CHANGE STREAM
+    # ==================================================
+    async def _run_watch(self):
+        try:
+            async with get_db()[VERSIONS].watch(
+                [{"$match": {"documentKey._id": VERSIONS_ID}}], full_document="updateLookup"
+            ) as stream:
+                self._streaming = True
+                # Catch up on anything written before the stream opened
+                await self._fetch()
+                async for change in stream:
+                    self.observe(change.get("fullDocument"))
+        except PyMongoError as e:
+            logger.warning(f"Change stream unavailable, polling cache versions instead: {e}")
+        finally:
+            self._streaming = False
+
+    def start(self):
+        if CACHE_CHANGE_STREAM and self._watch is None:
+            self._watch = asyncio.get_running_loop().create_task(self._run_watch())
+
+    async def stop(self):
+        if self._watch is not None:
+            self._watch.cancel()
+            try:
+                await self._watch
+            except asyncio.CancelledError:
+                pass
+            self._watch = None
+
+
+versions = VersionTracker(CACHE_VERSION_CHECK_MS)
+
+
+class VersionedCache:
+    """LRU of (collection, key) -> (version, value)."""
+
+    def __init__(self, name: str, max_entries: int):
+        self.name = name
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[int, Any]]" = OrderedDict()
+        self._flights = SingleFlight(name)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_or_load(self, collection: str, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        if not CACHE_ENABLED:
+            return await loader()
+
+        version = await versions.current(collection)
+        entry_key = (collection, key)
+        entry = self._entries.get(entry_key)
+        if entry is not None and entry[0] == version:
+            self._entries.move_to_end(entry_key)
+            cache_result(self.name, True)
+            return entry[1]
+
+        cache_result(self.name, False)
+        # Concurrent misses for one entry share a single load; the version is
+        # part of the key so nobody joins a load that predates a write they saw
+        value = await self._flights.do((entry_key, version), loader)
+        # Tagged with the version read before loading, so a write racing the
+        # load makes this entry stale rather than hiding the write
+        self._entries[entry_key] = (version, value)
+        self._entries.move_to_end(entry_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        self._entries.clear()
+
+
+content_cache = VersionedCache("content", CACHE_MAX_ENTRIES)
+
+registry.callback_gauge(
+    "content_cache_entries", "Entries in the versioned content cache.", lambda: len(content_cache)
+)
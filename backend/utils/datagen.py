@@ -0,0 +1,287 @@
+"""
+Deterministic synthetic data for donations, volunteers, inquiries and
+newsletter subscribers, at production scale.
+
+    cd backend
+    python -m utils.datagen --donations 2000000 --volunteers 200000 --seed 7
+    python -m utils.datagen --config distributions.json --inquiries 500000 --clear
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from db import get_db
+from utils import donation_rollups, donors
+from utils.matching import match_tokens
+
+FIRST_NAMES = [
+    "Aarav", "Aditi", "Amit", "Anita", "Arjun", "Bhavna", "Deepak", "Divya", "Gaurav", "Geeta",
+    "Harish", "Isha", "Kamla", "Kavita", "Mahesh", "Meena", "Neha", "Pooja", "Priya", "Rahul",
+    "Raju", "Ravi", "Rekha", "Rohit", "Sanjay", "Seema", "Sunita", "Suresh", "Vikram", "Vinod",
+]
+LAST_NAMES = [
+    "Sharma", "Meena", "Verma", "Gupta", "Singh", "Jain", "Agarwal", "Bhil", "Choudhary", "Joshi",
+    "Kumawat", "Mathur", "Patel", "Rathore", "Saini", "Yadav",
+]
+EMAIL_DOMAINS = ["gmail.com", "yahoo.co.in", "outlook.com", "rediffmail.com", "hotmail.com"]
+INTERESTS = [
+    "Teaching", "Healthcare", "Women Empowerment", "Child Development", "Fundraising",
+    "Social Media", "Tribal Upliftment", "Event Management", "Skill Training",
+]
+AVAILABILITY = ["Weekends", "Weekdays", "Evenings", "Full-time", "Flexible"]
+SUBJECTS = ["Donation query", "Volunteering", "Partnership", "80G receipt", "Program information", "Other"]
+
+
+class GeneratorConfig(BaseModel):
+    """Sizes and distributions for one generator run; identical configs produce identical data."""
+
+    seed: int = 42
+    donations: int = 0
+    volunteers: int = 0
+    inquiries: int = 0
+    newsletter: int = 0
+
+    batch_size: int = 5000
+    concurrency: int = 4
+    clear: bool = False
+
+    # Fixed window rather than "now" so the same seed always yields the same dates
+    start_date: datetime = datetime(2023, 4, 1)
+    end_date: datetime = datetime(2026, 3, 31)
+
+    # Donation amounts follow a log-normal around ~1,500 INR, rounded to 100
+    amount_median: float = 1500
+    amount_sigma: float = 1.1
+    amount_min: float = 100
+    amount_max: float = 500000
+
+    donation_status: Dict[str, float] = {"completed": 0.78, "pending": 0.12, "failed": 0.10}
+    donation_type: Dict[str, float] = {"one-time": 0.82, "monthly": 0.18}
+    pan_ratio: float = 0.35
+    volunteer_status: Dict[str, float] = {"new": 0.45, "contacted": 0.25, "accepted": 0.2, "rejected": 0.1}
+    inquiry_status: Dict[str, float] = {"new": 0.3, "replied": 0.5, "closed": 0.2}
+    newsletter_status: Dict[str, float] = {"active": 0.88, "unsubscribed": 0.12}
+    cities: Dict[str, float] = Field(default_factory=lambda: {
+        "Banswara": 0.22, "Udaipur": 0.18, "Jaipur": 0.16, "Dungarpur": 0.12, "Kushalgarh": 0.08,
+        "Jodhpur": 0.08, "Ajmer": 0.06, "Kota": 0.05, "Sajjangarh": 0.05,
+    })
+
+
+# ======================================================
+# RECORD BUILDERS
+# ======================================================
+def _pick(rng: random.Random, weights: Dict[str, float]) -> str:
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _person(rng: random.Random, index: int) -> Dict[str, str]:
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return {
+        "name": f"{first} {last}",
+        "email": f"{first.lower()}.{last.lower()}{index}@{rng.choice(EMAIL_DOMAINS)}",
+        "phone": f"{rng.choice('6789')}{rng.randrange(10 ** 9):09d}",
+    }
+
+
+def _when(rng: random.Random, config: GeneratorConfig) -> datetime:
+    span = (config.end_date - config.start_date).total_seconds()
+    return config.start_date + timedelta(seconds=rng.random() * span)
+
+
+def _donation(rng: random.Random, index: int, config: GeneratorConfig) -> dict:
+    amount = rng.lognormvariate(0, config.amount_sigma) * config.amount_median
+    amount = min(max(round(amount, -2), config.amount_min), config.amount_max)
+    status = _pick(rng, config.donation_status)
+    donation_id = _uuid(rng)
+    doc = {
+        "id": donation_id,
+        **_person(rng, index),
+        "amount": float(amount),
+        "type": _pick(rng, config.donation_type),
+        "pan": None,
+        "address": None,
+        "status": status,
+        "payment_id": None,
+        "razorpay_order_id": f"order_{donation_id.replace('-', '')[:14]}",
+        "created_at": _when(rng, config),
+    }
+    if rng.random() < config.pan_ratio:
+        doc["pan"] = "".join(rng.choices("ABCDEFGHIJKLMNOPQRSTUVWXYZ", k=5)) + \
+            f"{rng.randrange(10000):04d}" + rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+        doc["address"] = f"{rng.randint(1, 400)}, Main Road, {_pick(rng, config.cities)}, Rajasthan"
+    if status == "completed":
+        doc["payment_id"] = f"pay_{donation_id.replace('-', '')[-14:]}"
+    if status == "failed":
+        doc["error"] = "Payment declined by bank"
+    return doc
+
+
+def _volunteer(rng: random.Random, index: int, config: GeneratorConfig) -> dict:
+    doc = {
+        "id": _uuid(rng),
+        **_person(rng, index),
+        "city": _pick(rng, config.cities),
+        "interest": ", ".join(rng.sample(INTERESTS, rng.randint(1, 3))),
+        "availability": rng.choice(AVAILABILITY),
+        "experience": rng.choice([None, "College NSS volunteer", "Teaching experience", "Worked at an NGO"]),
+        "message": rng.choice([None, "Happy to help wherever needed."]),
+        "status": _pick(rng, config.volunteer_status),
+        "created_at": _when(rng, config),
+    }
+    doc["match_tokens"] = match_tokens(doc)
+    return doc
+
+
+def _inquiry(rng: random.Random, index: int, config: GeneratorConfig) -> dict:
+    person = _person(rng, index)
+    return {
+        "id": _uuid(rng),
+        **person,
+        "phone": person["phone"] if rng.random() < 0.7 else None,
+        "subject": rng.choice(SUBJECTS),
+        "message": "I would like to know more about your work in rural Rajasthan.",
+        "status": _pick(rng, config.inquiry_status),
+        "created_at": _when(rng, config),
+    }
+
+
+def _subscriber(rng: random.Random, index: int, config: GeneratorConfig) -> dict:
+    return {
+        "id": _uuid(rng),
+        # Unique per index so the newsletter's unique email index holds
+        "email": _person(rng, index)["email"],
+        "status": _pick(rng, config.newsletter_status),
+        "subscribed_at": _when(rng, config),
+    }
+
+
+BUILDERS: Dict[str, Callable[[random.Random, int, GeneratorConfig], dict]] = {
+    "donations": _donation,
+    "volunteers": _volunteer,
+    "inquiries": _inquiry,
+    "newsletter": _subscriber,
+}
+
+
+def build_batch(collection: str, batch_index: int, config: GeneratorConfig, total: int) -> List[dict]:
+    """
+    Each batch has its own RNG derived from (seed, collection, batch), so
+    the output does not depend on concurrency or on which batches ran first.
+    """
+    rng = random.Random(f"{config.seed}:{collection}:{batch_index}")
+    start = batch_index * config.batch_size
+    stop = min(start + config.batch_size, total)
+    builder = BUILDERS[collection]
+    docs = []
+    for index in range(start, stop):
+        doc = builder(rng, index, config)
+        doc["synthetic"] = True
+        docs.append(doc)
+    return docs
+
+
+# ======================================================
+# WRITER
+# ======================================================
+async def generate(config: GeneratorConfig, progress: Optional[Callable[[str, int], None]] = None) -> Dict[str, int]:
+    """
+    Insert the configured volumes in parallel unordered batches, then
+    rebuild the donation rollups and donor profiles derived from them.
+    Returns counts per collection.
+    """
+    db = get_db()
+    semaphore = asyncio.Semaphore(config.concurrency)
+    inserted: Dict[str, int] = {}
+
+    async def write(collection: str, batch_index: int, total: int):
+        try:
+            # CPU-bound; built off the event loop so the API keeps serving
+            docs = await asyncio.to_thread(build_batch, collection, batch_index, config, total)
+            await db[collection].insert_many(docs, ordered=False)
+            inserted[collection] += len(docs)
+            if progress:
+                progress(collection, inserted[collection])
+        finally:
+            semaphore.release()
+
+    for collection in BUILDERS:
+        total = getattr(config, collection)
+        if config.clear:
+            await db[collection].delete_many({"synthetic": True})
+        if not total:
+            continue
+
+        inserted[collection] = 0
+        tasks = []
+        batches = (total + config.batch_size - 1) // config.batch_size
+        for batch_index in range(batches):
+            # Bounded: at most `concurrency` batches are built and in flight
+            await semaphore.acquire()
+            tasks.append(asyncio.create_task(write(collection, batch_index, total)))
+        await asyncio.gather(*tasks)
+
+    # Both are maintained per write by the app, which bulk inserts bypass
+    if config.donations or config.clear:
+        await donation_rollups.rebuild()
+        await donors.backfill()
+    return inserted
+
+
+def main():
+    description = " ".join(__doc__.strip().split("\n\n")[0].split())
+    parser = argparse.ArgumentParser(prog="python -m utils.datagen", description=description)
+    parser.add_argument("--config", help="JSON file with any GeneratorConfig fields, e.g. status weights or cities")
+    for field_name, field in GeneratorConfig.model_fields.items():
+        flag = f"--{field_name.replace('_', '-')}"
+        if field.annotation is bool:
+            parser.add_argument(flag, action="store_true", default=None)
+        elif field.annotation in (int, float):
+            parser.add_argument(flag, type=field.annotation)
+        elif field.annotation is datetime:
+            parser.add_argument(flag, type=datetime.fromisoformat)
+    args = vars(parser.parse_args())
+
+    overrides = {}
+    config_path = args.pop("config")
+    if config_path:
+        with open(config_path) as f:
+            overrides.update(json.load(f))
+    # Flags given on the command line win over the file
+    overrides.update({k: v for k, v in args.items() if v is not None})
+    config = GeneratorConfig(**overrides)
+
+    started = time.perf_counter()
+
+    current = []
+
+    def progress(collection: str, count: int):
+        if current and current[-1] != collection:
+            print()
+        current[:] = [collection]
+        print(f"\r{collection}: {count:,} inserted", end="", flush=True)
+
+    async def run():
+        result = await generate(config, progress)
+        if current:
+            print()
+        return result
+
+    result = asyncio.run(run())
+    elapsed = time.perf_counter() - started
+    total = sum(result.values())
+    print(f"Inserted {total:,} documents in {elapsed:.1f}s ({total / elapsed:,.0f}/s): {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Donation totals per day, ISO week and month, kept in ``donation_rollups``.
+
+Every status change moves one donation's amount from its old status to
+its new one in the three buckets of its ``created_at`` date, so analytics
+read a few dozen small documents instead of aggregating ``donations``.
+During a rebuild those moves are logged and applied after the swap
+(see utils/rebuilds.py).
+
+    cd backend
+    python -m utils.donation_rollups     # rebuild from the donations collection
+"""
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from db import get_db, ensure_index
+from utils import rebuilds
+
+ROLLUPS = "donation_rollups"
+# Changes made while a rebuild runs, applied once it has swapped
+DELTAS = f"{ROLLUPS}_deltas"
+# Status a donation had when it first changed during a rebuild
+BASE_FIELD = "rollup_base_status"
+REPLAY_BATCH = 1000
+PERIODS = {
+    # period -> (strftime/$dateToString format, bucket start from a key)
+    "day": ("%Y-%m-%d", lambda key: datetime.strptime(key, "%Y-%m-%d")),
+    "week": ("%G-W%V", lambda key: datetime.strptime(f"{key}-1", "%G-W%V-%u")),
+    "month": ("%Y-%m", lambda key: datetime.strptime(key, "%Y-%m")),
+}
+
+
+def _field(value: Optional[str]) -> str:
+    # Dots would be read as nested paths by $inc
+    return (value or "unknown").replace(".", "_").replace("$", "_")
+
+
+def bucket_keys(created_at: datetime) -> Dict[str, str]:
+    return {period: created_at.strftime(fmt) for period, (fmt, _) in PERIODS.items()}
+
+
+def _increments(donation: dict, old_status: Optional[str], new_status: Optional[str]) -> Dict[str, float]:
+    amount = float(donation.get("amount") or 0)
+    donation_type = _field(donation.get("type"))
+    inc: Dict[str, float] = {}
+    for status_value, sign in ((old_status, -1), (new_status, 1)):
+        if not status_value:
+            continue
+        prefix = _field(status_value)
+        for path, value in (
+            (f"{prefix}.count", 1),
+            (f"{prefix}.amount", amount),
+            (f"{prefix}.by_type.{donation_type}.count", 1),
+            (f"{prefix}.by_type.{donation_type}.amount", amount),
+        ):
+            inc[path] = inc.get(path, 0) + sign * value
+    return {path: value for path, value in inc.items() if value}
+
+
+def preserve_base_status() -> dict:
+    """
+    Pipeline stage for a status update during a rebuild: remembers the
+    status the rebuild should count, i.e. the one from before its first
+    change, however late the rebuild's scan reaches the donation.
+    """
+    return {"$set": {BASE_FIELD: {"$ifNull": [f"${BASE_FIELD}", "$status"]}}}
+
+
+async def _apply(collection, created_at: datetime, inc: Dict[str, float]):
+    await ensure_index(ROLLUPS, [("period", 1), ("start", 1)])
+    operations = []
+    for period, key in bucket_keys(created_at).items():
+        operations.append(UpdateOne(
+            {"_id": f"{period}:{key}"},
+            {
+                "$inc": inc,
+                "$setOnInsert": {"period": period, "key": key, "start": PERIODS[period][1](key)},
+            },
+            upsert=True,
+        ))
+    await collection.bulk_write(operations, ordered=False)
+
+
+async def apply_transition(donation: dict, old_status: Optional[str], new_status: Optional[str],
+                           deferred: bool = False):
+    """
+    Move ``donation`` from ``old_status`` to ``new_status`` in its buckets.
+    ``old_status=None`` records a new donation. ``deferred`` (a rebuild is
+    running) logs the move for the rebuild to apply instead.
+    """
+    inc = _increments(donation, old_status, new_status)
+    created_at = donation.get("created_at")
+    if not inc or not isinstance(created_at, datetime):
+        return
+
+    if deferred:
+        await get_db()[DELTAS].insert_one({"created_at": created_at, "inc": inc, "new": old_status is None})
+        return
+    await _apply(get_db()[ROLLUPS], created_at, inc)
+
+
+# ======================================================
+# READ SIDE
+# ======================================================
+def summarize(bucket: dict, status_value: str = "completed") -> dict:
+    figures = bucket.get(status_value, {})
+    count = figures.get("count", 0)
+    amount = figures.get("amount", 0)
+    return {
+        "key": bucket["key"],
+        "start": bucket["start"],
+        "count": count,
+        "amount": round(amount, 2),
+        "average": round(amount / count, 2) if count else 0,
+        "by_type": {
+            t: {"count": v.get("count", 0), "amount": round(v.get("amount", 0), 2)}
+            for t, v in figures.get("by_type", {}).items()
+        },
+        "pending": bucket.get("pending", {}).get("count", 0),
+        "failed": bucket.get("failed", {}).get("count", 0),
+    }
+
+
+async def load_series(period: str, start: datetime, end: datetime) -> List[dict]:
+    cursor = get_db()[ROLLUPS].find(
+        {"period": period, "start": {"$gte": start, "$lt": end}},
+        {"_id": 0},
+    ).sort("start", 1)
+    return [summarize(bucket) async for bucket in cursor]
+
+
+# ======================================================
+# BACKFILL
+# ======================================================
+async def _replay(cutoff: Optional[datetime]) -> int:
+    """
+    Apply the logged changes to the live rollups. New donations created
+    before ``cutoff`` are skipped: the rebuild's scan already counted them.
+    """
+    db = get_db()
+    applied = 0
+    while True:
+        deltas = await db[DELTAS].find().sort("_id", 1).to_list(REPLAY_BATCH)
+        if not deltas:
+            return applied
+        for delta in deltas:
+            if cutoff and delta["new"] and delta["created_at"] < cutoff:
+                continue
+            await _apply(db[ROLLUPS], delta["created_at"], delta["inc"])
+            applied += 1
+        await db[DELTAS].delete_many({"_id": {"$in": [d["_id"] for d in deltas]}})
+
+
+async def rebuild() -> int:
+    """
+    Recompute every bucket from ``donations`` (and its archive) into a side
+    collection and swap it in, so readers never see a half-built set.
+    Status changes made meanwhile are applied after the swap; until then
+    the live rollups lag behind them. Run one rebuild at a time.
+    """
+    db = get_db()
+    # Leftovers of an interrupted rebuild would be counted twice
+    await db[DELTAS].drop()
+    await db.donations.update_many({BASE_FIELD: {"$exists": True}}, {"$unset": {BASE_FIELD: ""}})
+
+    await rebuilds.begin(ROLLUPS)
+    # Donations created from here on are counted from the log alone
+    cutoff = datetime.utcnow()
+    swapped = False
+    try:
+        written = await _build(cutoff)
+        swapped = True
+    finally:
+        await rebuilds.end(ROLLUPS)
+        # A failed rebuild left the old rollups in place, which have none of the logged changes
+        await _replay(cutoff if swapped else None)
+        await db.donations.update_many({BASE_FIELD: {"$exists": True}}, {"$unset": {BASE_FIELD: ""}})
+    return written
+
+
+async def _build(cutoff: datetime) -> int:
+    db = get_db()
+    staging = db[f"{ROLLUPS}_rebuild"]
+    await staging.drop()
+
+    written = 0
+    for period, (fmt, start_of) in PERIODS.items():
+        pipeline = [
+            {"$match": {"created_at": {"$type": "date", "$lt": cutoff}}},
+            {"$group": {
+                "_id": {
+                    "key": {"$dateToString": {"format": fmt, "date": "$created_at"}},
+                    "status": {"$ifNull": [f"${BASE_FIELD}", "$status"]},
+                    "type": "$type",
+                },
+                "count": {"$sum": 1},
+                "amount": {"$sum": "$amount"},
+            }},
+        ]
+        buckets: Dict[str, dict] = {}
+        # Retention moves failed and abandoned donations out of the hot collection
+        for source in ("donations", "donations_archive"):
+            async for row in db[source].aggregate(pipeline, allowDiskUse=True):
+                key = row["_id"]["key"]
+                bucket = buckets.setdefault(key, {
+                    "_id": f"{period}:{key}", "period": period, "key": key, "start": start_of(key),
+                })
+                figures = bucket.setdefault(_field(row["_id"].get("status")), {"count": 0, "amount": 0, "by_type": {}})
+                by_type = figures["by_type"].setdefault(_field(row["_id"].get("type")), {"count": 0, "amount": 0})
+                for target in (figures, by_type):
+                    target["count"] += row["count"]
+                    target["amount"] += row["amount"]
+        if buckets:
+            await staging.insert_many(list(buckets.values()))
+            written += len(buckets)
+
+    if written:
+        await staging.create_index([("period", 1), ("start", 1)])
+        await staging.rename(ROLLUPS, dropTarget=True)
+    else:
+        await db[ROLLUPS].drop()
+    return written
+
+
+def main():
+    written = asyncio.run(rebuild())
+    print(f"Rebuilt {written} donation rollup buckets")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+from datetime import datetime
+from typing import Optional
+
+from pymongo import ReturnDocument
+
+from db import get_db
+from utils import rebuilds
+from utils.donation_rollups import ROLLUPS, apply_transition, preserve_base_status
+from utils.donors import DEFERRED_FIELD, DONORS, record_completed_donation
+from utils.events import events
+
+DONATION_STATUSES = ("pending", "completed", "failed")
+
+# new status -> statuses a donation may move to it from
+ALLOWED_FROM = {
+    "completed": ("pending", "failed"),
+    "failed": ("pending",),
+}
+
+
+async def record_donation_created(donation: dict):
+    """Count a donation in the rollups and announce it; call after its insert succeeded."""
+    active = await rebuilds.active()
+    await apply_transition(donation, None, donation.get("status", "pending"), deferred=ROLLUPS in active)
+    events.publish_created("donations", donation)
+
+
+async def set_donation_status(query: dict, new_status: str, **fields) -> Optional[dict]:
+    """
+    The single place donations change status.
+
+    The status check and the write are one atomic update, so a webhook
+    delivered twice moves a donation (and its rollups) only once. Returns
+    the updated donation, or None if none matched or the transition is
+    not allowed from its current status.
+    """
+    if new_status not in ALLOWED_FROM:
+        raise ValueError(f"Unknown donation status transition target: {new_status}")
+
+    active = await rebuilds.active()
+    changes = {"status": new_status, "status_updated_at": datetime.utcnow(), **fields}
+    donor_deferred = new_status == "completed" and DONORS in active
+    if donor_deferred:
+        changes[DEFERRED_FIELD] = True
+    update = {"$set": changes}
+    if ROLLUPS in active:
+        # Values are set literally: a pipeline would evaluate "$..." strings
+        update = [preserve_base_status(), {"$set": {k: {"$literal": v} for k, v in changes.items()}}]
+
+    before = await get_db().donations.find_one_and_update(
+        {**query, "status": {"$in": list(ALLOWED_FROM[new_status])}},
+        update,
+        projection={"_id": 0},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if before is None:
+        return None
+
+    await apply_transition(before, before.get("status"), new_status, deferred=ROLLUPS in active)
+    updated = {**before, "status": new_status, **fields}
+    if new_status == "completed":
+        updated["donor_id"] = await record_completed_donation(updated, deferred=donor_deferred)
+    events.publish_status("donations", updated)
+    return updated
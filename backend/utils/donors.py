@@ -0,0 +1,183 @@
+"""
+Lifetime giving per donor, kept in ``donors``.
+
+A donor is a normalized (email, phone) pair. Each completed donation is
+folded into its donor with one upsert, so "top donors" and "how much has
+this person given" read one document instead of grouping ``donations``.
+Donations completed during a backfill are logged and folded in after
+the swap (see utils/rebuilds.py).
+
+    cd backend
+    python -m utils.donors     # one-time backfill from completed donations
+"""
+import asyncio
+import hashlib
+import re
+from datetime import datetime
+from typing import Dict, Optional
+
+from pymongo import UpdateOne
+
+from db import get_db, ensure_index
+from utils import rebuilds
+
+DONORS = "donors"
+# Completions made while a backfill runs, folded in once it has swapped
+DELTAS = f"{DONORS}_deltas"
+# Marks a donation the backfill's scan must leave to the log
+DEFERRED_FIELD = "donor_deferred"
+BACKFILL_BATCH = 1000
+FOLD_FIELDS = ("id", "name", "email", "phone", "amount", "type", "created_at")
+
+
+def normalize_phone(phone: Optional[str]) -> str:
+    """Digits only, without the +91 / leading 0 so local and international forms match."""
+    digits = re.sub(r"\D", "", phone or "")
+    return digits[-10:]
+
+
+def donor_id(email: str, phone: Optional[str]) -> str:
+    key = f"{(email or '').strip().lower()}|{normalize_phone(phone)}"
+    # Hashed so donor URLs and logs carry no contact details
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:24]
+
+
+DONOR_INDEXES = ([("total_amount", -1)], [("donation_count", -1)], [("last_gift_at", -1)])
+
+
+async def ensure_donor_indexes():
+    for keys in DONOR_INDEXES:
+        await ensure_index(DONORS, keys)
+    await ensure_index("donations", "donor_id")
+
+
+def _fold(donation: dict) -> dict:
+    """The upsert that adds one completed donation to its donor."""
+    amount = float(donation.get("amount") or 0)
+    gift_at = donation.get("created_at") or datetime.utcnow()
+    return {
+        "$inc": {"total_amount": amount, "donation_count": 1},
+        "$min": {"first_gift_at": gift_at},
+        "$max": {
+            "last_gift_at": gift_at,
+            "largest_gift": amount,
+            # BSON orders true after false, so this latches once a monthly gift completes
+            "is_monthly": donation.get("type") == "monthly",
+        },
+        "$set": {
+            "name": donation.get("name"),
+            "email": (donation.get("email") or "").strip().lower(),
+            "phone": normalize_phone(donation.get("phone")) or None,
+        },
+        "$setOnInsert": {"id": donor_id(donation.get("email"), donation.get("phone"))},
+    }
+
+
+async def record_completed_donation(donation: dict, deferred: bool = False) -> str:
+    """
+    Called exactly once per donation by set_donation_status, whose guarded
+    status update is what makes this increment happen only once.
+    ``deferred`` (a backfill is running) logs the donation for the
+    backfill to fold in instead.
+    """
+    await ensure_donor_indexes()
+    key = donor_id(donation.get("email"), donation.get("phone"))
+    db = get_db()
+    if deferred:
+        await db[DELTAS].insert_one({field: donation.get(field) for field in FOLD_FIELDS})
+    else:
+        await db[DONORS].update_one({"_id": key}, _fold(donation), upsert=True)
+    await db.donations.update_one({"id": donation["id"]}, {"$set": {"donor_id": key}})
+    return key
+
+
+# ======================================================
+# BACKFILL
+# ======================================================
+async def _replay() -> int:
+    """Fold the logged completions into the live donors."""
+    db = get_db()
+    applied = 0
+    while True:
+        deltas = await db[DELTAS].find().sort("_id", 1).to_list(BACKFILL_BATCH)
+        if not deltas:
+            return applied
+        await db[DONORS].bulk_write([
+            UpdateOne({"_id": donor_id(d.get("email"), d.get("phone"))}, _fold(d), upsert=True)
+            for d in deltas
+        ], ordered=False)
+        applied += len(deltas)
+        await db[DELTAS].delete_many({"_id": {"$in": [d["_id"] for d in deltas]}})
+
+
+async def backfill() -> Dict[str, int]:
+    """
+    Rebuild ``donors`` from every completed donation into a staging
+    collection, tag each donation with its donor_id, then swap it in.
+    Donations completed meanwhile are folded in after the swap; until
+    then the live donors lag behind them. Run one backfill at a time.
+    """
+    db = get_db()
+    # Leftovers of an interrupted backfill would be counted twice
+    await db[DELTAS].drop()
+    await db.donations.update_many({DEFERRED_FIELD: {"$exists": True}}, {"$unset": {DEFERRED_FIELD: ""}})
+
+    await rebuilds.begin(DONORS)
+    try:
+        return await _build()
+    finally:
+        await rebuilds.end(DONORS)
+        # Whether or not the swap happened, the live donors lack the logged completions
+        await _replay()
+        await db.donations.update_many({DEFERRED_FIELD: {"$exists": True}}, {"$unset": {DEFERRED_FIELD: ""}})
+
+
+async def _build() -> Dict[str, int]:
+    db = get_db()
+    staging = db[f"{DONORS}_rebuild"]
+    await staging.drop()
+
+    donor_ops, donation_ops = [], []
+    seen = set()
+    donations = 0
+
+    async def flush():
+        if donor_ops:
+            await staging.bulk_write(donor_ops, ordered=False)
+            donor_ops.clear()
+        if donation_ops:
+            await db.donations.bulk_write(donation_ops, ordered=False)
+            donation_ops.clear()
+
+    cursor = db.donations.find(
+        {"status": "completed", DEFERRED_FIELD: {"$exists": False}},
+        {"_id": 0, **{field: 1 for field in FOLD_FIELDS}},
+    )
+    async for donation in cursor:
+        key = donor_id(donation.get("email"), donation.get("phone"))
+        seen.add(key)
+        donor_ops.append(UpdateOne({"_id": key}, _fold(donation), upsert=True))
+        donation_ops.append(UpdateOne({"id": donation["id"]}, {"$set": {"donor_id": key}}))
+        donations += 1
+        if len(donor_ops) >= BACKFILL_BATCH:
+            await flush()
+    await flush()
+
+    if seen:
+        # Indexes travel with the collection through the rename
+        for keys in DONOR_INDEXES:
+            await staging.create_index(keys)
+        await staging.rename(DONORS, dropTarget=True)
+    else:
+        await db[DONORS].drop()
+    await ensure_index("donations", "donor_id")
+    return {"donors": len(seen), "donations": donations}
+
+
+def main():
+    result = asyncio.run(backfill())
+    print(f"Backfilled {result['donors']} donors from {result['donations']} completed donations")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,9 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
+from utils.timing import span
+from utils.jobs import enqueue, job_handler
+
 SMTP_HOST = os.getenv("SMTP_HOST")
 SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
 SMTP_USER = os.getenv("SMTP_USER")
@@ -10,7 +13,7 @@ SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
 OFFICIAL_EMAIL = os.getenv("OFFICIAL_EMAIL")
 
 
-def send_email(to_email: str, subject: str, html_content: str):
+def send_email(to_email: str, subject: str, html_content: str, raise_errors: bool = False):
     """
     Generic email sender (safe for production).
     If SMTP is not configured, fails silently.
@@ -26,21 +29,30 @@ def send_email(to_email: str, subject: str, html_content: str):
     msg.attach(MIMEText(html_content, "html"))
 
     try:
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
+        with span("smtp"), smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
             server.starttls()
             server.login(SMTP_USER, SMTP_PASSWORD)
             server.send_message(msg)
     except Exception as e:
+        if raise_errors:
+            raise
         # Never crash API because of email failure
         print("Email sending failed:", e)
 
 
-def send_donation_emails(donation: dict):
+@job_handler("email.send")
+def send_email_job(payload: dict):
+    # Raising lets the job be retried with backoff
+    send_email(payload["to_email"], payload["subject"], payload["html_content"], raise_errors=True)
+
+
+def donation_emails(donation: dict) -> list:
     """
-    Sends:
+    Builds:
     1️⃣ Thank-you email to donor
     2️⃣ Notification email to official NGO email
     """
+    messages = []
 
     # ===============================
     # 1️⃣ Donor Thank You Email
@@ -71,11 +83,11 @@ def send_donation_emails(donation: dict):
     </div>
     """
 
-    send_email(
-        to_email=donation["email"],
-        subject="Thank you for supporting RIDS ❤️",
-        html_content=donor_html,
-    )
+    messages.append({
+        "to_email": donation["email"],
+        "subject": "Thank you for supporting RIDS ❤️",
+        "html_content": donor_html,
+    })
 
     # ===============================
     # 2️⃣ Official NGO Notification
@@ -97,8 +109,28 @@ def send_donation_emails(donation: dict):
         </div>
         """
 
-        send_email(
-            to_email=OFFICIAL_EMAIL,
-            subject="New Donation Received – RIDS",
-            html_content=official_html,
+        messages.append({
+            "to_email": OFFICIAL_EMAIL,
+            "subject": "New Donation Received – RIDS",
+            "html_content": official_html,
+        })
+
+    return messages
+
+
+def send_donation_emails(donation: dict):
+    for message in donation_emails(donation):
+        send_email(**message)
+
+
+async def enqueue_donation_emails(donation: dict):
+    """One job per message, so a retry never re-sends the one that went out."""
+    # donation_emails lists the donor's message first; the role keeps the keys
+    # apart when the donor's address is also OFFICIAL_EMAIL
+    for role, message in zip(("donor", "official"), donation_emails(donation)):
+        await enqueue(
+            "email.send",
+            message,
+            priority=10,
+            dedupe_key=f"donation-email:{donation['id']}:{role}",
         )
@@ -0,0 +1,161 @@
+"""
+Admin activity events for the live dashboard stream.
+
+Write handlers call ``publish_created`` / ``publish_status`` with the record
+they just wrote. Events land in a ring buffer of the last EVENTS_BUFFER,
+numbered ``<process epoch>:<seq>`` so an SSE client reconnecting with
+Last-Event-ID gets exactly what it missed. An id from another process or one
+that has scrolled out of the buffer gets a ``reset`` event instead, telling
+the client to reload once.
+
+With EVENTS_CHANGE_STREAM=true (replica sets and Atlas) the events come from
+a change stream on the source collections, so every instance sees writes
+made by the others; the local publishes are then skipped to avoid doubles.
+"""
+import asyncio
+import logging
+import os
+from collections import deque
+from datetime import datetime
+from typing import Deque, List, Optional, Tuple
+from uuid import uuid4
+
+from pymongo.errors import PyMongoError
+
+from db import get_db
+from utils.metrics import registry
+
+EVENTS_BUFFER = int(os.getenv("EVENTS_BUFFER", 1000))
+# Needs a replica set; on a standalone server events stay local to the instance
+EVENTS_CHANGE_STREAM = os.getenv("EVENTS_CHANGE_STREAM", "false").lower() == "true"
+
+# collection -> (event prefix, fields sent to the dashboard)
+SOURCES = {
+    "donations": ("donation", ("id", "name", "amount", "type", "status")),
+    "inquiries": ("inquiry", ("id", "name", "subject", "status")),
+    "volunteers": ("volunteer", ("id", "name", "city", "interest", "status")),
+}
+
+logger = logging.getLogger("events")
+
+
+def summary(collection: str, doc: dict) -> dict:
+    return {field: doc.get(field) for field in SOURCES[collection][1]}
+
+
+class EventBus:
+    def __init__(self, size: int):
+        self.epoch = uuid4().hex[:8]
+        self.subscribers = 0
+        self._buffer: Deque[dict] = deque(maxlen=size)
+        self._seq = 0
+        self._changed = asyncio.Event()
+        self._closed = False
+        self._watch: Optional[asyncio.Task] = None
+        self._streaming = False
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.epoch}:{seq}"
+
+    def _append(self, event_type: str, data: dict):
+        self._seq += 1
+        self._buffer.append({"seq": self._seq, "type": event_type, "data": data, "at": datetime.utcnow()})
+        # Wake everyone waiting on the current event, then start a fresh one
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def publish(self, event_type: str, data: dict):
+        if not self._streaming:
+            self._append(event_type, data)
+
+    def publish_created(self, collection: str, doc: dict):
+        self.publish(f"{SOURCES[collection][0]}.created", summary(collection, doc))
+
+    def publish_status(self, collection: str, doc: dict):
+        self.publish(f"{SOURCES[collection][0]}.status", summary(collection, doc))
+
+    # ==================================================
+    # READING
+    # ==================================================
+    def since(self, after: int) -> Optional[List[dict]]:
+        """Events after ``after``, or None if some of them were already dropped."""
+        if self._buffer and after < self._buffer[0]["seq"] - 1:
+            return None
+        return [event for event in self._buffer if event["seq"] > after]
+
+    def resume_point(self, last_event_id: Optional[str]) -> Tuple[int, bool]:
+        """(seq to continue after, whether the client must reload) for a Last-Event-ID."""
+        if not last_event_id:
+            return self._seq, False
+        epoch, _, seq = last_event_id.partition(":")
+        if epoch == self.epoch and seq.isdigit() and int(seq) <= self._seq and self.since(int(seq)) is not None:
+            return int(seq), False
+        return self._seq, True
+
+    async def wait(self, after: int, timeout: float) -> Optional[List[dict]]:
+        """Like ``since``, but waits up to ``timeout`` for something new; [] if nothing came."""
+        if after >= self._seq and not self._closed:
+            changed = self._changed
+            try:
+                await asyncio.wait_for(changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        return self.since(after)
+
+    # ==================================================
+    # CHANGE STREAM
+    # ==================================================
+    async def _run_watch(self):
+        pipeline = [{"$match": {
+            "ns.coll": {"$in": list(SOURCES)},
+            "$or": [
+                {"operationType": "insert"},
+                {"operationType": "update", "updateDescription.updatedFields.status": {"$exists": True}},
+            ],
+        }}]
+        try:
+            async with get_db().watch(pipeline, full_document="updateLookup") as stream:
+                self._streaming = True
+                async for change in stream:
+                    collection = change["ns"]["coll"]
+                    doc = change.get("fullDocument") or {}
+                    kind = "created" if change["operationType"] == "insert" else "status"
+                    self._append(f"{SOURCES[collection][0]}.{kind}", summary(collection, doc))
+        except PyMongoError as e:
+            logger.warning(f"Change stream unavailable, publishing events locally instead: {e}")
+        finally:
+            self._streaming = False
+
+    def start(self):
+        if self._closed:
+            self._closed = False
+            self._changed = asyncio.Event()
+        if EVENTS_CHANGE_STREAM and self._watch is None:
+            self._watch = asyncio.get_running_loop().create_task(self._run_watch())
+
+    async def stop(self):
+        # Open streams end instead of holding shutdown until their clients leave
+        self._closed = True
+        self._changed.set()
+        if self._watch is not None:
+            self._watch.cancel()
+            try:
+                await self._watch
+            except asyncio.CancelledError:
+                pass
+            self._watch = None
+
+
+events = EventBus(EVENTS_BUFFER)
+
+registry.callback_gauge(
+    "events_subscribers", "Open admin event streams.", lambda: events.subscribers
+)
@@ -0,0 +1,251 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pymongo.errors import DuplicateKeyError
+
+from db import get_db, ensure_index
+
+# "mongo" is shared by every instance; "memory" only suits a single node
+IDEMPOTENCY_STORE = os.getenv("IDEMPOTENCY_STORE", "mongo")
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", 24 * 3600))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", 15))
+# An in-progress claim older than this is presumed dead (crashed worker) and
+# may be taken over by a retry; keep it well above the slowest handler
+IDEMPOTENCY_LEASE_SECONDS = float(os.getenv("IDEMPOTENCY_LEASE_SECONDS", 120))
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.1
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+
+
+# ======================================================
+# STORES
+# ======================================================
+class MemoryIdempotencyStore:
+    def __init__(self, ttl_seconds: int, lease_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.lease_seconds = lease_seconds
+        self._records: Dict[str, Dict[str, Any]] = {}
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl_seconds
+        for key in [k for k, r in self._records.items() if r["created"] < cutoff]:
+            del self._records[key]
+
+    async def reserve(self, key: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Claim ``key``; returns None on success or the existing record."""
+        self._expire()
+        now = time.monotonic()
+        existing = self._records.get(key)
+        if existing is not None:
+            stale = (
+                existing["state"] == IN_PROGRESS
+                and existing["fingerprint"] == fingerprint
+                and existing["started"] < now - self.lease_seconds
+            )
+            if not stale:
+                return existing
+            existing["started"] = now
+            return None
+        self._records[key] = {
+            "fingerprint": fingerprint,
+            "state": IN_PROGRESS,
+            "created": now,
+            "started": now,
+        }
+        return None
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._records.get(key)
+
+    async def complete(self, key: str, status_code: int, body: Any):
+        # The record may have expired while the handler ran
+        record = self._records.get(key)
+        if record is not None:
+            record.update(state=COMPLETED, status_code=status_code, body=body)
+
+    async def release(self, key: str):
+        self._records.pop(key, None)
+
+
+class MongoIdempotencyStore:
+    """Keys live in ``idempotency_keys`` and expire through a TTL index."""
+
+    collection_name = "idempotency_keys"
+
+    def __init__(self, ttl_seconds: int, lease_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.lease_seconds = lease_seconds
+
+    @property
+    def collection(self):
+        return get_db()[self.collection_name]
+
+    async def reserve(self, key: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        await ensure_index(
+            self.collection_name, "created_at", expireAfterSeconds=self.ttl_seconds
+        )
+        now = datetime.utcnow()
+        try:
+            await self.collection.insert_one({
+                "_id": key,
+                "fingerprint": fingerprint,
+                "state": IN_PROGRESS,
+                "created_at": now,
+                "started_at": now,
+            })
+            return None
+        except DuplicateKeyError:
+            pass
+
+        # Take over a claim whose owner died without completing or releasing it
+        cutoff = now - timedelta(seconds=self.lease_seconds)
+        taken = await self.collection.update_one(
+            {
+                "_id": key,
+                "state": IN_PROGRESS,
+                "fingerprint": fingerprint,
+                "$or": [
+                    {"started_at": {"$lt": cutoff}},
+                    # Claims written before started_at existed
+                    {"started_at": {"$exists": False}, "created_at": {"$lt": cutoff}},
+                ],
+            },
+            {"$set": {"started_at": now}},
+        )
+        if taken.modified_count:
+            return None
+        return await self.get(key) or await self.reserve(key, fingerprint)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"_id": key})
+
+    async def complete(self, key: str, status_code: int, body: Any):
+        await self.collection.update_one(
+            {"_id": key},
+            {"$set": {"state": COMPLETED, "status_code": status_code, "body": body}}
+        )
+
+    async def release(self, key: str):
+        await self.collection.delete_one({"_id": key, "state": IN_PROGRESS})
+
+
+if IDEMPOTENCY_STORE == "memory":
+    store = MemoryIdempotencyStore(IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_LEASE_SECONDS)
+else:
+    store = MongoIdempotencyStore(IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_LEASE_SECONDS)
+
+
+class _KeyLock:
+    """A lock plus the number of requests holding or queued on it."""
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+# Same-key requests inside one worker queue up here instead of polling
+_local_locks: Dict[str, _KeyLock] = {}
+
+
+def _fingerprint(payload: Any) -> str:
+    encoded = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+async def _wait_for_completion(key: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    while record and record["state"] == IN_PROGRESS and time.monotonic() < deadline:
+        await asyncio.sleep(POLL_INTERVAL)
+        record = await store.get(key)
+    return record
+
+
+def _replay(record: Dict[str, Any]) -> JSONResponse:
+    return JSONResponse(
+        content=record["body"],
+        status_code=record["status_code"],
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+# ======================================================
+# PUBLIC API
+# ======================================================
+async def run_idempotent(
+    key: Optional[str],
+    scope: str,
+    payload: Any,
+    handler: Callable[[], Awaitable[Any]],
+    status_code: int = status.HTTP_200_OK,
+):
+    """
+    Run ``handler`` at most once per ``Idempotency-Key``.
+
+    A repeat of a finished request gets the stored response back; a repeat
+    that arrives while the first is still running waits for it. Reusing a
+    key with a different payload is rejected with 422. If the handler
+    raises, the key is released so the client can retry; if the process
+    dies instead, a retry takes the key over once its lease has expired.
+    """
+    if not key:
+        return await handler()
+
+    if len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters"
+        )
+
+    full_key = f"{scope}:{key}"
+    fingerprint = _fingerprint(payload)
+
+    key_lock = _local_locks.setdefault(full_key, _KeyLock())
+    key_lock.users += 1
+    try:
+        async with key_lock.lock:
+            while True:
+                record = await store.reserve(full_key, fingerprint)
+                if record is None:
+                    break
+
+                if record["fingerprint"] != fingerprint:
+                    raise HTTPException(
+                        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        detail="Idempotency-Key was already used with a different request"
+                    )
+
+                record = await _wait_for_completion(full_key, record)
+                if record is None:
+                    # The other attempt failed and released the key
+                    continue
+                if record["state"] != COMPLETED:
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail="A request with this Idempotency-Key is still in progress",
+                        headers={"Retry-After": "1"},
+                    )
+                return _replay(record)
+
+            try:
+                result = await handler()
+            except BaseException:
+                await store.release(full_key)
+                raise
+
+            await store.complete(full_key, status_code, jsonable_encoder(result))
+            return result
+    finally:
+        # Only the last user drops the lock; a queued waiter still needs it
+        key_lock.users -= 1
+        if not key_lock.users:
+            del _local_locks[full_key]
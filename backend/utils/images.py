@@ -0,0 +1,279 @@
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from utils.metrics import cache_result, registry
+
+logger = logging.getLogger("images")
+
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", "/tmp/rids-image-cache")
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", os.cpu_count() or 2))
+IMAGE_ALLOWED_HOSTS = [
+    h.strip() for h in
+    os.getenv("IMAGE_ALLOWED_HOSTS", "images.unsplash.com,images.pexels.com").split(",")
+    if h.strip()
+]
+IMAGE_FETCH_TIMEOUT = int(os.getenv("IMAGE_FETCH_TIMEOUT", 15))
+IMAGE_MAX_ORIGINAL_BYTES = int(os.getenv("IMAGE_MAX_ORIGINAL_BYTES", 25 * 1024 * 1024))
+
+IMAGE_WIDTHS = (320, 640, 960, 1280, 1920)
+IMAGE_FORMATS = {"webp": "image/webp", "jpeg": "image/jpeg"}
+IMAGE_QUALITY = {"webp": 80, "jpeg": 82}
+
+
+class ImageFetchError(Exception):
+    """Raised when an original cannot be downloaded or decoded."""
+
+
+def snap_width(width: int) -> int:
+    """Round a requested width up to the nearest variant width."""
+    for w in IMAGE_WIDTHS:
+        if width <= w:
+            return w
+    return IMAGE_WIDTHS[-1]
+
+
+def is_allowed_url(url: str) -> bool:
+    parsed = urlparse(url)
+    return parsed.scheme in ("http", "https") and parsed.hostname in IMAGE_ALLOWED_HOSTS
+
+
+def _url_key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def _variant_name(digest: str, width: int, fmt: str) -> str:
+    return os.path.join("variants", digest[:2], f"{digest}-{width}.{fmt}")
+
+
+class _AllowedRedirectHandler(urllib.request.HTTPRedirectHandler):
+    """Follows redirects only to allowed hosts, so an allowed URL cannot bounce elsewhere."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        if not is_allowed_url(newurl):
+            raise ImageFetchError(f"Redirect to disallowed host: {urlparse(newurl).hostname}")
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+# ======================================================
+# PROCESS POOL WORKER
+# ======================================================
+def _render_variants(url: str, cache_dir: str) -> Tuple[str, List[Tuple[str, int]]]:
+    """
+    Download an original once and write every width/format variant.
+    Runs inside the process pool; returns the content digest and the
+    (relative path, size) of each written file.
+    """
+    from PIL import Image
+
+    try:
+        request = urllib.request.Request(url, headers={"User-Agent": "rids-image-proxy"})
+        opener = urllib.request.build_opener(_AllowedRedirectHandler)
+        with opener.open(request, timeout=IMAGE_FETCH_TIMEOUT) as resp:
+            data = resp.read(IMAGE_MAX_ORIGINAL_BYTES + 1)
+    except Exception as e:
+        raise ImageFetchError(f"Failed to fetch original: {e}")
+
+    if len(data) > IMAGE_MAX_ORIGINAL_BYTES:
+        raise ImageFetchError("Original exceeds size limit")
+
+    digest = hashlib.sha256(data).hexdigest()
+
+    try:
+        original = Image.open(BytesIO(data))
+        original.load()
+    except Exception as e:
+        raise ImageFetchError(f"Failed to decode original: {e}")
+
+    if original.mode not in ("RGB", "RGBA"):
+        original = original.convert("RGBA" if "A" in original.getbands() else "RGB")
+
+    written = []
+    for width in IMAGE_WIDTHS:
+        target = min(width, original.width)
+        height = max(1, round(original.height * target / original.width))
+        resized = original.resize((target, height), Image.LANCZOS)
+
+        for fmt in IMAGE_FORMATS:
+            rel = _variant_name(digest, width, fmt)
+            path = os.path.join(cache_dir, rel)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            img = resized.convert("RGB") if fmt == "jpeg" else resized
+            tmp = f"{path}.{os.getpid()}.tmp"
+            img.save(tmp, fmt.upper(), quality=IMAGE_QUALITY[fmt], optimize=True)
+            os.replace(tmp, path)
+            written.append((rel, os.path.getsize(path)))
+
+    # url -> digest pointer, so the same URL is never fetched twice
+    pointer = os.path.join(cache_dir, "urls", _url_key(url))
+    os.makedirs(os.path.dirname(pointer), exist_ok=True)
+    with open(f"{pointer}.tmp", "w") as f:
+        f.write(digest)
+    os.replace(f"{pointer}.tmp", pointer)
+
+    return digest, written
+
+
+# ======================================================
+# DISK CACHE (CONTENT ADDRESSED, SIZE-BOUNDED LRU)
+# ======================================================
+class VariantCache:
+    """
+    Variants live under ``variants/<digest>-<width>.<fmt>`` where digest is
+    the sha256 of the original bytes, so two URLs serving the same picture
+    share one set of files. Least recently served files are evicted once the
+    total size passes ``max_bytes``.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _load(self):
+        if self._loaded:
+            return
+        found = []
+        variants_dir = os.path.join(self.root, "variants")
+        for dirpath, _, filenames in os.walk(variants_dir):
+            for name in filenames:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(dirpath, name)
+                st = os.stat(path)
+                found.append((st.st_mtime, os.path.relpath(path, self.root), st.st_size))
+        for _, rel, size in sorted(found):
+            self._entries[rel] = size
+            self._total += size
+        self._loaded = True
+
+    def digest_for(self, url: str) -> Optional[str]:
+        try:
+            with open(os.path.join(self.root, "urls", _url_key(url))) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def lookup(self, digest: str, width: int, fmt: str) -> Optional[str]:
+        rel = _variant_name(digest, width, fmt)
+        with self._lock:
+            self._load()
+            if rel not in self._entries:
+                return None
+            self._entries.move_to_end(rel)
+        path = os.path.join(self.root, rel)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._total -= self._entries.pop(rel, 0)
+            return None
+        return path
+
+    def add(self, written: List[Tuple[str, int]]):
+        with self._lock:
+            self._load()
+            for rel, size in written:
+                self._total += size - self._entries.pop(rel, 0)
+                self._entries[rel] = size
+            self._evict()
+
+    def _evict(self):
+        while self._total > self.max_bytes and self._entries:
+            rel, size = self._entries.popitem(last=False)
+            self._total -= size
+            try:
+                os.remove(os.path.join(self.root, rel))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            self._load()
+            return {"files": len(self._entries), "bytes": self._total, "max_bytes": self.max_bytes}
+
+
+# ======================================================
+# PROXY
+# ======================================================
+class ImageProxy:
+    def __init__(self, cache: VariantCache, workers: int):
+        self.cache = cache
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    async def _render(self, url: str) -> str:
+        # Concurrent misses for one URL share a single fetch + render
+        pending = self._inflight.get(url)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[url] = future
+        try:
+            digest, written = await loop.run_in_executor(
+                self._get_pool(), _render_variants, url, self.cache.root
+            )
+            self.cache.add(written)
+            future.set_result(digest)
+            return digest
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure is not logged twice
+            future.exception()
+            raise
+        finally:
+            if not future.done():
+                # The leader was cancelled; followers fail instead of waiting forever
+                future.set_exception(ImageFetchError("Render was cancelled"))
+                future.exception()
+            self._inflight.pop(url, None)
+
+    async def get_variant(self, url: str, width: int, fmt: str) -> str:
+        """Return a filesystem path for the requested variant, rendering on a miss."""
+        width = snap_width(width)
+
+        digest = self.cache.digest_for(url)
+        if digest:
+            path = self.cache.lookup(digest, width, fmt)
+            if path:
+                cache_result("images", hit=True)
+                return path
+
+        cache_result("images", hit=False)
+        digest = await self._render(url)
+        path = self.cache.lookup(digest, width, fmt)
+        if not path:
+            raise ImageFetchError("Variant evicted before it could be served")
+        return path
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+image_proxy = ImageProxy(VariantCache(IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES), IMAGE_WORKERS)
+registry.callback_gauge(
+    "image_cache_bytes", "Bytes of resized variants on disk.", lambda: image_proxy.cache.stats()["bytes"]
+)
@@ -0,0 +1,328 @@
+"""
+Durable background jobs stored in the ``jobs`` collection.
+
+``enqueue`` inserts a job; workers claim the most urgent runnable one with a
+single ``find_one_and_update`` that also sets a lease. A worker that dies
+mid-job simply stops renewing its lease, and the job becomes claimable again
+once the lease runs out, so work survives restarts and deploys. Failures are
+retried with exponential backoff until ``max_attempts``; a job whose lease
+ran out on its last attempt is swept to ``failed``.
+
+Workers run inside the app (JOBS_WORKERS > 0) or on their own:
+
+    cd backend
+    python -m worker --concurrency 4
+"""
+import asyncio
+import inspect
+import json
+import logging
+import os
+import random
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+from uuid import uuid4
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from db import get_db, ensure_index
+from repository import PROJECTION
+from utils.metrics import registry
+
+# Enqueue side effects instead of running them inside the request
+JOBS_ENABLED = os.getenv("JOBS_ENABLED", "false").lower() == "true"
+# Worker coroutines started with the app; 0 leaves the work to `python -m worker`
+JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", 0))
+JOBS_LEASE_SECONDS = int(os.getenv("JOBS_LEASE_SECONDS", 60))
+JOBS_POLL_INTERVAL = float(os.getenv("JOBS_POLL_INTERVAL", 1.0))
+JOBS_MAX_ATTEMPTS = int(os.getenv("JOBS_MAX_ATTEMPTS", 5))
+JOBS_BACKOFF_BASE = float(os.getenv("JOBS_BACKOFF_BASE", 10))
+JOBS_BACKOFF_MAX = float(os.getenv("JOBS_BACKOFF_MAX", 3600))
+
+JOBS = "jobs"
+JOB_STATUSES = ["queued", "running", "succeeded", "failed"]
+MAX_ERROR_LENGTH = 2000
+
+logger = logging.getLogger("jobs")
+
+jobs_processed = registry.counter(
+    "jobs_processed_total", "Job attempts by type and outcome.", ("type", "outcome")
+)
+job_duration = registry.histogram(
+    "job_duration_seconds", "Time spent running one job attempt.", ("type",)
+)
+
+Handler = Callable[[dict], Any]
+HANDLERS: Dict[str, Handler] = {}
+
+
+def job_handler(job_type: str):
+    """
+    Register the function that runs jobs of ``job_type``. It receives the
+    payload; blocking (non-async) handlers run in a thread.
+    """
+    def register(fn: Handler) -> Handler:
+        HANDLERS[job_type] = fn
+        return fn
+    return register
+
+
+async def ensure_job_indexes():
+    await ensure_index(JOBS, "id", unique=True)
+    await ensure_index(JOBS, [("status", 1), ("priority", -1), ("run_at", 1)])
+    await ensure_index(JOBS, [("status", 1), ("lease_until", 1)])
+    await ensure_index(JOBS, "dedupe_key", unique=True, sparse=True)
+
+
+def backoff(attempts: int) -> float:
+    """Seconds before retry number ``attempts``: doubling from the base, capped, with jitter."""
+    delay = min(JOBS_BACKOFF_MAX, JOBS_BACKOFF_BASE * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+# ======================================================
+# PRODUCER SIDE
+# ======================================================
+async def enqueue(
+    job_type: str,
+    payload: Dict[str, Any],
+    priority: int = 0,
+    delay: float = 0,
+    max_attempts: int = JOBS_MAX_ATTEMPTS,
+    dedupe_key: Optional[str] = None,
+) -> dict:
+    """
+    Queue a job; higher ``priority`` runs first. With ``dedupe_key`` a second
+    enqueue of the same work returns the existing job instead.
+    """
+    await ensure_job_indexes()
+    now = datetime.utcnow()
+    job = {
+        "id": str(uuid4()),
+        "type": job_type,
+        "payload": payload,
+        "status": "queued",
+        "priority": priority,
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "run_at": now + timedelta(seconds=delay),
+        "lease_until": None,
+        "locked_by": None,
+        "last_error": None,
+        "created_at": now,
+        "updated_at": now,
+        "finished_at": None,
+    }
+    if dedupe_key:
+        job["dedupe_key"] = dedupe_key
+
+    try:
+        await get_db()[JOBS].insert_one(job)
+    except DuplicateKeyError:
+        return await get_db()[JOBS].find_one({"dedupe_key": dedupe_key}, PROJECTION)
+    job.pop("_id", None)
+    wake_local_workers()
+    return job
+
+
+# ======================================================
+# WORKER SIDE
+# ======================================================
+async def claim(worker_id: str, types: Optional[List[str]] = None) -> Optional[dict]:
+    """Atomically take the most urgent runnable job, or one whose lease has expired."""
+    now = datetime.utcnow()
+    query: Dict[str, Any] = {"$or": [
+        {"status": "queued", "run_at": {"$lte": now}},
+        # A job whose worker keeps dying is not handed out forever
+        {"status": "running", "lease_until": {"$lt": now}, "$expr": {"$lt": ["$attempts", "$max_attempts"]}},
+    ]}
+    if types:
+        query["type"] = {"$in": types}
+
+    return await get_db()[JOBS].find_one_and_update(
+        query,
+        {
+            "$set": {
+                "status": "running",
+                "locked_by": worker_id,
+                "lease_until": now + timedelta(seconds=JOBS_LEASE_SECONDS),
+                "updated_at": now,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("priority", -1), ("run_at", 1)],
+        projection=PROJECTION,
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def fail_expired() -> int:
+    """Mark jobs whose worker died during their last attempt as failed; claim skips them."""
+    now = datetime.utcnow()
+    result = await get_db()[JOBS].update_many(
+        {"status": "running", "lease_until": {"$lt": now}, "$expr": {"$gte": ["$attempts", "$max_attempts"]}},
+        {"$set": {
+            "status": "failed",
+            "finished_at": now,
+            "last_error": "Lease expired on the last attempt",
+            "lease_until": None,
+            "locked_by": None,
+            "updated_at": now,
+        }},
+    )
+    if result.modified_count:
+        logger.warning(json.dumps({"jobs_lease_expired": result.modified_count}))
+    return result.modified_count
+
+
+async def _renew_lease(job: dict, worker_id: str):
+    # Long jobs keep their lease; a crashed worker's lease lapses
+    while True:
+        await asyncio.sleep(JOBS_LEASE_SECONDS / 3)
+        await get_db()[JOBS].update_one(
+            {"id": job["id"], "locked_by": worker_id, "status": "running"},
+            {"$set": {"lease_until": datetime.utcnow() + timedelta(seconds=JOBS_LEASE_SECONDS)}},
+        )
+
+
+async def _finish(job: dict, worker_id: str, error: Optional[BaseException]):
+    now = datetime.utcnow()
+    owned = {"id": job["id"], "locked_by": worker_id, "status": "running"}
+    if error is None:
+        update = {"status": "succeeded", "finished_at": now, "last_error": None}
+    elif job["attempts"] >= job["max_attempts"]:
+        update = {"status": "failed", "finished_at": now, "last_error": repr(error)[:MAX_ERROR_LENGTH]}
+    else:
+        update = {
+            "status": "queued",
+            "run_at": now + timedelta(seconds=backoff(job["attempts"])),
+            "last_error": repr(error)[:MAX_ERROR_LENGTH],
+        }
+    update.update({"lease_until": None, "locked_by": None, "updated_at": now})
+    await get_db()[JOBS].update_one(owned, {"$set": update})
+
+
+async def run_job(job: dict, worker_id: str):
+    handler = HANDLERS.get(job["type"])
+    renewer = asyncio.get_running_loop().create_task(_renew_lease(job, worker_id))
+    started = time.perf_counter()
+    error: Optional[BaseException] = None
+    try:
+        if handler is None:
+            raise LookupError(f"No handler for job type '{job['type']}'")
+        if inspect.iscoroutinefunction(handler):
+            await handler(job["payload"])
+        else:
+            await asyncio.to_thread(handler, job["payload"])
+    except Exception as e:
+        error = e
+        logger.warning(json.dumps({
+            "job_failed": job["id"], "type": job["type"], "attempt": job["attempts"], "error": repr(e),
+        }))
+    finally:
+        renewer.cancel()
+
+    job_duration.observe(job["type"], value=time.perf_counter() - started)
+    jobs_processed.inc(job["type"], "ok" if error is None else "error")
+    await _finish(job, worker_id, error)
+
+
+class Worker:
+    """``concurrency`` coroutines that claim and run jobs until stopped."""
+
+    def __init__(self, concurrency: int, types: Optional[List[str]] = None,
+                 poll_interval: float = JOBS_POLL_INTERVAL):
+        self.concurrency = concurrency
+        self.types = types
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:6]}"
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+        self._wake: Optional[asyncio.Event] = None
+        self._swept_at = float("-inf")
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def wake(self):
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _sweep(self):
+        # Once per lease period is enough: a lease cannot expire more often
+        if time.monotonic() - self._swept_at < JOBS_LEASE_SECONDS:
+            return
+        self._swept_at = time.monotonic()
+        try:
+            await fail_expired()
+        except Exception:
+            logger.exception("Sweeping expired jobs failed")
+
+    async def _loop(self):
+        while not self._stopping:
+            await self._sweep()
+            try:
+                job = await claim(self.worker_id, self.types)
+            except Exception:
+                logger.exception("Claiming a job failed")
+                job = None
+
+            if job is None:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await run_job(job, self.worker_id)
+
+    def start(self):
+        if self._tasks:
+            return
+        self._stopping = False
+        self._wake = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._loop()) for _ in range(self.concurrency)]
+        _local_workers.append(self)
+
+    async def stop(self, grace: float = 10):
+        """Stop claiming and give running jobs ``grace`` seconds; the rest are re-leased later."""
+        if not self._tasks:
+            return
+        self._stopping = True
+        self.wake()
+        done, pending = await asyncio.wait(self._tasks, timeout=grace)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks = []
+        if self in _local_workers:
+            _local_workers.remove(self)
+
+
+_local_workers: List[Worker] = []
+
+
+def wake_local_workers():
+    # Jobs enqueued in this process start without waiting for the next poll
+    for worker in _local_workers:
+        worker.wake()
+
+
+worker = Worker(JOBS_WORKERS)
+
+
+# ======================================================
+# STATUS
+# ======================================================
+async def job_counts() -> Dict[str, Dict[str, int]]:
+    """Jobs per type and status."""
+    counts: Dict[str, Dict[str, int]] = {}
+    pipeline = [{"$group": {"_id": {"type": "$type", "status": "$status"}, "count": {"$sum": 1}}}]
+    async for row in get_db()[JOBS].aggregate(pipeline):
+        counts.setdefault(row["_id"]["type"], {})[row["_id"]["status"]] = row["count"]
+    return counts
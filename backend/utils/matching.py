@@ -0,0 +1,241 @@
+"""
+Volunteer-to-program matching.
+
+The free-text ``interest``, ``city`` and ``availability`` of an application
+are normalized into prefixed tokens (``i:education``, ``c:udaipur``,
+``a:weekends``) stored on the volunteer as ``match_tokens``. A multikey index
+on that array is the inverted index: candidates for a program are the
+volunteers holding any of its interest tokens, ranked by how many they share.
+
+The score depends on the program and filters, so no index can order by it.
+A search is ranked once into a list of ids (at most MATCH_RANKING_MAX of
+them) that is kept for MATCH_RANKING_TTL_SECONDS; paging through it only
+fetches the page's documents by ``_id``. A ranking can therefore miss
+applications made, or status changes, during that window.
+
+Applications stored before tokenizing existed get their tokens from the
+``matching.tokens`` warm-up step. After editing SYNONYMS every volunteer has
+to be re-tokenized by hand:
+
+    cd backend
+    python -m utils.matching
+"""
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from db import get_db, ensure_index
+from utils.singleflight import SingleFlight
+
+REINDEX_BATCH = 1000
+MATCH_RANKING_TTL_SECONDS = float(os.getenv("MATCH_RANKING_TTL_SECONDS", 60))
+# Candidates past this rank are never shown; the total still counts them
+MATCH_RANKING_MAX = int(os.getenv("MATCH_RANKING_MAX", 5000))
+MATCH_RANKING_ENTRIES = 64
+# Best candidates first among equal scores
+STATUS_ORDER = ["accepted", "contacted", "new"]
+
+STOPWORDS = {"and", "of", "the", "for", "in", "with", "to", "a", "an", "work", "support", "other",
+             "program", "programme", "project", "initiative"}
+
+# Spellings seen in the volunteer form, program categories and free text,
+# folded onto one token each
+SYNONYMS: Dict[str, str] = {
+    "teaching": "education", "teach": "education", "teacher": "education",
+    "tutoring": "education", "school": "education", "literacy": "education",
+    "healthcare": "health", "medical": "health", "nursing": "health", "doctor": "health",
+    "woman": "women", "girls": "women",
+    "children": "child", "kids": "child",
+    "skill": "skills", "training": "skills", "vocational": "skills", "livelihood": "skills",
+    "outreach": "community",
+    "tribe": "tribal", "adivasi": "tribal",
+    "admin": "administration", "administrative": "administration",
+    "weekday": "weekdays", "weekend": "weekends", "evening": "evenings",
+    "full": "fulltime",
+}
+# Words that only ever qualify another word ("Full Time (3+ months)")
+NOISE = {"time", "months", "month", "3"}
+
+
+def _words(text: Optional[str]) -> List[str]:
+    return [w for w in re.split(r"[^a-z0-9]+", (text or "").lower()) if w]
+
+
+def interest_tokens(text: Optional[str]) -> List[str]:
+    tokens = {SYNONYMS.get(w, w) for w in _words(text) if w not in STOPWORDS and w not in NOISE}
+    return sorted(f"i:{t}" for t in tokens)
+
+
+def city_token(city: Optional[str]) -> Optional[str]:
+    words = _words(city)
+    return f"c:{'-'.join(words)}" if words else None
+
+
+def availability_tokens(text: Optional[str]) -> List[str]:
+    tokens = {SYNONYMS.get(w, w) for w in _words(text) if w not in NOISE}
+    return sorted(f"a:{t}" for t in tokens)
+
+
+def match_tokens(volunteer: dict) -> List[str]:
+    tokens = interest_tokens(volunteer.get("interest")) + availability_tokens(volunteer.get("availability"))
+    city = city_token(volunteer.get("city"))
+    if city:
+        tokens.append(city)
+    return tokens
+
+
+def program_tokens(program: dict) -> List[str]:
+    return sorted(set(interest_tokens(program.get("category")) + interest_tokens(program.get("title"))))
+
+
+async def ensure_matching_indexes():
+    await ensure_index("volunteers", [("match_tokens", 1), ("status", 1)])
+
+
+# ======================================================
+# RANKING
+# ======================================================
+Ranking = Tuple[List[Tuple[object, int]], int]
+
+
+class RankingCache:
+    """LRU of search -> (computed at, [(_id, score)] best first, total)."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Tuple[float, Ranking]]" = OrderedDict()
+        self._flights = SingleFlight("matching")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_or_load(self, key: tuple, loader) -> Ranking:
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+            self._entries.move_to_end(key)
+            return entry[1]
+
+        ranking = await self._flights.do(key, loader)
+        self._entries[key] = (time.monotonic(), ranking)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return ranking
+
+    def clear(self):
+        self._entries.clear()
+
+
+rankings = RankingCache(MATCH_RANKING_TTL_SECONDS, MATCH_RANKING_ENTRIES)
+
+
+async def _rank(query: dict, scored: List[str]) -> Ranking:
+    collection = get_db().volunteers
+    pipeline = [
+        {"$match": query},
+        # Only what the score and the sort read, not the whole application
+        {"$project": {"match_tokens": 1, "status": 1, "created_at": 1}},
+        {"$addFields": {
+            "match_score": {"$size": {"$filter": {
+                "input": "$match_tokens", "cond": {"$in": ["$$this", scored]},
+            }}},
+            "_status_rank": {"$switch": {
+                "branches": [
+                    {"case": {"$eq": ["$status", value]}, "then": rank}
+                    for rank, value in enumerate(STATUS_ORDER)
+                ],
+                "default": len(STATUS_ORDER),
+            }},
+        }},
+        {"$sort": {"match_score": -1, "_status_rank": 1, "created_at": -1}},
+        # Directly after the $sort, so the server keeps a bounded top-k
+        {"$limit": MATCH_RANKING_MAX},
+        {"$project": {"_id": 1, "match_score": 1}},
+    ]
+    ranked = [(doc["_id"], doc["match_score"]) async for doc in collection.aggregate(pipeline)]
+    total = len(ranked)
+    if total >= MATCH_RANKING_MAX:
+        total = await collection.count_documents(query)
+    return ranked, total
+
+
+async def rank_candidates(
+    program: dict,
+    page: int,
+    page_size: int,
+    city: Optional[str] = None,
+    availability: Optional[str] = None,
+    statuses: Iterable[str] = STATUS_ORDER,
+) -> dict:
+    """
+    Volunteers sharing at least one interest token with ``program``, scored by
+    the number of shared tokens; a matching city or availability adds one each.
+    """
+    wanted = program_tokens(program)
+    if not wanted:
+        return {"items": [], "page": page, "page_size": page_size, "total": 0, "tokens": wanted}
+
+    await ensure_matching_indexes()
+    bonus = availability_tokens(availability)
+    if city_token(city):
+        bonus.append(city_token(city))
+
+    statuses = list(statuses)
+    query = {"match_tokens": {"$in": wanted}, "status": {"$in": statuses}}
+    key = (tuple(wanted), tuple(bonus), tuple(statuses))
+    ranked, total = await rankings.get_or_load(key, lambda: _rank(query, wanted + bonus))
+
+    window = ranked[(page - 1) * page_size:page * page_size]
+    scores = dict(window)
+    cursor = get_db().volunteers.find({"_id": {"$in": list(scores)}}, {"match_tokens": 0})
+    docs = {doc.pop("_id"): doc async for doc in cursor}
+    # In rank order; anyone deleted since the ranking was made is skipped
+    items = [{**docs[_id], "match_score": scores[_id]} for _id, _ in window if _id in docs]
+    return {"items": items, "page": page, "page_size": page_size, "total": total, "tokens": wanted}
+
+
+# ======================================================
+# REINDEX
+# ======================================================
+async def reindex(query: Optional[dict] = None) -> int:
+    """Recompute ``match_tokens`` for every volunteer, writing only those that changed."""
+    collection = get_db().volunteers
+    await ensure_matching_indexes()
+
+    updated = 0
+    operations = []
+    cursor = collection.find(
+        query or {}, {"_id": 1, "interest": 1, "city": 1, "availability": 1, "match_tokens": 1}
+    ).batch_size(REINDEX_BATCH)
+    async for doc in cursor:
+        tokens = match_tokens(doc)
+        if doc.get("match_tokens") != tokens:
+            operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"match_tokens": tokens}}))
+        if len(operations) >= REINDEX_BATCH:
+            await collection.bulk_write(operations, ordered=False)
+            updated += len(operations)
+            operations = []
+    if operations:
+        await collection.bulk_write(operations, ordered=False)
+        updated += len(operations)
+    return updated
+
+
+async def tokenize_missing() -> int:
+    """Tokenize volunteers stored without ``match_tokens``; a no-op once they all have them."""
+    return await reindex({"match_tokens": {"$exists": False}})
+
+
+def main():
+    updated = asyncio.run(reindex())
+    print(f"Re-tokenized {updated} volunteers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+"""
+Prometheus text-format metrics without a client library.
+
+Recording is a dict lookup plus an add under a lock, cheap enough to leave
+on for every request and every Mongo command.
+"""
+import asyncio
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LOOP_LAG_INTERVAL = float(os.getenv("METRICS_LOOP_LAG_INTERVAL", 0.5))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# ======================================================
+# METRIC TYPES
+# ======================================================
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def total(self) -> float:
+        """Sum across all label values."""
+        with self._lock:
+            return sum(self._values.values())
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels(self.label_names, k)} {_number(v)}" for k, v in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, *labels: str, value: float):
+        with self._lock:
+            self._values[labels] = value
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class CallbackGauge(_Metric):
+    """Gauge read at scrape time, for values owned by another component."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, callback: Callable[[], float]):
+        super().__init__(name, help_text)
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        return self.header() + [f"{self.name} {_number(self.callback())}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, *labels: str, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        lines = self.header()
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def callback_gauge(self, name: str, help_text: str, callback: Callable[[], float]) -> CallbackGauge:
+        return self.register(CallbackGauge(name, help_text, callback))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status")
+)
+http_in_flight = registry.gauge("http_requests_in_flight", "HTTP requests currently being served.")
+http_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency.", ("method", "route", "status")
+)
+component_duration = registry.histogram(
+    "component_duration_seconds", "Time spent in external calls such as smtp, razorpay and bcrypt.",
+    ("component",)
+)
+component_errors = registry.counter(
+    "component_errors_total", "External calls that raised.", ("component",)
+)
+mongo_commands = registry.histogram(
+    "mongo_command_duration_seconds", "MongoDB command round-trip time.", ("command", "outcome")
+)
+mongo_pool_connections = registry.gauge(
+    "mongo_pool_connections", "Open pooled connections per server.", ("address",)
+)
+mongo_pool_checked_out = registry.gauge(
+    "mongo_pool_checked_out", "Connections currently checked out per server.", ("address",)
+)
+mongo_pool_wait = registry.histogram(
+    "mongo_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection.", ("address",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+)
+mongo_pool_checkout_failures = registry.counter(
+    "mongo_pool_checkout_failures_total", "Failed connection checkouts.", ("address", "reason")
+)
+cache_requests = registry.counter(
+    "cache_requests_total", "Cache lookups by cache and result (hit or miss).", ("cache", "result")
+)
+loop_lag = registry.gauge("event_loop_lag_last_seconds", "Most recent event-loop scheduling delay.")
+loop_lag_histogram = registry.histogram(
+    "event_loop_lag_seconds", "Event-loop scheduling delay.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+
+def observe_component(component: str, seconds: float, failed: bool = False):
+    component_duration.observe(component, value=seconds)
+    if failed:
+        component_errors.inc(component)
+
+
+def cache_result(cache: str, hit: bool):
+    cache_requests.inc(cache, "hit" if hit else "miss")
+
+
+# ======================================================
+# MONGO LISTENERS
+# ======================================================
+def _address(event) -> str:
+    host, port = event.address
+    return f"{host}:{port}"
+
+
+class MongoMetricsListener(monitoring.CommandListener, monitoring.ConnectionPoolListener):
+    def __init__(self):
+        # Checkout started/finished fire on the same thread
+        self._checkout = threading.local()
+
+    # Commands
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        mongo_commands.observe(event.command_name, "ok", value=event.duration_micros / 1e6)
+
+    def failed(self, event):
+        mongo_commands.observe(event.command_name, "error", value=event.duration_micros / 1e6)
+
+    # Pool
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        mongo_pool_connections.set(_address(event), value=0)
+        mongo_pool_checked_out.set(_address(event), value=0)
+
+    def connection_created(self, event):
+        mongo_pool_connections.inc(_address(event))
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        mongo_pool_connections.dec(_address(event))
+
+    def connection_check_out_started(self, event):
+        self._checkout.started = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        mongo_pool_checkout_failures.inc(_address(event), str(event.reason))
+        self._checkout.started = None
+
+    def connection_checked_out(self, event):
+        started = getattr(self._checkout, "started", None)
+        if started is not None:
+            mongo_pool_wait.observe(_address(event), value=time.perf_counter() - started)
+            self._checkout.started = None
+        mongo_pool_checked_out.inc(_address(event))
+
+    def connection_checked_in(self, event):
+        mongo_pool_checked_out.dec(_address(event))
+
+
+mongo_metrics_listener = MongoMetricsListener()
+
+
+# ======================================================
+# HTTP MIDDLEWARE
+# ======================================================
+class MetricsMiddleware:
+    """Counts, in-flight and latency per route template; unmatched paths share one label."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_flight.dec()
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            labels = (scope["method"], route, str(status_code))
+            http_requests.inc(*labels)
+            http_duration.observe(*labels, value=elapsed)
+
+
+# ======================================================
+# EVENT LOOP LAG
+# ======================================================
+class LoopLagMonitor:
+    """Sleeps for a fixed interval and records how late it woke up."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            loop_lag.set(value=lag)
+            loop_lag_histogram.observe(value=lag)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+loop_lag_monitor = LoopLagMonitor(LOOP_LAG_INTERVAL)
@@ -0,0 +1,76 @@
+"""
+Newsletter subscriber storage rules.
+
+Subscribers are keyed by lower-cased, trimmed email with a unique index.
+Rows written before that rule can differ only in case, which keeps the
+index from building and hides them from unsubscribe, so they are merged
+once before the index is created:
+
+    cd backend
+    python -m utils.newsletter     # one-time lower-case + dedupe, then index
+"""
+import asyncio
+from datetime import datetime
+from typing import Dict, List
+
+from pymongo import DeleteMany, UpdateOne
+
+from db import get_db, ensure_index
+
+NEWSLETTER = "newsletter"
+MIGRATE_BATCH = 1000
+
+
+def normalize_email(email: str) -> str:
+    """Subscribers are stored and matched by lower-cased, trimmed email."""
+    return email.strip().lower()
+
+
+async def ensure_newsletter_indexes():
+    await ensure_index(NEWSLETTER, "email", unique=True)
+
+
+def _latest(rows: List[dict]) -> dict:
+    return max(rows, key=lambda row: row.get("subscribed_at") or datetime.min)
+
+
+async def migrate() -> Dict[str, int]:
+    """
+    Lower-case every email and keep one row per address: the most recent
+    sign-up, whose status reflects the subscriber's latest choice. Safe to
+    run again; a clean collection is left untouched.
+    """
+    collection = get_db()[NEWSLETTER]
+    groups: Dict[str, List[dict]] = {}
+    async for row in collection.find({}, {"_id": 1, "email": 1, "subscribed_at": 1}):
+        groups.setdefault(normalize_email(row.get("email") or ""), []).append(row)
+
+    deletes, updates = [], []
+    removed = lowered = 0
+    for email, rows in groups.items():
+        keep = _latest(rows)
+        drop = [row["_id"] for row in rows if row is not keep]
+        if drop:
+            deletes.append(DeleteMany({"_id": {"$in": drop}}))
+            removed += len(drop)
+        if keep.get("email") != email:
+            updates.append(UpdateOne({"_id": keep["_id"]}, {"$set": {"email": email}}))
+            lowered += 1
+
+    # Deletes go first so a lower-cased survivor never meets its twin
+    ops = deletes + updates
+    for start in range(0, len(ops), MIGRATE_BATCH):
+        await collection.bulk_write(ops[start:start + MIGRATE_BATCH], ordered=True)
+
+    await ensure_newsletter_indexes()
+    return {"subscribers": len(groups), "lowered": lowered, "removed": removed}
+
+
+def main():
+    result = asyncio.run(migrate())
+    print(f"{result['subscribers']} subscribers: lower-cased {result['lowered']}, "
+          f"removed {result['removed']} duplicates")
+
+
+if __name__ == "__main__":
+    main()
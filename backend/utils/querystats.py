@@ -0,0 +1,313 @@
+"""
+Query-shape statistics and slow-query log from pymongo command monitoring.
+
+A shape is the collection, operation, filter keys and sort keys of a
+command with every value stripped, so ``find({"status": "new"})`` and
+``find({"status": "closed"})`` are counted together.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from copy import deepcopy
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+QUERY_SLOW_MS = float(os.getenv("QUERY_SLOW_MS", 100))
+QUERY_STATS_MAX_SHAPES = int(os.getenv("QUERY_STATS_MAX_SHAPES", 500))
+
+logger = logging.getLogger("slow_query")
+
+# Commands whose filter/sort are worth tracking; everything else (hello,
+# createIndexes, endSessions...) is ignored
+FILTER_FIELD = {
+    "find": "filter",
+    "count": "query",
+    "distinct": "query",
+    "findAndModify": "query",
+}
+TRACKED = set(FILTER_FIELD) | {"aggregate", "update", "delete", "insert", "getMore"}
+EXPLAINABLE = set(FILTER_FIELD) | {"aggregate"}
+SESSION_FIELDS = {"lsid", "$clusterTime", "$db", "txnNumber", "$readPreference", "signature"}
+OTHER_SHAPE = "other"
+MAX_OPEN_CURSORS = 10000
+
+
+def _filter_keys(query: Any, prefix: str = "") -> List[str]:
+    """Field names with their operators, e.g. ``created_at:$lt``; values are dropped."""
+    if not isinstance(query, dict):
+        return []
+    keys = []
+    for field, value in query.items():
+        if field in ("$or", "$and", "$nor") and isinstance(value, list):
+            branches = sorted({",".join(_filter_keys(branch)) for branch in value})
+            keys.append(f"{field}[{' | '.join(branches)}]")
+        elif isinstance(value, dict) and value and all(k.startswith("$") for k in value):
+            keys.append(f"{prefix}{field}:" + "/".join(sorted(value)))
+        else:
+            keys.append(f"{prefix}{field}")
+    return sorted(keys)
+
+
+def _sort_keys(sort: Any) -> List[str]:
+    if not isinstance(sort, dict):
+        return []
+    return [f"{field}:{direction}" for field, direction in sort.items()]
+
+
+def _first_stage(pipeline: List[dict], name: str) -> Any:
+    for stage in pipeline or []:
+        if name in stage:
+            return stage[name]
+    return None
+
+
+def describe(command_name: str, command: dict) -> Optional[Tuple[str, str, List[str], List[str]]]:
+    """(collection, operation, filter keys, sort keys) for a tracked command."""
+    if command_name not in TRACKED or command_name == "getMore":
+        return None
+    collection = command.get(command_name)
+    if not isinstance(collection, str):
+        return None
+
+    if command_name == "aggregate":
+        pipeline = command.get("pipeline", [])
+        filter_keys = _filter_keys(_first_stage(pipeline, "$match"))
+        sort_keys = _sort_keys(_first_stage(pipeline, "$sort"))
+        # count_documents() is an aggregate with $match + $group
+        stages = [next(iter(s)) for s in pipeline]
+        operation = "aggregate[" + ",".join(stages) + "]"
+        return collection, operation, filter_keys, sort_keys
+    if command_name in ("update", "delete"):
+        statements = command.get(f"{command_name}s") or []
+        first = statements[0] if statements else {}
+        return collection, command_name, _filter_keys(first.get("q")), []
+    if command_name == "insert":
+        return collection, "insert", [], []
+    return (
+        collection,
+        command_name,
+        _filter_keys(command.get(FILTER_FIELD[command_name])),
+        _sort_keys(command.get("sort")),
+    )
+
+
+def _redact(value: Any) -> Any:
+    """Keep the structure of a command and replace every literal with '?'."""
+    if isinstance(value, dict):
+        return {k: _redact(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_redact(v) for v in value]
+    return "?"
+
+
+def _returned(command_name: str, reply: dict) -> int:
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        return len(cursor.get("firstBatch") or cursor.get("nextBatch") or [])
+    if command_name in ("count", "update", "delete", "insert"):
+        return int(reply.get("n", 0))
+    if command_name == "distinct":
+        return len(reply.get("values", []))
+    if command_name == "findAndModify":
+        return 1 if reply.get("value") else 0
+    return 0
+
+
+class ShapeStats:
+    __slots__ = (
+        "shape_id", "collection", "operation", "filter", "sort", "count", "total_ms",
+        "max_ms", "slow", "returned", "sample", "explain",
+    )
+
+    def __init__(self, shape_id: str, collection: str, operation: str, filter_keys, sort_keys):
+        self.shape_id = shape_id
+        self.collection = collection
+        self.operation = operation
+        self.filter = filter_keys
+        self.sort = sort_keys
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.slow = 0
+        self.returned = 0
+        # Most recent command of this shape, kept (unredacted) for explain
+        self.sample: Optional[dict] = None
+        self.explain: Optional[dict] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "shape_id": self.shape_id,
+            "collection": self.collection,
+            "operation": self.operation,
+            "filter": self.filter,
+            "sort": self.sort,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "slow": self.slow,
+            "returned": self.returned,
+            "sample": _redact(self.sample) if self.sample else None,
+            "explain": self.explain,
+        }
+
+
+# ======================================================
+# LISTENER
+# ======================================================
+class QueryStatsListener(monitoring.CommandListener):
+    def __init__(self, slow_ms: float, max_shapes: int):
+        self.slow_ms = slow_ms
+        self.max_shapes = max_shapes
+        self._lock = threading.Lock()
+        self._shapes: Dict[str, ShapeStats] = {}
+        # request_id -> (shape, command) between started and succeeded
+        self._pending: Dict[int, Tuple[ShapeStats, dict]] = {}
+        # cursor id -> shape, so getMore batches count toward the original find
+        self._cursors: Dict[int, ShapeStats] = {}
+
+    def _shape_for(self, command_name: str, command: dict) -> Optional[ShapeStats]:
+        if command_name == "getMore":
+            return self._cursors.get(command.get("getMore"))
+
+        described = describe(command_name, command)
+        if described is None:
+            return None
+        collection, operation, filter_keys, sort_keys = described
+        key = json.dumps([collection, operation, filter_keys, sort_keys])
+        shape_id = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+        stats = self._shapes.get(shape_id)
+        if stats is None:
+            if len(self._shapes) >= self.max_shapes:
+                # Unbounded shape cardinality would turn this into a memory leak
+                stats = self._shapes.get(OTHER_SHAPE)
+                if stats is None:
+                    stats = self._shapes[OTHER_SHAPE] = ShapeStats(OTHER_SHAPE, "*", "(shape limit reached)", [], [])
+                return stats
+            stats = self._shapes[shape_id] = ShapeStats(shape_id, collection, operation, filter_keys, sort_keys)
+        return stats
+
+    def started(self, event):
+        command_name = event.command_name
+        if command_name not in TRACKED:
+            return
+        with self._lock:
+            stats = self._shape_for(command_name, event.command)
+            if stats is not None:
+                self._pending[event.request_id] = (stats, event.command)
+
+    def succeeded(self, event):
+        self._finish(event, event.reply)
+
+    def failed(self, event):
+        self._finish(event, {})
+
+    def _finish(self, event, reply: dict):
+        with self._lock:
+            pending = self._pending.pop(event.request_id, None)
+        if pending is None:
+            return
+
+        stats, command = pending
+        duration_ms = event.duration_micros / 1000
+        returned = _returned(event.command_name, reply)
+        slow = duration_ms >= self.slow_ms
+
+        with self._lock:
+            # A getMore continues an earlier query rather than starting one
+            if event.command_name != "getMore":
+                stats.count += 1
+            stats.total_ms += duration_ms
+            stats.max_ms = max(stats.max_ms, duration_ms)
+            stats.returned += returned
+            if slow:
+                stats.slow += 1
+            if event.command_name in EXPLAINABLE:
+                stats.sample = {k: v for k, v in command.items() if k not in SESSION_FIELDS}
+            cursor = reply.get("cursor") if isinstance(reply, dict) else None
+            if isinstance(cursor, dict):
+                if cursor.get("id"):
+                    if len(self._cursors) >= MAX_OPEN_CURSORS:
+                        # Cursors closed by killCursors are never seen again
+                        self._cursors.pop(next(iter(self._cursors)))
+                    self._cursors[cursor["id"]] = stats
+                elif event.command_name == "getMore":
+                    self._cursors.pop(command.get("getMore"), None)
+
+        if slow:
+            logger.warning(json.dumps({
+                "slow_query_ms": round(duration_ms, 2),
+                "shape_id": stats.shape_id,
+                "collection": stats.collection,
+                "operation": stats.operation,
+                "filter": stats.filter,
+                "sort": stats.sort,
+                "returned": returned,
+            }))
+
+    # ==================================================
+    # READ SIDE
+    # ==================================================
+    def top(self, limit: int, order_by: str = "total_ms") -> List[Dict[str, Any]]:
+        with self._lock:
+            shapes = [s.to_dict() for s in self._shapes.values()]
+        shapes.sort(key=lambda s: s[order_by], reverse=True)
+        return shapes[:limit]
+
+    def get(self, shape_id: str) -> Optional[ShapeStats]:
+        with self._lock:
+            return self._shapes.get(shape_id)
+
+    def reset(self):
+        with self._lock:
+            self._shapes.clear()
+            self._cursors.clear()
+
+    async def explain(self, database, shape_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Re-run the shape's last command under ``explain`` to get documents
+        examined and the winning plan; the summary is kept on the shape.
+        """
+        stats = self.get(shape_id)
+        if stats is None or not stats.sample:
+            return None
+
+        explained = await database.command(
+            {"explain": deepcopy(stats.sample), "verbosity": "executionStats"}
+        )
+        execution = explained.get("executionStats", {})
+        if not execution and "stages" in explained:
+            # Aggregations report executionStats inside their $cursor stage
+            cursor_stage = explained["stages"][0].get("$cursor", {})
+            execution = cursor_stage.get("executionStats", {})
+            explained = cursor_stage or explained
+        winning = explained.get("queryPlanner", {}).get("winningPlan", {})
+
+        summary = {
+            "docs_examined": execution.get("totalDocsExamined"),
+            "keys_examined": execution.get("totalKeysExamined"),
+            "returned": execution.get("nReturned"),
+            "plan": _plan_stages(winning),
+        }
+        with self._lock:
+            stats.explain = summary
+        return summary
+
+
+def _plan_stages(plan: dict) -> List[str]:
+    """Winning plan flattened to stage names, e.g. ['LIMIT', 'FETCH', 'IXSCAN created_at_-1']."""
+    stages = []
+    while isinstance(plan, dict) and plan:
+        stage = plan.get("stage", "?")
+        if plan.get("indexName"):
+            stage = f"{stage} {plan['indexName']}"
+        stages.append(stage)
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0] or plan.get("queryPlan")
+    return stages
+
+
+query_stats = QueryStatsListener(QUERY_SLOW_MS, QUERY_STATS_MAX_SHAPES)
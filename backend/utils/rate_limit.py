@@ -0,0 +1,200 @@
+import json
+import logging
+import math
+import os
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+from pymongo import ReturnDocument
+
+from db import get_db, ensure_index
+from utils.metrics import registry
+
+RATE_LIMITS_ENABLED = os.getenv("RATE_LIMITS_ENABLED", "true").lower() == "true"
+# "memory" is per process; "mongo" shares buckets between instances
+RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE", "memory")
+# Only behind a proxy that sets X-Forwarded-For; otherwise clients can spoof it
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "false").lower() == "true"
+MAX_MEMORY_BUCKETS = 50000
+
+logger = logging.getLogger("rate_limit")
+
+rate_limited = registry.counter(
+    "rate_limited_total", "Requests rejected by rate limits or concurrency caps.", ("limit", "reason")
+)
+
+
+@dataclass(frozen=True)
+class Limit:
+    """
+    ``per_ip`` requests per minute from one client address (bursts up to
+    ``ip_burst``), ``per_route`` per minute across all clients, and at most
+    ``concurrency`` requests in flight in this process.
+    """
+    per_ip: float
+    ip_burst: int
+    per_route: Optional[float] = None
+    route_burst: int = 0
+    concurrency: Optional[int] = None
+
+
+DEFAULT_LIMITS: Dict[str, Limit] = {
+    # bcrypt costs ~100-300 ms of CPU per attempt
+    "auth.login": Limit(per_ip=10, ip_burst=5, concurrency=8),
+    "donations.create-order": Limit(per_ip=20, ip_burst=10, concurrency=32),
+    "inquiries.create": Limit(per_ip=10, ip_burst=5, per_route=600, route_burst=100, concurrency=32),
+    "volunteers.create": Limit(per_ip=10, ip_burst=5, per_route=600, route_burst=100, concurrency=32),
+    "newsletter.subscribe": Limit(per_ip=10, ip_burst=5, per_route=600, route_burst=100, concurrency=32),
+    "newsletter.unsubscribe": Limit(per_ip=10, ip_burst=5, concurrency=16),
+}
+
+
+def _load_limits() -> Dict[str, Limit]:
+    """Defaults, overridden per name by RATE_LIMITS, e.g. '{"auth.login": {"per_ip": 5}}'."""
+    limits = dict(DEFAULT_LIMITS)
+    overrides = json.loads(os.getenv("RATE_LIMITS", "{}"))
+    for name, fields in overrides.items():
+        limits[name] = replace(limits[name], **fields) if name in limits else Limit(**fields)
+    return limits
+
+
+LIMITS = _load_limits()
+
+
+# ======================================================
+# STORES
+# ======================================================
+class MemoryBucketStore:
+    def __init__(self):
+        # key -> (tokens, last refill, time from empty to full)
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}
+
+    def _prune(self, now: float):
+        # Buckets idle long enough to be full again carry no information
+        for key in [k for k, (_, t, full) in self._buckets.items() if now - t > full]:
+            del self._buckets[key]
+
+    async def take(self, key: str, rate: float, capacity: int) -> Tuple[bool, float]:
+        """Take one token; returns (allowed, seconds until the next token)."""
+        now = time.monotonic()
+        tokens, updated, _ = self._buckets.get(key, (capacity, now, 0))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now, capacity / rate)
+        if len(self._buckets) > MAX_MEMORY_BUCKETS:
+            self._prune(now)
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+
+class MongoBucketStore:
+    """
+    One document per bucket in ``rate_limits``, refilled and decremented by a
+    single pipeline update so concurrent instances cannot double-spend.
+    """
+
+    collection_name = "rate_limits"
+
+    @property
+    def collection(self):
+        return get_db()[self.collection_name]
+
+    async def take(self, key: str, rate: float, capacity: int) -> Tuple[bool, float]:
+        await ensure_index(self.collection_name, "expires_at", expireAfterSeconds=0)
+
+        now = datetime.utcnow()
+        elapsed = {"$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]}
+        refilled = {"$min": [capacity, {"$add": [
+            {"$ifNull": ["$tokens", capacity]}, {"$multiply": [elapsed, rate]}
+        ]}]}
+        doc = await self.collection.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": refilled, "updated_at": now}},
+                {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+                {"$set": {
+                    "tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                    "expires_at": now + timedelta(seconds=capacity / rate),
+                }},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        allowed = doc["allowed"]
+        return allowed, 0.0 if allowed else (1 - doc["tokens"]) / rate
+
+
+store = MongoBucketStore() if RATE_LIMIT_STORE == "mongo" else MemoryBucketStore()
+
+# Requests in flight per limit name, in this process
+_in_flight: Dict[str, int] = {}
+
+
+def client_ip(request: Request) -> str:
+    if RATE_LIMIT_TRUST_PROXY:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def _reject(name: str, reason: str, status_code: int, detail: str, retry_after: float):
+    rate_limited.inc(name, reason)
+    raise HTTPException(
+        status_code=status_code,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+async def _take(name: str, key: str, per_minute: float, burst: int) -> Tuple[bool, float]:
+    try:
+        return await store.take(f"{name}:{key}", per_minute / 60, burst)
+    except Exception:
+        # A limiter outage must not take the forms down with it
+        logger.exception("Rate limit store failed; allowing request")
+        return True, 0.0
+
+
+# ======================================================
+# DEPENDENCY
+# ======================================================
+def rate_limit(name: str):
+    """
+    Dependency enforcing ``LIMITS[name]``: 429 when the client or the route
+    is over its rate, 503 when the route already has ``concurrency``
+    requests in flight. Both carry Retry-After.
+    """
+    async def dependency(request: Request):
+        limit = LIMITS.get(name)
+        if not RATE_LIMITS_ENABLED or limit is None:
+            yield
+            return
+
+        # Shedding happens before any bucket or database work
+        if limit.concurrency and _in_flight.get(name, 0) >= limit.concurrency:
+            _reject(name, "concurrency", status.HTTP_503_SERVICE_UNAVAILABLE,
+                    "Server busy, please retry shortly", 1)
+
+        _in_flight[name] = _in_flight.get(name, 0) + 1
+        try:
+            allowed, retry_after = await _take(name, f"ip:{client_ip(request)}", limit.per_ip, limit.ip_burst)
+            if not allowed:
+                _reject(name, "ip", status.HTTP_429_TOO_MANY_REQUESTS,
+                        "Too many requests, please slow down", retry_after)
+
+            if limit.per_route:
+                allowed, retry_after = await _take(name, "route", limit.per_route, limit.route_burst)
+                if not allowed:
+                    _reject(name, "route", status.HTTP_429_TOO_MANY_REQUESTS,
+                            "Too many requests, please retry shortly", retry_after)
+
+            yield
+        finally:
+            _in_flight[name] -= 1
+
+    return dependency
@@ -0,0 +1,43 @@
+"""
+Coordination between full rebuilds of derived collections and the writes
+that keep them current.
+
+``donation_rollups`` and ``donors`` are rebuilt from ``donations`` into a
+staging collection that is then renamed over the live one, so anything
+written to the live collection meanwhile would be lost. While a rebuild
+is registered here, writers instead mark the donation they changed (so
+the rebuild's scan counts it as it was before the rebuild began) and log
+the change; the rebuild applies the log once it has swapped.
+
+A writer that read "not rebuilding" just before a rebuild registered is
+covered by waiting SETTLE_SECONDS before the scan starts, which assumes a
+status change takes less than that between the check and its write.
+"""
+import asyncio
+import os
+from datetime import datetime
+from typing import Set
+
+from db import get_db
+
+REBUILDS = "rebuilds"
+SETTLE_SECONDS = float(os.getenv("REBUILD_SETTLE_SECONDS", 2))
+
+
+async def active() -> Set[str]:
+    """Names of the rebuilds in progress, read once per write."""
+    return {doc["_id"] async for doc in get_db()[REBUILDS].find({}, {"_id": 1})}
+
+
+async def begin(name: str):
+    await get_db()[REBUILDS].replace_one(
+        {"_id": name}, {"_id": name, "started_at": datetime.utcnow()}, upsert=True
+    )
+    # Writers that checked before the marker existed finish their writes
+    await asyncio.sleep(SETTLE_SECONDS)
+
+
+async def end(name: str):
+    await get_db()[REBUILDS].delete_one({"_id": name})
+    # ... and writers that still saw it finish logging theirs
+    await asyncio.sleep(SETTLE_SECONDS)
@@ -0,0 +1,333 @@
+"""
+80G tax receipts for completed donations that carry a PAN.
+
+``generate`` walks one financial year in batches. Each batch gets receipt
+numbers from a per-year counter (stored on the donations before anything is
+rendered; runs take turns on the counter, so concurrent runs skip none), is
+rendered to PDF across a process pool and written as one zip under
+RECEIPTS_DIR. Only then are the donations marked with the zip they
+live in. An interrupted run is simply started again: donations already in a
+zip are skipped, and the rest re-render under the numbers they were given.
+
+    cd backend
+    python -m utils.receipts --fy 2025-26
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from db import get_db, ensure_index
+from utils.jobs import job_handler
+
+RECEIPTS_DIR = os.getenv("RECEIPTS_DIR", "receipts")
+RECEIPT_WORKERS = int(os.getenv("RECEIPT_WORKERS", os.cpu_count() or 2))
+RECEIPT_BATCH = int(os.getenv("RECEIPT_BATCH", 1000))
+RECEIPT_PREFIX = os.getenv("RECEIPT_PREFIX", "RIDS")
+
+ORG = {
+    "name": os.getenv("RECEIPT_ORG_NAME", "RIDS"),
+    "address": os.getenv("RECEIPT_ORG_ADDRESS", ""),
+    "pan": os.getenv("RECEIPT_ORG_PAN", ""),
+    "registration": os.getenv("RECEIPT_80G_NUMBER", ""),
+}
+
+COUNTERS = "counters"
+# A run that dies while numbering holds the year's counter this long at most
+NUMBERING_LEASE_SECONDS = 60
+NUMBERING_POLL_INTERVAL = 0.2
+# Financial years run April to March in IST; created_at is stored in UTC
+IST_OFFSET = timedelta(hours=5, minutes=30)
+# Fields the renderer needs; keeps what is pickled to the pool small
+RENDER_FIELDS = ("id", "name", "pan", "address", "amount", "payment_id", "created_at", "receipt_no")
+
+logger = logging.getLogger("receipts")
+
+
+def financial_year(when: datetime) -> str:
+    local = when + IST_OFFSET
+    start = local.year if local.month >= 4 else local.year - 1
+    return f"{start}-{str(start + 1)[2:]}"
+
+
+def fy_bounds(fy: str) -> Tuple[datetime, datetime]:
+    """UTC [start, end) of a financial year written as ``2025-26``."""
+    start = int(fy.split("-")[0])
+    return datetime(start, 4, 1) - IST_OFFSET, datetime(start + 1, 4, 1) - IST_OFFSET
+
+
+def member_name(receipt_no: str) -> str:
+    return receipt_no.replace("/", "-") + ".pdf"
+
+
+def eligible_query(fy: str) -> dict:
+    start, end = fy_bounds(fy)
+    return {
+        "status": "completed",
+        "pan": {"$nin": [None, ""]},
+        "created_at": {"$gte": start, "$lt": end},
+    }
+
+
+async def ensure_receipt_indexes():
+    await ensure_index("donations", "receipt_no", unique=True, sparse=True)
+    await ensure_index("donations", [("status", 1), ("created_at", 1)])
+
+
+# ======================================================
+# PDF RENDERING (PROCESS POOL)
+# ======================================================
+_ONES = [
+    "", "One", "Two", "Three", "Four", "Five", "Six", "Seven", "Eight", "Nine", "Ten",
+    "Eleven", "Twelve", "Thirteen", "Fourteen", "Fifteen", "Sixteen", "Seventeen", "Eighteen", "Nineteen",
+]
+_TENS = ["", "", "Twenty", "Thirty", "Forty", "Fifty", "Sixty", "Seventy", "Eighty", "Ninety"]
+
+
+def _below_hundred(n: int) -> str:
+    return _ONES[n] if n < 20 else f"{_TENS[n // 10]} {_ONES[n % 10]}".strip()
+
+
+def _words(n: int) -> str:
+    """Indian numbering: crore, lakh, thousand."""
+    parts = []
+    for value, unit in ((10 ** 7, "Crore"), (10 ** 5, "Lakh"), (1000, "Thousand"), (100, "Hundred")):
+        if n >= value:
+            count = n // value
+            parts.append(f"{_words(count) if count >= 100 else _below_hundred(count)} {unit}")
+            n %= value
+    if n:
+        parts.append(_below_hundred(n))
+    return " ".join(parts)
+
+
+def amount_in_words(amount: float) -> str:
+    rupees, paise = divmod(round(amount * 100), 100)
+    text = f"Rupees {_words(rupees) or 'Zero'}"
+    if paise:
+        text += f" and {_below_hundred(paise)} Paise"
+    return text + " Only"
+
+
+def _pdf_text(text: str) -> str:
+    text = text.encode("latin-1", "replace").decode("latin-1")
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _pdf(lines: List[Tuple[str, int, int, str]]) -> bytes:
+    """A one-page A4 PDF of (font, size, y, text) lines in Helvetica."""
+    content = "\n".join(
+        f"BT /{font} {size} Tf 1 0 0 1 56 {y} Tm ({_pdf_text(text)}) Tj ET"
+        for font, size, y, text in lines
+    ).encode("latin-1")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+        b"/Resources << /Font << /F1 4 0 R /F2 5 0 R >> >> /Contents 6 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+        b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def render_receipt(donation: dict, org: dict) -> bytes:
+    date = (donation["created_at"] + IST_OFFSET).strftime("%d %b %Y")
+    lines = [
+        ("F2", 18, 780, org["name"]),
+        ("F1", 10, 762, org["address"]),
+        ("F1", 10, 748, f"PAN: {org['pan']}    80G Registration: {org['registration']}"),
+        ("F2", 14, 710, "Donation Receipt under Section 80G of the Income Tax Act, 1961"),
+        ("F1", 11, 680, f"Receipt No: {donation['receipt_no']}"),
+        ("F1", 11, 662, f"Date of Donation: {date}"),
+        ("F1", 11, 644, f"Financial Year: {financial_year(donation['created_at'])}"),
+        ("F2", 11, 610, "Received with thanks from"),
+        ("F1", 11, 592, donation["name"]),
+        ("F1", 11, 574, f"PAN: {donation['pan']}"),
+        ("F1", 11, 556, f"Address: {donation.get('address') or '-'}"),
+        ("F2", 11, 522, f"Amount: INR {donation['amount']:,.2f}"),
+        ("F1", 11, 504, amount_in_words(donation["amount"])),
+        ("F1", 11, 486, f"Mode: Online (Razorpay)    Payment ID: {donation.get('payment_id') or '-'}"),
+        ("F1", 11, 468, f"Donation ID: {donation['id']}"),
+        ("F1", 9, 420, "This is a computer-generated receipt and does not require a signature."),
+    ]
+    return _pdf(lines)
+
+
+def render_chunk(donations: List[dict], org: dict) -> List[Tuple[str, bytes]]:
+    """Process pool entry point: (zip member name, PDF) per donation."""
+    return [(member_name(d["receipt_no"]), render_receipt(d, org)) for d in donations]
+
+
+def _write_zip(path: str, files: List[Tuple[str, bytes]]):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Per writer, so concurrent runs building the same zip never share a file
+    temp = f"{path}.{uuid4().hex}.tmp"
+    try:
+        with zipfile.ZipFile(temp, "w", zipfile.ZIP_DEFLATED) as archive:
+            for name, data in files:
+                archive.writestr(name, data)
+        # A crash never leaves a half-written zip behind a recorded receipt
+        os.replace(temp, path)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+
+
+# ======================================================
+# GENERATION
+# ======================================================
+async def _lock_counter(counter_id: str, owner: str):
+    """Take the numbering lease on a year's counter, waiting while another run holds it."""
+    counters = get_db()[COUNTERS]
+    while True:
+        now = datetime.utcnow()
+        try:
+            await counters.update_one(
+                {"_id": counter_id, "$or": [{"locked_until": None}, {"locked_until": {"$lt": now}}]},
+                {"$set": {"locked_by": owner, "locked_until": now + timedelta(seconds=NUMBERING_LEASE_SECONDS)}},
+                upsert=True,
+            )
+            return
+        except DuplicateKeyError:
+            # Held: the upsert tried to create a second counter
+            await asyncio.sleep(NUMBERING_POLL_INTERVAL)
+
+
+async def _numbers(ids: List[str]) -> Dict[str, str]:
+    cursor = get_db().donations.find(
+        {"id": {"$in": ids}, "receipt_no": {"$exists": True}}, {"_id": 0, "id": 1, "receipt_no": 1}
+    )
+    return {d["id"]: d["receipt_no"] async for d in cursor}
+
+
+async def _number(fy: str, docs: List[dict]):
+    """Give numbers to the donations that have none yet, in created_at order."""
+    unnumbered = [d for d in docs if not d.get("receipt_no")]
+    if not unnumbered:
+        return
+    db = get_db()
+    counter_id = f"receipts:{fy}"
+    owner = uuid4().hex
+
+    await _lock_counter(counter_id, owner)
+    try:
+        # A concurrent run may have numbered some of them first; theirs stands
+        numbers = await _numbers([d["id"] for d in unnumbered])
+        todo = [d for d in unnumbered if d["id"] not in numbers]
+        if todo:
+            counter = await db[COUNTERS].find_one_and_update(
+                {"_id": counter_id, "locked_by": owner},
+                {"$inc": {"seq": len(todo)}},
+                return_document=ReturnDocument.AFTER,
+            )
+            if counter is None:
+                raise RuntimeError(f"Lost the numbering lease on {counter_id}")
+            first = counter["seq"] - len(todo) + 1
+            for i, d in enumerate(todo):
+                numbers[d["id"]] = f"{RECEIPT_PREFIX}/{fy}/{first + i:06d}"
+            await db.donations.bulk_write([
+                UpdateOne({"id": d["id"], "receipt_no": {"$exists": False}}, {"$set": {"receipt_no": numbers[d["id"]]}})
+                for d in todo
+            ], ordered=False)
+    finally:
+        await db[COUNTERS].update_one(
+            {"_id": counter_id, "locked_by": owner}, {"$set": {"locked_by": None, "locked_until": None}}
+        )
+
+    for d in unnumbered:
+        d["receipt_no"] = numbers[d["id"]]
+
+
+async def _render(pool: ProcessPoolExecutor, docs: List[dict]) -> List[Tuple[str, bytes]]:
+    loop = asyncio.get_running_loop()
+    size = -(-len(docs) // RECEIPT_WORKERS)
+    chunks = [docs[i:i + size] for i in range(0, len(docs), size)]
+    rendered = await asyncio.gather(*(loop.run_in_executor(pool, render_chunk, chunk, ORG) for chunk in chunks))
+    return [item for chunk in rendered for item in chunk]
+
+
+async def generate(fy: str, root: str = RECEIPTS_DIR) -> Dict[str, int]:
+    await ensure_receipt_indexes()
+    db = get_db()
+    pending = {**eligible_query(fy), "receipt_file": {"$exists": False}}
+    projection = {"_id": 0, **{field: 1 for field in RENDER_FIELDS}}
+    issued = batches = 0
+
+    with ProcessPoolExecutor(max_workers=RECEIPT_WORKERS) as pool:
+        while True:
+            cursor = db.donations.find(pending, projection).sort([("created_at", 1), ("id", 1)]).limit(RECEIPT_BATCH)
+            docs = await cursor.to_list(RECEIPT_BATCH)
+            if not docs:
+                break
+            await _number(fy, docs)
+            files = await _render(pool, docs)
+
+            relative = f"{fy}/{member_name(docs[0]['receipt_no'])[:-4]}.zip"
+            await asyncio.to_thread(_write_zip, os.path.join(root, relative), files)
+            await db.donations.update_many(
+                {"id": {"$in": [d["id"] for d in docs]}},
+                {"$set": {"receipt_file": relative, "receipt_issued_at": datetime.utcnow()}},
+            )
+            issued += len(docs)
+            batches += 1
+            logger.info(json.dumps({"receipts_batch": relative, "receipts": len(docs)}))
+
+    return {"issued": issued, "batches": batches}
+
+
+@job_handler("receipts.generate")
+async def generate_receipts_job(payload: dict):
+    await generate(payload["fy"])
+
+
+def _read_member(path: str, name: str) -> bytes:
+    with zipfile.ZipFile(path) as archive:
+        return archive.read(name)
+
+
+async def read_receipt(donation: dict, root: str = RECEIPTS_DIR) -> Optional[bytes]:
+    """The issued PDF for a donation, or None if its receipt has not been generated."""
+    if not donation.get("receipt_file"):
+        return None
+    try:
+        return await asyncio.to_thread(
+            _read_member, os.path.join(root, donation["receipt_file"]), member_name(donation["receipt_no"])
+        )
+    except (FileNotFoundError, KeyError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate 80G receipts for a financial year")
+    parser.add_argument("--fy", default=financial_year(datetime.utcnow()), help="Financial year, e.g. 2025-26")
+    parser.add_argument("--dir", default=RECEIPTS_DIR, help="Output directory")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    result = asyncio.run(generate(args.fy, root=args.dir))
+    print(f"Issued {result['issued']} receipts for {args.fy} in {result['batches']} batches")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Retention: moves old, finished records out of the hot collections.
+
+Each policy names a collection, a status and an age. Matching documents are
+copied in batches to ``<collection>_archive`` (or to gzipped NDJSON files
+under RETENTION_DIR) and only then deleted, so an interrupted run leaves
+duplicates for the next run to skip, never gaps. Archived records stay
+readable through the list endpoints with ``archived=true``.
+
+    cd backend
+    python -m utils.retention --dry-run
+    python -m utils.retention --only inquiries.closed
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import os
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from pymongo.errors import BulkWriteError
+
+from db import get_db, ensure_index
+from repository import PROJECTION
+
+# "collection" keeps archives queryable with indexes; "file" moves them off the database
+RETENTION_STORE = os.getenv("RETENTION_STORE", "collection")
+RETENTION_DIR = os.getenv("RETENTION_DIR", "archive")
+RETENTION_BATCH = int(os.getenv("RETENTION_BATCH", 500))
+DUPLICATE_KEY = 11000
+
+logger = logging.getLogger("retention")
+
+
+@dataclass(frozen=True)
+class Policy:
+    """Archive ``collection`` documents in ``status`` once ``date_field`` is ``older_than_days`` old."""
+    collection: str
+    status: str
+    older_than_days: int
+    date_field: str = "created_at"
+
+
+DEFAULT_POLICIES: Dict[str, Policy] = {
+    "inquiries.closed": Policy("inquiries", "closed", 180),
+    "inquiries.replied": Policy("inquiries", "replied", 365),
+    "volunteers.rejected": Policy("volunteers", "rejected", 180),
+    "donations.failed": Policy("donations", "failed", 90),
+    # Orders abandoned at checkout; Razorpay expires them long before this
+    "donations.pending": Policy("donations", "pending", 30),
+}
+
+
+def _load_policies() -> Dict[str, Policy]:
+    """Defaults, overridden per name by RETENTION_POLICIES, e.g. '{"inquiries.closed": {"older_than_days": 90}}'."""
+    policies = dict(DEFAULT_POLICIES)
+    overrides = json.loads(os.getenv("RETENTION_POLICIES", "{}"))
+    for name, fields in overrides.items():
+        policies[name] = replace(policies[name], **fields) if name in policies else Policy(**fields)
+    return policies
+
+
+POLICIES = _load_policies()
+
+
+def archive_name(collection: str) -> str:
+    return f"{collection}_archive"
+
+
+# ======================================================
+# STORES
+# ======================================================
+class CollectionArchive:
+    async def write(self, collection: str, docs: List[dict]):
+        target = get_db()[archive_name(collection)]
+        await ensure_index(archive_name(collection), "id", unique=True)
+        await ensure_index(archive_name(collection), [("status", 1), ("created_at", -1)])
+        try:
+            await target.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            # Copied by an earlier run that stopped before deleting
+            if any(err.get("code") != DUPLICATE_KEY for err in e.details.get("writeErrors", [])):
+                raise
+
+    async def find(self, collection: str, query: Dict[str, Any], limit: int) -> List[dict]:
+        cursor = get_db()[archive_name(collection)].find(query, PROJECTION).sort("created_at", -1).limit(limit)
+        return await cursor.to_list(limit)
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    return str(value)
+
+
+def _json_hook(obj):
+    if set(obj) == {"$date"}:
+        return datetime.fromisoformat(obj["$date"])
+    return obj
+
+
+class FileArchive:
+    """One ``<collection>/<timestamp>.ndjson.gz`` segment per batch."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _write_segment(self, collection: str, docs: List[dict]):
+        folder = os.path.join(self.root, collection)
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"{datetime.utcnow():%Y%m%dT%H%M%S%f}.ndjson.gz")
+        with gzip.open(path + ".tmp", "wt", encoding="utf-8") as fh:
+            for doc in docs:
+                fh.write(json.dumps(doc, default=_json_default) + "\n")
+        # Readers never see a half-written segment
+        os.replace(path + ".tmp", path)
+
+    async def write(self, collection: str, docs: List[dict]):
+        docs = [{k: v for k, v in d.items() if k != "_id"} for d in docs]
+        await asyncio.to_thread(self._write_segment, collection, docs)
+
+    def _scan(self, collection: str, query: Dict[str, Any], limit: int) -> List[dict]:
+        folder = os.path.join(self.root, collection)
+        if not os.path.isdir(folder):
+            return []
+        found: Dict[str, dict] = {}
+        # Newest segments first; equality filters only
+        for name in sorted((n for n in os.listdir(folder) if n.endswith(".ndjson.gz")), reverse=True):
+            with gzip.open(os.path.join(folder, name), "rt", encoding="utf-8") as fh:
+                for line in fh:
+                    doc = json.loads(line, object_hook=_json_hook)
+                    if all(doc.get(k) == v for k, v in query.items()):
+                        found.setdefault(doc.get("id"), doc)
+            if len(found) >= limit:
+                break
+        docs = sorted(found.values(), key=lambda d: d.get("created_at") or datetime.min, reverse=True)
+        return docs[:limit]
+
+    async def find(self, collection: str, query: Dict[str, Any], limit: int) -> List[dict]:
+        return await asyncio.to_thread(self._scan, collection, query, limit)
+
+
+store = FileArchive(RETENTION_DIR) if RETENTION_STORE == "file" else CollectionArchive()
+
+
+async def find_archived(collection: str, query: Dict[str, Any], limit: int) -> List[dict]:
+    """Read side of ``archived=true`` on the list endpoints."""
+    return await store.find(collection, query, limit)
+
+
+# ======================================================
+# RUNNER
+# ======================================================
+async def apply_policy(policy: Policy, dry_run: bool = False, now: Optional[datetime] = None) -> int:
+    source = get_db()[policy.collection]
+    await ensure_index(policy.collection, [("status", 1), (policy.date_field, 1)])
+    cutoff = (now or datetime.utcnow()) - timedelta(days=policy.older_than_days)
+    query = {"status": policy.status, policy.date_field: {"$lt": cutoff}}
+
+    if dry_run:
+        return await source.count_documents(query)
+
+    moved = 0
+    while True:
+        docs = await source.find(query).sort("_id", 1).limit(RETENTION_BATCH).to_list(RETENTION_BATCH)
+        if not docs:
+            return moved
+        archived_at = datetime.utcnow()
+        for doc in docs:
+            doc["archived_at"] = archived_at
+        await store.write(policy.collection, docs)
+        result = await source.delete_many({"_id": {"$in": [d["_id"] for d in docs]}})
+        moved += result.deleted_count
+
+
+async def run(names: Optional[List[str]] = None, dry_run: bool = False) -> Dict[str, int]:
+    results = {}
+    for name, policy in POLICIES.items():
+        if names and name not in names:
+            continue
+        results[name] = await apply_policy(policy, dry_run=dry_run)
+        logger.info(json.dumps({"retention": name, "dry_run": dry_run, "documents": results[name]}))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive old records according to the retention policies")
+    parser.add_argument("--only", action="append", choices=sorted(POLICIES), help="Policy to run; repeatable")
+    parser.add_argument("--dry-run", action="store_true", help="Count what would be archived")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.only, dry_run=args.dry_run))
+    verb = "Would archive" if args.dry_run else "Archived"
+    for name, count in results.items():
+        print(f"{verb} {count} documents for {name}")
+
+
+if __name__ == "__main__":
+    main()
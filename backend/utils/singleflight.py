@@ -0,0 +1,53 @@
+"""
+Request coalescing: concurrent calls with the same key share one execution.
+
+The first caller for a key starts the load as its own task; everyone who
+arrives while it runs awaits that task instead of issuing the same query.
+The result, or the exception, is handed to all of them. Each caller waits at
+most ``timeout`` seconds, and a caller timing out or being cancelled does
+not cancel the load for the others.
+"""
+import asyncio
+import json
+import os
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from utils.metrics import registry
+
+SINGLEFLIGHT_TIMEOUT = float(os.getenv("SINGLEFLIGHT_TIMEOUT", 10))
+
+flight_requests = registry.counter(
+    "singleflight_requests_total", "Coalesced calls by flight and role (leader or shared).", ("flight", "role")
+)
+
+
+def query_key(collection: str, query: Optional[dict] = None, **options) -> str:
+    """Key for a read: key order and value types do not split otherwise identical queries."""
+    return json.dumps([collection, query or {}, options], sort_keys=True, default=str)
+
+
+class SingleFlight:
+    def __init__(self, name: str, timeout: float = SINGLEFLIGHT_TIMEOUT):
+        self.name = name
+        self.timeout = timeout
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Marks the exception retrieved even if every waiter timed out
+            task.exception()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda done: self._finished(key, done))
+            flight_requests.inc(self.name, "leader")
+        else:
+            flight_requests.inc(self.name, "shared")
+        return await asyncio.wait_for(asyncio.shield(task), timeout or self.timeout)
@@ -0,0 +1,189 @@
+"""
+Static JSON snapshots of the public content endpoints.
+
+Each list and detail payload is rendered exactly as the API would return it,
+written under SNAPSHOT_DIR with its content hash in the file name (plus a
+precompressed ``.gz`` twin) and recorded in ``manifest.json``. Hashed files
+never change, so a CDN can cache them forever; only the manifest is short
+lived. Unchanged payloads hash to the same name and are not rewritten.
+
+    cd backend
+    python -m utils.snapshots                  # publish everything
+    python -m utils.snapshots programs news    # publish some collections
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Set
+
+from fastapi.encoders import jsonable_encoder
+
+from db import get_db
+from models import Program, News, Story, GalleryImage
+from repository import PROJECTION
+from utils.cache import on_version_bump
+
+# The default is writable on serverless hosts (Vercel) whose code dir is read-only
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "/tmp/rids-snapshots")
+# Publish automatically after admin writes
+SNAPSHOT_PUBLISH = os.getenv("SNAPSHOT_PUBLISH", "false").lower() == "true"
+SNAPSHOT_DEBOUNCE_MS = float(os.getenv("SNAPSHOT_DEBOUNCE_MS", 2000))
+# Superseded files stay this long for clients still holding an older manifest
+SNAPSHOT_RETAIN_SECONDS = int(os.getenv("SNAPSHOT_RETAIN_SECONDS", 3600))
+MANIFEST = "manifest.json"
+
+logger = logging.getLogger("snapshots")
+
+# collection -> (model, list sort field, list size, has detail pages);
+# list sizes are the API's default limits, so a snapshot matches its endpoint
+SOURCES = {
+    "programs": (Program, "created_at", 100, True),
+    "news": (News, "date", 20, True),
+    "stories": (Story, "created_at", 20, True),
+    "gallery": (GalleryImage, "created_at", 50, False),
+}
+
+
+def _encode(payload) -> bytes:
+    return json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode("utf-8")
+
+
+def _write_atomic(path: str, data: bytes):
+    with open(path + ".tmp", "wb") as fh:
+        fh.write(data)
+    os.replace(path + ".tmp", path)
+
+
+def _write_file(root: str, key: str, data: bytes) -> str:
+    """Write ``data`` as ``<key>.<hash>.json`` (+ .gz) and return its relative path."""
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    relative = f"{key}.{digest}.json"
+    path = os.path.join(root, relative)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _write_atomic(path + ".gz", gzip.compress(data, compresslevel=9, mtime=0))
+        # The plain file last: its presence means both are complete
+        _write_atomic(path, data)
+    return relative
+
+
+def read_manifest(root: str = SNAPSHOT_DIR) -> dict:
+    try:
+        with open(os.path.join(root, MANIFEST), "rb") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {"files": {}, "collections": {}}
+
+
+def _prune(root: str, keep: Set[str]):
+    cutoff = time.time() - SNAPSHOT_RETAIN_SECONDS
+    for collection in SOURCES:
+        folder = os.path.join(root, collection)
+        if not os.path.isdir(folder):
+            continue
+        for name in os.listdir(folder):
+            relative = f"{collection}/{name[:-3] if name.endswith('.gz') else name}"
+            path = os.path.join(folder, name)
+            if relative not in keep and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+
+
+def _publish_files(root: str, rendered: Dict[str, Dict[str, bytes]]) -> dict:
+    manifest = read_manifest(root)
+    files = manifest["files"]
+    now = datetime.utcnow().isoformat()
+    for collection, payloads in rendered.items():
+        for key in [k for k in files if k == collection or k.startswith(f"{collection}/")]:
+            del files[key]
+        for key, data in payloads.items():
+            files[key] = _write_file(root, key if "/" in key else f"{collection}/list", data)
+        manifest["collections"][collection] = {"published_at": now, "files": len(payloads)}
+    manifest["generated_at"] = now
+
+    os.makedirs(root, exist_ok=True)
+    _write_atomic(os.path.join(root, MANIFEST), _encode(manifest))
+    _prune(root, set(files.values()))
+    return manifest
+
+
+async def render(collection: str) -> Dict[str, bytes]:
+    """Manifest key -> payload bytes: ``<collection>`` for the list, ``<collection>/<id>`` per record."""
+    model, sort_field, size, has_detail = SOURCES[collection]
+    docs = await get_db()[collection].find({}, PROJECTION).sort(sort_field, -1).to_list(None)
+    records = [model(**doc) for doc in docs]
+
+    payloads = {collection: _encode(records[:size])}
+    if has_detail:
+        for record in records:
+            payloads[f"{collection}/{record.id}"] = _encode(record)
+    return payloads
+
+
+# Serializes publishes so two writers never interleave manifest updates
+_publish_lock = asyncio.Lock()
+
+
+async def publish(collections: Optional[Iterable[str]] = None, root: str = SNAPSHOT_DIR) -> dict:
+    names = list(collections or SOURCES)
+    async with _publish_lock:
+        rendered = {name: await render(name) for name in names}
+        manifest = await asyncio.to_thread(_publish_files, root, rendered)
+    logger.info(json.dumps({"snapshots_published": names}))
+    return manifest
+
+
+# ======================================================
+# PUBLISH AFTER WRITES
+# ======================================================
+_pending: Set[str] = set()
+_scheduled: Optional[asyncio.Task] = None
+
+
+async def _publish_pending():
+    global _scheduled
+    # A burst of edits (bulk upload, seeding) becomes one publish
+    await asyncio.sleep(SNAPSHOT_DEBOUNCE_MS / 1000)
+    names = sorted(_pending)
+    _pending.clear()
+    _scheduled = None
+    try:
+        await publish(names)
+    except Exception:
+        logger.exception("Snapshot publish failed for %s", names)
+
+
+def schedule_publish(collection: str):
+    global _scheduled
+    if not SNAPSHOT_PUBLISH or collection not in SOURCES:
+        return
+    _pending.add(collection)
+    if _scheduled is None:
+        _scheduled = asyncio.get_running_loop().create_task(_publish_pending())
+
+
+# Every admin write bumps its collection's cache version
+on_version_bump(schedule_publish)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish static JSON snapshots of public content")
+    parser.add_argument("collections", nargs="*", help=f"Any of {', '.join(SOURCES)}; default: all")
+    parser.add_argument("--dir", default=SNAPSHOT_DIR, help="Output directory")
+    args = parser.parse_args()
+    unknown = set(args.collections) - set(SOURCES)
+    if unknown:
+        parser.error(f"unknown collections: {', '.join(sorted(unknown))}")
+
+    manifest = asyncio.run(publish(args.collections or None, root=args.dir))
+    for name, info in sorted(manifest["collections"].items()):
+        print(f"{name}: {info['files']} files, published {info['published_at']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from pymongo import monitoring
+
+from utils.metrics import observe_component
+
+# Server-Timing exposes backend internals; turn off for public traffic if unwanted
+SERVER_TIMING_HEADER = os.getenv("SERVER_TIMING_HEADER", "true").lower() == "true"
+TIMING_LOG = os.getenv("TIMING_LOG", "true").lower() == "true"
+
+logger = logging.getLogger("timing")
+logger.setLevel(logging.INFO)
+if TIMING_LOG and not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.propagate = False
+
+
+class RequestTimings:
+    """Milliseconds and call counts per component for one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        # Mongo events arrive on Motor's executor threads
+        self._lock = threading.Lock()
+
+    def add(self, name: str, duration_ms: float):
+        with self._lock:
+            self.spans[name] = self.spans.get(name, 0.0) + duration_ms
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self) -> str:
+        parts = [f"app;dur={self.elapsed_ms():.1f}"]
+        with self._lock:
+            for name, duration in self.spans.items():
+                parts.append(f'{name};dur={duration:.1f};desc="calls={self.counts[name]}"')
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str):
+    """Time a block for the metrics and, inside a request, for its timings."""
+    timings = _current.get()
+    started = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        observe_component(name, elapsed, failed)
+        if timings is not None:
+            timings.add(name, elapsed * 1000)
+
+
+class MongoTimingListener(monitoring.CommandListener):
+    """Adds every command's server round-trip to the request that issued it."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event)
+
+    def failed(self, event):
+        self._record(event)
+
+    def _record(self, event):
+        timings = _current.get()
+        if timings is not None:
+            timings.add("mongo", event.duration_micros / 1000)
+
+
+mongo_listener = MongoTimingListener()
+
+
+# ======================================================
+# MIDDLEWARE
+# ======================================================
+class TimingMiddleware:
+    """
+    Pure ASGI middleware: streaming responses are passed through untouched.
+
+    The header is written when the response starts, so for streamed bodies it
+    covers the time up to the first chunk; the log line covers the whole request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if SERVER_TIMING_HEADER:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", timings.server_timing().encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            if TIMING_LOG:
+                self._log(scope, status_code, timings)
+
+    @staticmethod
+    def _log(scope, status_code: int, timings: RequestTimings):
+        route = scope.get("route")
+        record = {
+            "method": scope["method"],
+            # Templates keep the label set bounded, e.g. /api/news/{news_id}
+            "route": getattr(route, "path", None) or "unmatched",
+            "status": status_code,
+            "total_ms": round(timings.elapsed_ms(), 2),
+        }
+        for name, duration in timings.spans.items():
+            record[f"{name}_ms"] = round(duration, 2)
+            record[f"{name}_calls"] = timings.counts[name]
+        logger.info(json.dumps(record))
@@ -0,0 +1,166 @@
+"""
+Readiness probe and cold-start warm-up.
+
+At startup ``warmup`` selects a server, opens MONGO_MIN_POOL_SIZE pooled
+connections, creates the indexes the hot paths would otherwise create on
+first use and runs the registered priming steps (public content caches).
+``/ready`` answers 503 until that has finished and while Mongo does not
+answer a ping within READY_PING_TIMEOUT_MS, so a load balancer only sends
+traffic to an instance that can serve it at full speed. ``/`` stays the
+cheap liveness check.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from db import get_db, MONGO_MIN_POOL_SIZE, MONGO_MAX_POOL_SIZE
+from utils.donors import ensure_donor_indexes
+from utils.jobs import ensure_job_indexes
+from utils.matching import ensure_matching_indexes, tokenize_missing
+from utils.metrics import mongo_pool_connections, mongo_pool_checked_out
+from utils.newsletter import ensure_newsletter_indexes
+from utils.receipts import ensure_receipt_indexes
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+READY_PING_TIMEOUT_MS = float(os.getenv("READY_PING_TIMEOUT_MS", 1000))
+# Pause between connection attempts while Mongo is unreachable at startup
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", 2))
+
+logger = logging.getLogger("warmup")
+
+Step = Callable[[], Awaitable]
+STEPS: Dict[str, Step] = {
+    "indexes.jobs": ensure_job_indexes,
+    "indexes.donors": ensure_donor_indexes,
+    "indexes.matching": ensure_matching_indexes,
+    "matching.tokens": tokenize_missing,
+    "indexes.receipts": ensure_receipt_indexes,
+    "indexes.newsletter": ensure_newsletter_indexes,
+}
+
+
+def warmup_step(name: str):
+    """Register a coroutine to run once Mongo is connected, e.g. to prime a cache."""
+    def register(fn: Step) -> Step:
+        STEPS[name] = fn
+        return fn
+    return register
+
+
+async def ping(timeout: float) -> float:
+    """Round-trip time of a ping in seconds; raises on timeout or error."""
+    started = time.perf_counter()
+    await asyncio.wait_for(get_db().command("ping"), timeout)
+    return time.perf_counter() - started
+
+
+class WarmUp:
+    def __init__(self):
+        self.state = "pending"
+        self.seconds: Optional[float] = None
+        self.steps: Dict[str, dict] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def done(self) -> bool:
+        # A failed warm-up is finished too: it costs latency, and /ready still pings Mongo
+        return self.state in ("done", "failed")
+
+    async def _connect(self):
+        while True:
+            try:
+                await get_db().command("ping")
+                break
+            except Exception as e:
+                logger.warning(f"Mongo not reachable yet, retrying in {WARMUP_RETRY_SECONDS}s: {e}")
+                await asyncio.sleep(WARMUP_RETRY_SECONDS)
+        # Concurrent pings each need their own connection, so the pool is
+        # filled now instead of by the first requests
+        results = await asyncio.gather(
+            *(get_db().command("ping") for _ in range(MONGO_MIN_POOL_SIZE)), return_exceptions=True
+        )
+        failed = [r for r in results if isinstance(r, Exception)]
+        if failed:
+            # Only an optimization: the pool fills on demand instead
+            logger.warning(f"{len(failed)} of {MONGO_MIN_POOL_SIZE} pool-filling pings failed: {failed[0]!r}")
+
+    async def _run_step(self, name: str, fn: Step):
+        started = time.perf_counter()
+        try:
+            await fn()
+            self.steps[name] = {"ok": True}
+        except Exception as e:
+            # A failed step costs the first request some latency, not availability
+            self.steps[name] = {"ok": False, "error": repr(e)}
+            logger.exception("Warm-up step %s failed", name)
+        self.steps[name]["ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    async def run(self):
+        self.state = "running"
+        started = time.perf_counter()
+        try:
+            await self._connect()
+            await asyncio.gather(*(self._run_step(name, fn) for name, fn in STEPS.items()))
+            self.state = "done"
+        except Exception:
+            self.state = "failed"
+            logger.exception("Warm-up failed; serving without it")
+        finally:
+            self.seconds = round(time.perf_counter() - started, 3)
+        logger.info(json.dumps({"warmup_seconds": self.seconds, "state": self.state, "steps": len(self.steps)}))
+
+    def _finished(self, task: asyncio.Task):
+        # Retrieved here so nothing is left for "exception was never retrieved"
+        if not task.cancelled() and task.exception() is not None:
+            self.state = "failed"
+            logger.error("Warm-up task died", exc_info=task.exception())
+
+    def start(self):
+        if not WARMUP_ENABLED:
+            self.state = "done"
+            return
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+            self._task.add_done_callback(self._finished)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def report(self) -> dict:
+        return {"state": self.state, "seconds": self.seconds, "steps": self.steps}
+
+
+warmup = WarmUp()
+
+
+async def readiness() -> dict:
+    """Probe payload; ``ready`` is what the status code is based on."""
+    mongo: dict = {"ok": False}
+    try:
+        mongo["latency_ms"] = round(await ping(READY_PING_TIMEOUT_MS / 1000) * 1000, 1)
+        mongo["ok"] = True
+    except asyncio.TimeoutError:
+        mongo["error"] = f"ping timed out after {READY_PING_TIMEOUT_MS:g}ms"
+    except Exception as e:
+        mongo["error"] = repr(e)
+
+    return {
+        "ready": mongo["ok"] and warmup.done,
+        "mongo": mongo,
+        "pool": {
+            "min_size": MONGO_MIN_POOL_SIZE,
+            "max_size": MONGO_MAX_POOL_SIZE,
+            "connections": int(mongo_pool_connections.total()),
+            "checked_out": int(mongo_pool_checked_out.total()),
+        },
+        "warmup": warmup.report(),
+    }
@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+from fastapi import HTTPException, status
+from pymongo import InsertOne
+from pymongo.errors import BulkWriteError
+
+from db import get_db
+from utils.metrics import registry
+
+logger = logging.getLogger("write_behind")
+
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND", "0") == "1"
+WRITE_BEHIND_MAX_QUEUE = int(os.getenv("WRITE_BEHIND_MAX_QUEUE", 10000))
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", 500))
+WRITE_BEHIND_FLUSH_MS = int(os.getenv("WRITE_BEHIND_FLUSH_MS", 200))
+WRITE_BEHIND_PUT_TIMEOUT = float(os.getenv("WRITE_BEHIND_PUT_TIMEOUT", 2.0))
+
+# Give up on a batch during shutdown after this many failed attempts
+SHUTDOWN_RETRIES = 3
+
+
+class WriteBehindQueue:
+    """
+    Bounded in-process queue of pymongo write operations.
+
+    Handlers hand over an already-validated operation and answer the client
+    straight away; a single flusher task drains the queue into unordered
+    ``bulk_write`` calls per collection once ``batch_size`` operations are
+    waiting or ``flush_ms`` has passed. A full queue makes callers wait up
+    to ``put_timeout`` seconds and then rejects with 503.
+    """
+
+    def __init__(self, enabled: bool, max_size: int, batch_size: int, flush_ms: int, put_timeout: float):
+        self.enabled = enabled
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000
+        self.put_timeout = put_timeout
+        self._queue: asyncio.Queue = None
+        self._task: asyncio.Task = None
+        self._closing = False
+        # Operations taken off the queue but not yet written, by collection
+        self._in_flight: Dict[str, list] = {}
+
+    def _ensure_started(self):
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_size)
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, collection: str, operation) -> None:
+        if self._closing:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is shutting down",
+                headers={"Retry-After": "5"},
+            )
+
+        self._ensure_started()
+        try:
+            await asyncio.wait_for(self._queue.put((collection, operation)), self.put_timeout)
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many submissions, please retry shortly",
+                headers={"Retry-After": "2"},
+            )
+
+    async def insert(self, collection: str, doc: Dict[str, Any]) -> None:
+        await self.submit(collection, InsertOne(doc))
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    # ======================================================
+    # FLUSHER
+    # ======================================================
+    async def _next_batch(self) -> List[Tuple[str, Any]]:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    @staticmethod
+    def _group(batch: List[Tuple[str, Any]]) -> Dict[str, list]:
+        by_collection = defaultdict(list)
+        for collection, op in batch:
+            by_collection[collection].append(op)
+        return dict(by_collection)
+
+    async def _write(self, pending: Dict[str, list], max_attempts: int = None) -> None:
+        """Write ``pending`` collection by collection, removing each once it is done."""
+        db = get_db()
+        while pending:
+            collection, ops = next(iter(pending.items()))
+            attempt = 0
+            while True:
+                attempt += 1
+                try:
+                    await db[collection].bulk_write(ops, ordered=False)
+                    break
+                except BulkWriteError as e:
+                    # Individual rejects (e.g. duplicate keys) are final
+                    logger.error(
+                        "write-behind: %d of %d writes to %s rejected: %s",
+                        len(e.details.get("writeErrors", [])), len(ops), collection,
+                        e.details.get("writeErrors", [])[:5],
+                    )
+                    break
+                except Exception:
+                    if max_attempts and attempt >= max_attempts:
+                        logger.exception(
+                            "write-behind: dropping %d writes to %s: %r",
+                            len(ops), collection, [getattr(op, "_doc", op) for op in ops],
+                        )
+                        break
+                    logger.exception("write-behind: flush to %s failed, retrying", collection)
+                    # Keep retrying; the queue fills up and callers get 503s meanwhile
+                    await asyncio.sleep(min(2 ** attempt * 0.1, 5))
+            del pending[collection]
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            # Kept on the instance so close() can still write it if this
+            # task is cancelled mid-retry
+            self._in_flight = self._group(batch)
+            try:
+                await self._write(self._in_flight)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """Stop accepting writes and flush everything still queued."""
+        self._closing = True
+        if self._task is None:
+            return
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.error("write-behind: %d writes still queued at shutdown", self.pending())
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        # The interrupted batch first, so writes keep their submission order.
+        # A bulk_write cancelled mid-call may already have been applied and
+        # is sent again: shutdown can duplicate such a write, never lose it.
+        leftover = [(collection, op) for collection, ops in self._in_flight.items() for op in ops]
+        self._in_flight = {}
+        while not self._queue.empty():
+            leftover.append(self._queue.get_nowait())
+
+        for start in range(0, len(leftover), self.batch_size):
+            await self._write(self._group(leftover[start:start + self.batch_size]), max_attempts=SHUTDOWN_RETRIES)
+
+
+write_behind = WriteBehindQueue(
+    enabled=WRITE_BEHIND_ENABLED,
+    max_size=WRITE_BEHIND_MAX_QUEUE,
+    batch_size=WRITE_BEHIND_BATCH_SIZE,
+    flush_ms=WRITE_BEHIND_FLUSH_MS,
+    put_timeout=WRITE_BEHIND_PUT_TIMEOUT,
+)
+registry.callback_gauge(
+    "write_behind_pending", "Queued form submissions not yet written.", write_behind.pending
+)
@@ -0,0 +1,47 @@
+"""
+Standalone job worker.
+
+    cd backend
+    python -m worker --concurrency 4
+    python -m worker --types email.send
+
+Stops on SIGINT/SIGTERM after giving running jobs a grace period; anything
+still running then is picked up again once its lease expires.
+"""
+import argparse
+import asyncio
+import logging
+import signal
+
+from utils.jobs import HANDLERS, Worker, JOBS_POLL_INTERVAL
+# Imported for their @job_handler registrations
+import utils.email  # noqa: F401
+import utils.receipts  # noqa: F401
+
+
+async def run(concurrency: int, types, grace: float):
+    worker = Worker(concurrency, types=types, poll_interval=JOBS_POLL_INTERVAL)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    worker.start()
+    print(f"Worker {worker.worker_id} running {concurrency} slots for {', '.join(types or sorted(HANDLERS))}")
+    await stop.wait()
+    await worker.stop(grace=grace)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run background jobs from the jobs collection")
+    parser.add_argument("--concurrency", type=int, default=4, help="Jobs run at once")
+    parser.add_argument("--types", nargs="*", help="Only these job types (default: all registered)")
+    parser.add_argument("--grace", type=float, default=30, help="Seconds to let running jobs finish on shutdown")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run(args.concurrency, args.types, args.grace))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Shared test setup.
+
+The backend is imported from ``backend/`` and talks to an in-memory
+mongomock client, so the suite runs without a MongoDB server. ``async def``
+tests run on a fresh event loop each.
+
+    python -m pytest -q
+"""
+import asyncio
+import inspect
+import os
+import sys
+
+import pytest
+
+BACKEND = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+sys.path.insert(0, BACKEND)
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("TIMING_LOG", "false")
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    if not inspect.iscoroutinefunction(pyfuncitem.obj):
+        return None
+    kwargs = {name: pyfuncitem.funcargs[name] for name in pyfuncitem._fixtureinfo.argnames}
+    asyncio.run(pyfuncitem.obj(**kwargs))
+    return True
+
+
+@pytest.fixture
+def mongo():
+    """A fresh in-memory database behind ``db.get_db()``."""
+    from mongomock_motor import AsyncMongoMockClient
+    import db
+
+    db._client = AsyncMongoMockClient()
+    db._ensured_indexes.clear()
+    yield db.get_db()
+    db._client = None
+    db._ensured_indexes.clear()
+
+
+@pytest.fixture
+def admin_headers():
+    from auth import create_access_token
+    return {"Authorization": f"Bearer {create_access_token({'sub': 'admin@rids.org'})}"}
@@ -0,0 +1,23 @@
+import httpx
+
+from utils import cache
+
+
+async def test_admin_setup_invalidates_cached_users(mongo):
+    import main
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://t") as client:
+        response = await client.post("/api/auth/setup")
+
+    assert response.status_code == 200
+    versions = await mongo[cache.VERSIONS].find_one({"_id": cache.VERSIONS_ID})
+    assert versions["admin_users"] == 1
+
+
+async def test_bump_notifies_listeners(mongo, monkeypatch):
+    bumped = []
+    monkeypatch.setattr(cache, "_bump_listeners", [bumped.append])
+
+    await cache.bump_version("news")
+
+    assert bumped == ["news"]
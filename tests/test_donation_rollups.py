@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+import utils.donation_rollups as donation_rollups
+from utils import rebuilds
+from utils.donation_status import record_donation_created, set_donation_status
+
+
+@pytest.fixture(autouse=True)
+def no_settle(monkeypatch):
+    monkeypatch.setattr(rebuilds, "SETTLE_SECONDS", 0)
+
+
+@pytest.fixture
+def client(mongo):
+    import main
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://t")
+
+
+async def _create(mongo, donation_id, created_at, amount=100):
+    donation = {"id": donation_id, "amount": amount, "type": "general", "status": "pending", "created_at": created_at}
+    await mongo.donations.insert_one(dict(donation))
+    await record_donation_created(donation)
+
+
+async def _buckets(mongo):
+    return {b["_id"]: b async for b in mongo.donation_rollups.find({"period": "month"})}
+
+
+async def test_changes_during_rebuild_survive_the_swap(mongo, monkeypatch):
+    earlier = datetime.utcnow() - timedelta(days=40)
+    for i in range(4):
+        await _create(mongo, f"d{i}", earlier)
+    await set_donation_status({"id": "d0"}, "completed")
+
+    build = donation_rollups._build
+
+    async def build_with_traffic(cutoff):
+        # Writes landing while the rebuild scans
+        await set_donation_status({"id": "d1"}, "completed")
+        await set_donation_status({"id": "d1"}, "failed")
+        await set_donation_status({"id": "d2"}, "failed")
+        await _create(mongo, "late", datetime.utcnow(), amount=50)
+        return await build(cutoff)
+
+    monkeypatch.setattr(donation_rollups, "_build", build_with_traffic)
+    await donation_rollups.rebuild()
+    after_rebuild = await _buckets(mongo)
+
+    monkeypatch.setattr(donation_rollups, "_build", build)
+    await donation_rollups.rebuild()
+
+    assert after_rebuild == await _buckets(mongo)
+    assert await mongo.donation_rollups_deltas.count_documents({}) == 0
+    assert await mongo.donations.count_documents({donation_rollups.BASE_FIELD: {"$exists": True}}) == 0
+    assert await mongo.rebuilds.count_documents({}) == 0
+
+
+async def test_failed_create_does_not_uncount_pending(client, mongo, monkeypatch):
+    import routers.donations as donations
+
+    async def broken(donation):
+        raise RuntimeError("rollups unavailable")
+
+    monkeypatch.setenv("RAZORPAY_KEY_ID", "key")
+    monkeypatch.setenv("RAZORPAY_KEY_SECRET", "secret")
+    monkeypatch.setattr(donations, "record_donation_created", broken)
+    async with client:
+        response = await client.post("/api/donations/create-order", json={
+            "name": "Ann", "email": "ann@example.org", "phone": "9999999999", "amount": 100,
+        })
+
+    assert response.status_code == 500
+    assert (await mongo.donations.find_one({}))["status"] == "failed"
+    for bucket in (await _buckets(mongo)).values():
+        assert bucket.get("pending", {}).get("count", 0) >= 0
+
+
+async def test_webhook_rejects_invalid_json(client, mongo, monkeypatch):
+    import hashlib
+    import hmac
+
+    monkeypatch.setenv("RAZORPAY_WEBHOOK_SECRET", "secret")
+    body = b"not json"
+    signature = hmac.new(b"secret", body, hashlib.sha256).hexdigest()
+    async with client:
+        response = await client.post(
+            "/api/donations/webhook", content=body, headers={"X-Razorpay-Signature": signature}
+        )
+
+    assert response.status_code == 400
@@ -0,0 +1,65 @@
+from datetime import datetime
+
+import pytest
+
+import utils.donors as donors
+from utils import rebuilds
+from utils.donation_status import set_donation_status
+
+
+@pytest.fixture(autouse=True)
+def no_settle(monkeypatch):
+    monkeypatch.setattr(rebuilds, "SETTLE_SECONDS", 0)
+
+
+async def _donors(mongo):
+    return {d["_id"]: d async for d in mongo.donors.find()}
+
+
+async def test_completions_during_backfill_survive_the_swap(mongo, monkeypatch):
+    now = datetime.utcnow()
+    await mongo.donations.insert_many([
+        {"id": f"d{i}", "name": "Ann", "email": "ann@example.org", "phone": "+91 98765 43210",
+         "amount": 100 * (i + 1), "type": "one-time", "status": "pending", "created_at": now}
+        for i in range(3)
+    ])
+    await set_donation_status({"id": "d0"}, "completed")
+
+    build = donors._build
+
+    async def build_with_traffic():
+        await set_donation_status({"id": "d1"}, "completed")
+        return await build()
+
+    monkeypatch.setattr(donors, "_build", build_with_traffic)
+    await donors.backfill()
+    after_backfill = await _donors(mongo)
+
+    monkeypatch.setattr(donors, "_build", build)
+    await donors.backfill()
+
+    assert after_backfill == await _donors(mongo)
+    (donor,) = after_backfill.values()
+    assert (donor["donation_count"], donor["total_amount"]) == (2, 300)
+    assert await mongo.donors_deltas.count_documents({}) == 0
+    assert await mongo.donations.count_documents({donors.DEFERRED_FIELD: {"$exists": True}}) == 0
+    assert await mongo.donations.count_documents({"status": "completed", "donor_id": None}) == 0
+
+
+async def test_donor_detail_is_a_primary_key_lookup(mongo, admin_headers):
+    import httpx
+    import main
+
+    await mongo.donations.insert_one({"id": "d1", "name": "Ann", "email": "ann@example.org", "phone": "9876543210",
+                                      "amount": 500, "type": "one-time", "status": "pending",
+                                      "created_at": datetime.utcnow()})
+    completed = await set_donation_status({"id": "d1"}, "completed")
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://t") as client:
+        found = await client.get(f"/api/donors/{completed['donor_id']}", headers=admin_headers)
+        missing = await client.get("/api/donors/nobody", headers=admin_headers)
+
+    assert found.status_code == 200
+    assert found.json()["total_amount"] == 500
+    assert [d["id"] for d in found.json()["donations"]] == ["d1"]
+    assert missing.status_code == 404
@@ -0,0 +1,43 @@
+import httpx
+import pytest
+from fastapi import HTTPException
+
+import routers.inquiries as inquiries
+from routers.events import _authorize
+from utils.events import events
+
+
+@pytest.fixture
+def client(mongo):
+    import main
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://t")
+
+
+async def test_stream_ticket_opens_only_the_stream(client, admin_headers):
+    async with client:
+        response = await client.post("/api/events/ticket", headers=admin_headers)
+        ticket = response.json()["ticket"]
+        as_api_token = await client.get("/api/inquiries", headers={"Authorization": f"Bearer {ticket}"})
+
+    assert response.status_code == 200
+    _authorize(ticket, None)
+    assert as_api_token.status_code == 401
+    # The admin token itself is not accepted in the query string
+    with pytest.raises(HTTPException):
+        _authorize(admin_headers["Authorization"][len("Bearer "):], None)
+
+
+async def test_failed_insert_publishes_nothing(client, monkeypatch):
+    async def broken(obj):
+        raise RuntimeError("insert failed")
+
+    monkeypatch.setattr(inquiries.inquiries_repo, "create", broken)
+    before = events.last_seq
+    async with client:
+        with pytest.raises(RuntimeError):
+            await client.post("/api/inquiries", json={
+                "name": "Ann", "email": "ann@example.org", "phone": "1", "subject": "Hi", "message": "Hello",
+            })
+
+    assert events.last_seq == before
@@ -0,0 +1,92 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+import utils.idempotency as idempotency
+from utils.idempotency import IN_PROGRESS, MemoryIdempotencyStore, MongoIdempotencyStore, run_idempotent
+
+
+@pytest.fixture(params=["memory", "mongo"])
+def store(request, monkeypatch):
+    if request.param == "memory":
+        store = MemoryIdempotencyStore(ttl_seconds=3600, lease_seconds=60)
+    else:
+        request.getfixturevalue("mongo")
+        store = MongoIdempotencyStore(ttl_seconds=3600, lease_seconds=60)
+    monkeypatch.setattr(idempotency, "store", store)
+    return store
+
+
+async def _age_claim(store, key, seconds):
+    """Pretend the claim on ``key`` was made ``seconds`` ago."""
+    if isinstance(store, MemoryIdempotencyStore):
+        store._records[key]["started"] -= seconds
+    else:
+        started = datetime.utcnow() - timedelta(seconds=seconds)
+        await store.collection.update_one({"_id": key}, {"$set": {"started_at": started}})
+
+
+async def test_concurrent_repeats_run_handler_once(store):
+    calls = 0
+
+    async def handler():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"id": calls}
+
+    results = await asyncio.gather(*(run_idempotent("k", "test", {"a": 1}, handler) for _ in range(5)))
+
+    assert calls == 1
+    assert results[0] == {"id": 1}
+    assert all(r.status_code == 200 and r.headers["Idempotent-Replayed"] == "true" for r in results[1:])
+    assert idempotency._local_locks == {}
+
+
+async def test_crashed_claim_is_taken_over_after_its_lease(store):
+    # A worker claimed the key and died without completing or releasing it
+    assert await store.reserve("test:k", "fp") is None
+
+    assert (await store.reserve("test:k", "fp"))["state"] == IN_PROGRESS
+    await _age_claim(store, "test:k", 61)
+    assert await store.reserve("test:k", "other") is not None
+    assert await store.reserve("test:k", "fp") is None
+    # The takeover renews the lease
+    assert await store.reserve("test:k", "fp") is not None
+
+
+async def test_complete_after_expiry_is_ignored():
+    store = MemoryIdempotencyStore(ttl_seconds=0, lease_seconds=60)
+    await store.reserve("test:k", "fp")
+    store._expire()
+
+    await store.complete("test:k", 200, {"ok": True})
+
+    assert await store.get("test:k") is None
+
+
+async def test_queued_waiter_keeps_the_lock(store):
+    calls = 0
+
+    async def handler():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        raise RuntimeError("boom")
+
+    first = asyncio.ensure_future(run_idempotent("k", "test", {}, handler))
+    await asyncio.sleep(0.01)
+    queued = asyncio.ensure_future(run_idempotent("k", "test", {}, handler))
+    await asyncio.sleep(0.01)
+    key_lock = idempotency._local_locks["test:k"]
+    with pytest.raises(RuntimeError):
+        await first
+
+    # The failed attempt released the key; the queued request still owns the
+    # lock, so a new arrival must find and queue on that same lock
+    assert idempotency._local_locks.get("test:k") is key_lock
+    with pytest.raises(RuntimeError):
+        await queued
+    assert calls == 2
+    assert idempotency._local_locks == {}
@@ -0,0 +1,140 @@
+import asyncio
+import os
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+import httpx
+import pytest
+from PIL import Image
+
+import utils.images as images
+from utils.images import ImageFetchError, ImageProxy, VariantCache
+
+
+def _png(color) -> bytes:
+    out = BytesIO()
+    Image.new("RGB", (400, 300), color).save(out, "PNG")
+    return out.getvalue()
+
+
+RED = _png("red")
+BLUE = _png("blue")
+
+
+class _Origin(BaseHTTPRequestHandler):
+    """Local stand-in for an image host."""
+
+    hits: Counter = Counter()
+
+    def do_GET(self):
+        self.hits[self.path] += 1
+        if self.path in ("/red.png", "/red-copy.png"):
+            self._send(200, RED)
+        elif self.path == "/blue.png":
+            self._send(200, BLUE)
+        elif self.path == "/slow.png":
+            time.sleep(1)
+            self._send(200, RED)
+        elif self.path == "/away.png":
+            self.send_response(302)
+            self.send_header("Location", f"http://localhost:{self.server.server_port}/red.png")
+            self.end_headers()
+        else:
+            self._send(500, b"upstream broke")
+
+    def _send(self, code: int, body: bytes):
+        self.send_response(code)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def origin(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Origin)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    # Only the IP is allowed, so a redirect to "localhost" leaves the allow-list
+    monkeypatch.setattr(images, "IMAGE_ALLOWED_HOSTS", ["127.0.0.1"])
+    _Origin.hits.clear()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+@pytest.fixture
+def proxy(tmp_path):
+    proxy = ImageProxy(VariantCache(str(tmp_path), 512 * 1024 * 1024), workers=2)
+    yield proxy
+    proxy.shutdown()
+
+
+async def test_second_request_is_served_from_cache(origin, proxy):
+    first = await proxy.get_variant(f"{origin}/red.png", 600, "webp")
+    second = await proxy.get_variant(f"{origin}/red.png", 640, "webp")
+
+    assert first == second
+    assert os.path.exists(first)
+    assert _Origin.hits["/red.png"] == 1
+
+
+async def test_identical_originals_share_variants(origin, proxy):
+    first = await proxy.get_variant(f"{origin}/red.png", 320, "jpeg")
+    files = proxy.cache.stats()["files"]
+    second = await proxy.get_variant(f"{origin}/red-copy.png", 320, "jpeg")
+    other = await proxy.get_variant(f"{origin}/blue.png", 320, "jpeg")
+
+    assert first == second
+    assert proxy.cache.stats()["files"] == files * 2
+    assert other != first
+
+
+async def test_concurrent_misses_fetch_once(origin, proxy):
+    paths = await asyncio.gather(*(proxy.get_variant(f"{origin}/slow.png", 320, "webp") for _ in range(5)))
+
+    assert len(set(paths)) == 1
+    assert _Origin.hits["/slow.png"] == 1
+
+
+async def test_followers_fail_when_leader_is_cancelled(origin, proxy):
+    leader = asyncio.ensure_future(proxy.get_variant(f"{origin}/slow.png", 320, "webp"))
+    await asyncio.sleep(0.1)
+    follower = asyncio.ensure_future(proxy.get_variant(f"{origin}/slow.png", 320, "webp"))
+    await asyncio.sleep(0.1)
+    leader.cancel()
+
+    with pytest.raises(ImageFetchError):
+        await asyncio.wait_for(follower, 5)
+
+
+async def test_upstream_error(origin, proxy):
+    with pytest.raises(ImageFetchError):
+        await proxy.get_variant(f"{origin}/missing.png", 320, "webp")
+
+
+async def test_redirect_to_disallowed_host(origin, proxy):
+    with pytest.raises(ImageFetchError, match="disallowed host"):
+        await proxy.get_variant(f"{origin}/away.png", 320, "webp")
+    assert _Origin.hits["/red.png"] == 0
+
+
+async def test_endpoint_rejects_disallowed_host_and_maps_upstream_errors(origin, proxy, monkeypatch):
+    import main
+    import routers.images
+
+    monkeypatch.setattr(routers.images, "image_proxy", proxy)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://t") as client:
+        blocked = await client.get("/api/images", params={"url": "http://example.com/a.png"})
+        broken = await client.get("/api/images", params={"url": f"{origin}/missing.png"})
+        served = await client.get("/api/images", params={"url": f"{origin}/red.png", "w": 320},
+                                  headers={"Accept": "image/webp"})
+
+    assert blocked.status_code == 400
+    assert broken.status_code == 502
+    assert served.status_code == 200
+    assert served.headers["content-type"] == "image/webp"
@@ -0,0 +1,71 @@
+import json
+
+import httpx
+import pytest
+
+from routers.imports import ensure_import_indexes
+
+
+@pytest.fixture
+def client(mongo):
+    import main
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://t")
+
+
+def _image(i, **overrides):
+    return {"id": f"img{i}", "url": f"https://example.org/{i}.jpg", "title": f"Image {i}", "category": "events",
+            **overrides}
+
+
+def _ndjson(*lines):
+    return "\n".join(line if isinstance(line, str) else json.dumps(line) for line in lines).encode()
+
+
+async def _import(client, headers, body, **params):
+    async with client:
+        return await client.post("/api/import/gallery", content=body, params=params, headers=headers)
+
+
+async def test_lines_are_parsed_validated_and_inserted(client, mongo, admin_headers):
+    await ensure_import_indexes()
+    body = _ndjson(_image(1), "", "not json", "[1, 2]", {"id": "bad", "title": "missing url"}, _image(2))
+
+    response = await _import(client, admin_headers, body, batch_size=1)
+
+    report = response.json()
+    assert response.status_code == 200
+    assert (report["lines"], report["inserted"], report["invalid"], report["duplicates"]) == (5, 2, 3, 0)
+    assert [e["line"] for e in report["errors"]] == [3, 4, 5]
+    assert sorted([d["id"] async for d in mongo.gallery.find()]) == ["img1", "img2"]
+
+
+async def test_existing_and_repeated_ids_are_reported_as_duplicates(client, mongo, admin_headers):
+    await ensure_import_indexes()
+    await mongo.gallery.insert_one(_image(1, title="Original"))
+    body = _ndjson(_image(1, title="Replacement"), _image(2), _image(2, title="Again"), _image(3))
+
+    report = (await _import(client, admin_headers, body)).json()
+
+    assert (report["inserted"], report["duplicates"]) == (2, 2)
+    assert {(e["line"], e["id"], e["result"]) for e in report["errors"]} == {(1, "img1", "duplicate"), (3, "img2", "duplicate")}
+    # Duplicates never overwrite the stored record
+    assert (await mongo.gallery.find_one({"id": "img1"}))["title"] == "Original"
+
+
+async def test_error_entries_are_capped(client, mongo, admin_headers):
+    await ensure_import_indexes()
+    body = _ndjson(*["{}"] * 10)
+
+    report = (await _import(client, admin_headers, body, max_errors=3)).json()
+
+    assert report["invalid"] == 10
+    assert len(report["errors"]) == 3
+    assert report["errors_truncated"] is True
+
+
+async def test_import_waits_for_the_id_index(client, mongo, admin_headers):
+    response = await _import(client, admin_headers, _ndjson(_image(1)))
+
+    assert response.status_code == 503
+    assert await mongo.gallery.count_documents({}) == 0
@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+
+import utils.email as email
+from utils.jobs import enqueue, fail_expired
+
+
+async def test_expired_last_attempt_is_failed(mongo):
+    job = await enqueue("test.job", {}, max_attempts=2)
+    # Its worker died during the last attempt
+    await mongo.jobs.update_one({"id": job["id"]}, {"$set": {
+        "status": "running", "attempts": 2, "locked_by": "dead-worker",
+        "lease_until": datetime.utcnow() - timedelta(seconds=1),
+    }})
+    retried = await enqueue("test.job", {}, max_attempts=2)
+    await mongo.jobs.update_one({"id": retried["id"]}, {"$set": {
+        "status": "running", "attempts": 1, "lease_until": datetime.utcnow() - timedelta(seconds=1),
+    }})
+
+    assert await fail_expired() == 1
+
+    stored = await mongo.jobs.find_one({"id": job["id"]})
+    assert stored["status"] == "failed"
+    assert stored["finished_at"] is not None
+    assert (await mongo.jobs.find_one({"id": retried["id"]}))["status"] == "running"
+
+
+async def test_donation_emails_to_the_official_address_are_both_queued(mongo, monkeypatch):
+    monkeypatch.setattr(email, "OFFICIAL_EMAIL", "office@rids.org")
+    donation = {"id": "d1", "name": "RIDS", "email": "office@rids.org", "phone": "1", "amount": 10, "type": "one-time"}
+
+    await email.enqueue_donation_emails(donation)
+
+    assert await mongo.jobs.count_documents({"type": "email.send"}) == 2
@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from utils import matching
+
+
+@pytest.fixture(autouse=True)
+def fresh_rankings():
+    matching.rankings.clear()
+    yield
+    matching.rankings.clear()
+
+
+def _volunteer(id, interest, status="new", city="Udaipur", availability="Weekends", age=0):
+    doc = {"id": id, "name": id, "email": f"{id}@example.org", "phone": "9876543210", "city": city,
+           "interest": interest, "availability": availability, "status": status,
+           "created_at": datetime.utcnow() - timedelta(days=age)}
+    return {**doc, "match_tokens": matching.match_tokens(doc)}
+
+
+def test_tokens_fold_synonyms_and_drop_filler_words():
+    assert matching.interest_tokens("Teaching and Tutoring for Kids") == ["i:child", "i:education"]
+    assert matching.availability_tokens("Full Time (3+ months)") == ["a:fulltime"]
+    assert matching.city_token("  New Delhi ") == "c:new-delhi"
+    assert matching.city_token("") is None
+    assert matching.program_tokens({"category": "Healthcare", "title": "Medical camps for women"}) == [
+        "i:camps", "i:health", "i:women",
+    ]
+
+
+async def test_ranked_by_score_then_status_then_recency(mongo):
+    await mongo.volunteers.insert_many([
+        _volunteer("old-new", "Teaching", age=3),
+        _volunteer("recent-new", "Teaching", age=1),
+        _volunteer("contacted", "Teaching", status="contacted", age=5),
+        _volunteer("two-tokens", "Teaching children", age=9),
+        _volunteer("rejected", "Teaching", status="rejected"),
+        _volunteer("unrelated", "Healthcare"),
+    ])
+    program = {"category": "Education", "title": "Child literacy"}
+
+    result = await matching.rank_candidates(program, 1, 10)
+
+    assert [v["id"] for v in result["items"]] == ["two-tokens", "contacted", "recent-new", "old-new"]
+    assert [v["match_score"] for v in result["items"]] == [2, 1, 1, 1]
+    assert result["total"] == 4
+    assert "match_tokens" not in result["items"][0]
+
+
+async def test_city_and_availability_break_ties(mongo):
+    await mongo.volunteers.insert_many([
+        _volunteer("elsewhere", "Teaching", city="Jaipur"),
+        _volunteer("local", "Teaching", city="Udaipur", age=1),
+    ])
+
+    result = await matching.rank_candidates({"category": "Education", "title": ""}, 1, 10, city="udaipur")
+
+    assert [(v["id"], v["match_score"]) for v in result["items"]] == [("local", 2), ("elsewhere", 1)]
+
+
+async def test_pages_are_cut_from_one_ranking(mongo, monkeypatch):
+    await mongo.volunteers.insert_many([_volunteer(f"v{i}", "Teaching", age=i) for i in range(5)])
+    rankings = []
+    rank = matching._rank
+
+    async def counting_rank(*args):
+        rankings.append(args)
+        return await rank(*args)
+
+    monkeypatch.setattr(matching, "_rank", counting_rank)
+    program = {"category": "Education", "title": ""}
+    pages = [await matching.rank_candidates(program, page, 2) for page in (1, 2, 3)]
+
+    assert [[v["id"] for v in p["items"]] for p in pages] == [["v0", "v1"], ["v2", "v3"], ["v4"]]
+    assert {p["total"] for p in pages} == {5}
+    assert len(rankings) == 1
+
+
+async def test_ranking_is_capped_but_total_is_not(mongo, monkeypatch):
+    monkeypatch.setattr(matching, "MATCH_RANKING_MAX", 3)
+    await mongo.volunteers.insert_many([_volunteer(f"v{i}", "Teaching", age=i) for i in range(5)])
+
+    first = await matching.rank_candidates({"category": "Education", "title": ""}, 1, 10)
+    beyond = await matching.rank_candidates({"category": "Education", "title": ""}, 2, 3)
+
+    assert [v["id"] for v in first["items"]] == ["v0", "v1", "v2"]
+    assert first["total"] == 5
+    assert beyond["items"] == []
+
+
+async def test_warmup_tokenizes_only_volunteers_without_tokens(mongo):
+    untokenized = _volunteer("legacy", "Teaching")
+    del untokenized["match_tokens"]
+    await mongo.volunteers.insert_many([untokenized, _volunteer("current", "Healthcare")])
+
+    assert await matching.tokenize_missing() == 1
+    assert await matching.tokenize_missing() == 0
+    legacy = await mongo.volunteers.find_one({"id": "legacy"})
+    assert legacy["match_tokens"] == ["i:education", "a:weekends", "c:udaipur"]
+
+
+async def test_matches_endpoint(mongo, admin_headers):
+    import main
+
+    await mongo.programs.insert_one({"id": "p1", "title": "Village schools", "category": "Education",
+                                     "description": "", "image": "", "status": "active",
+                                     "created_at": datetime.utcnow(), "updated_at": datetime.utcnow()})
+    await mongo.volunteers.insert_many([
+        _volunteer("accepted", "Teaching", status="accepted"),
+        _volunteer("rejected", "Teaching", status="rejected"),
+    ])
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://t") as client:
+        default = await client.get("/api/volunteers/matches/p1", headers=admin_headers)
+        rejected = await client.get("/api/volunteers/matches/p1?status_filter=rejected", headers=admin_headers)
+        missing = await client.get("/api/volunteers/matches/nope", headers=admin_headers)
+        anonymous = await client.get("/api/volunteers/matches/p1")
+
+    assert default.status_code == 200
+    assert default.json()["tokens"] == ["i:education", "i:schools", "i:village"]
+    assert [v["id"] for v in default.json()["items"]] == ["accepted"]
+    assert [v["id"] for v in rejected.json()["items"]] == ["rejected"]
+    assert missing.status_code == 404
+    assert anonymous.status_code in (401, 403)
@@ -0,0 +1,110 @@
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
+
+import routers.newsletter as newsletter_router
+
+from models import NewsletterCreate
+from routers.newsletter import subscribe
+from utils.newsletter import migrate
+
+SIGNUPS = 3000
+ADDRESSES = 500
+
+
+@pytest.fixture
+def client(mongo):
+    import main
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://t")
+
+
+async def test_migration_lowercases_and_keeps_latest_signup(mongo):
+    now = datetime.utcnow()
+    await mongo.newsletter.insert_many([
+        {"id": "old", "email": "Ann@Example.org", "status": "active", "subscribed_at": now - timedelta(days=30)},
+        {"id": "new", "email": "ann@example.org", "status": "unsubscribed", "subscribed_at": now},
+        {"id": "bob", "email": " BOB@example.org", "status": "active", "subscribed_at": now},
+        {"id": "cat", "email": "cat@example.org", "status": "active", "subscribed_at": now},
+    ])
+
+    assert await migrate() == {"subscribers": 3, "lowered": 1, "removed": 1}
+    rows = {row["id"]: row for row in await mongo.newsletter.find({}, {"_id": 0}).to_list(None)}
+    assert set(rows) == {"new", "bob", "cat"}
+    assert rows["new"]["status"] == "unsubscribed"
+    assert rows["bob"]["email"] == "bob@example.org"
+
+    # Clean data is left alone, and the unique index now exists
+    assert await migrate() == {"subscribers": 3, "lowered": 0, "removed": 0}
+    assert any(index.get("unique") for index in (await mongo.newsletter.index_information()).values())
+
+
+async def test_unsubscribe_finds_migrated_mixed_case_rows(mongo, client):
+    await mongo.newsletter.insert_one(
+        {"id": "ann", "email": "Ann@Example.org", "status": "active", "subscribed_at": datetime.utcnow()}
+    )
+    await migrate()
+
+    async with client:
+        response = await client.post("/api/newsletter/unsubscribe", params={"email": "ANN@example.org"})
+
+    assert response.status_code == 200
+    assert (await mongo.newsletter.find_one({"id": "ann"}))["status"] == "unsubscribed"
+
+
+async def test_repeated_signups_store_one_row_per_address(mongo):
+    # mongomock runs each upsert to completion, so this covers case folding
+    # and repeats; the race itself is staged in the next test
+    emails = [f"{'User' if i % 2 else 'user'}{i % ADDRESSES}@Example.org" for i in range(SIGNUPS)]
+
+    async def sign_up(email):
+        try:
+            await subscribe(NewsletterCreate(email=email))
+            return "created"
+        except HTTPException as e:
+            return e.status_code
+
+    outcomes = Counter(await asyncio.gather(*(sign_up(email) for email in emails)))
+
+    assert outcomes == {"created": ADDRESSES, 400: SIGNUPS - ADDRESSES}
+    rows = await mongo.newsletter.find({}, {"_id": 0, "email": 1}).to_list(None)
+    assert len(rows) == ADDRESSES
+    assert all(row["email"] == row["email"].lower() for row in rows)
+
+
+async def test_losing_an_upsert_race_retries_against_the_winner(mongo, monkeypatch):
+    collection = type(newsletter_router.newsletter_repo.collection)
+    upsert = collection.find_one_and_update
+    calls = 0
+
+    async def racing_upsert(self, *args, **kwargs):
+        # A concurrent sign-up inserts between this upsert's miss and its insert
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            await mongo.newsletter.insert_one(
+                {"id": "winner", "email": "ann@example.org", "status": "active", "subscribed_at": datetime.utcnow()}
+            )
+            raise DuplicateKeyError("E11000 duplicate key error")
+        return await upsert(self, *args, **kwargs)
+
+    monkeypatch.setattr(collection, "find_one_and_update", racing_upsert)
+
+    with pytest.raises(HTTPException) as raised:
+        await subscribe(NewsletterCreate(email="Ann@example.org"))
+
+    assert raised.value.status_code == 400
+    assert calls == 2
+    assert await mongo.newsletter.count_documents({}) == 1
+
+
+async def test_subscribe_builds_the_unique_index_without_warmup(mongo):
+    await subscribe(NewsletterCreate(email="ann@example.org"))
+
+    indexes = (await mongo.newsletter.index_information()).values()
+    assert any(index["key"] == [("email", 1)] and index.get("unique") for index in indexes)
@@ -0,0 +1,128 @@
+import asyncio
+import hashlib
+import hmac
+import json
+from datetime import datetime
+
+import httpx
+
+import utils.receipts as receipts
+
+
+async def test_concurrent_runs_number_without_gaps(mongo, monkeypatch):
+    monkeypatch.setattr(receipts, "NUMBERING_POLL_INTERVAL", 0.01)
+    created = datetime(2025, 6, 1)
+    await mongo.donations.insert_many([{"id": f"d{i}", "created_at": created} for i in range(30)])
+
+    async def run(ids):
+        docs = await mongo.donations.find({"id": {"$in": ids}}, {"_id": 0}).to_list(None)
+        await receipts._number("2025-26", docs)
+        return docs
+
+    # Overlapping batches, as two runs started together would fetch
+    batches = await asyncio.gather(
+        run([f"d{i}" for i in range(20)]),
+        run([f"d{i}" for i in range(10, 30)]),
+        run([f"d{i}" for i in range(5, 25)]),
+    )
+
+    numbers = {d["id"]: d["receipt_no"] async for d in mongo.donations.find({}, {"_id": 0})}
+    assert sorted(numbers.values()) == [f"RIDS/2025-26/{n:06d}" for n in range(1, 31)]
+    assert all(d["receipt_no"] == numbers[d["id"]] for batch in batches for d in batch)
+    counter = await mongo.counters.find_one({"_id": "receipts:2025-26"})
+    assert counter["seq"] == 30 and counter["locked_by"] is None
+
+
+def test_zip_writers_use_their_own_temp_file(tmp_path):
+    path = str(tmp_path / "2025-26" / "batch.zip")
+
+    receipts._write_zip(path, [("a.pdf", b"a")])
+    receipts._write_zip(path, [("b.pdf", b"b")])
+
+    assert sorted(p.name for p in (tmp_path / "2025-26").iterdir()) == ["batch.zip"]
+
+
+class _FakeOrders:
+    def create(self, data):
+        return {"id": f"order_{data['receipt']}", **data}
+
+
+class _FakeRazorpayClient:
+    def __init__(self, auth=None):
+        self.order = _FakeOrders()
+
+
+def _signed(secret, event):
+    body = json.dumps(event).encode()
+    return body, {"X-Razorpay-Signature": hmac.new(secret.encode(), body, hashlib.sha256).hexdigest(),
+                  "Content-Type": "application/json"}
+
+
+async def test_receipt_from_checkout_to_download(mongo, admin_headers, monkeypatch, tmp_path):
+    import main
+    import routers.donations as donations
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(donations.razorpay, "Client", _FakeRazorpayClient)
+    monkeypatch.setenv("RAZORPAY_KEY_ID", "key")
+    monkeypatch.setenv("RAZORPAY_KEY_SECRET", "secret")
+    monkeypatch.setenv("RAZORPAY_WEBHOOK_SECRET", "hook")
+    donor = {"name": "Ann", "email": "ann@example.org", "phone": "9876543210", "amount": 500}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://t") as client:
+        created = []
+        for pan in ("ABCDE1234F", "FGHIJ5678K", None):
+            response = await client.post("/api/donations/create-order",
+                                         json={**donor, "pan": pan, "address": "Udaipur"})
+            assert response.status_code == 201
+            created.append(response.json())
+        for order in created[1:]:
+            body, headers = _signed("hook", {"event": "payment.captured", "payload": {"payment": {"entity": {
+                "id": f"pay_{order['donation_id']}", "order_id": order["order_id"]}}}})
+            assert (await client.post("/api/donations/webhook", content=body, headers=headers)).status_code == 200
+
+        # Only the completed donation with a PAN qualifies
+        fy = receipts.financial_year(datetime.utcnow())
+        assert await receipts.generate(fy) == {"issued": 1, "batches": 1}
+        receipted = await mongo.donations.find_one({"id": created[1]["donation_id"]}, {"_id": 0})
+        assert receipted["pan"] == "FGHIJ5678K" and receipted["address"] == "Udaipur"
+        assert receipted["receipt_file"]
+
+        # The first order completes later; a rerun tops the year up without renumbering
+        body, headers = _signed("hook", {"event": "order.paid", "payload": {"payment": {"entity": {
+            "id": "pay_late", "order_id": created[0]["order_id"]}}}})
+        await client.post("/api/donations/webhook", content=body, headers=headers)
+        assert await receipts.generate(fy) == {"issued": 1, "batches": 1}
+        assert await receipts.generate(fy) == {"issued": 0, "batches": 0}
+        numbers = [d["receipt_no"] async for d in mongo.donations.find({"receipt_no": {"$exists": True}})]
+        assert sorted(numbers) == [f"RIDS/{fy}/000001", f"RIDS/{fy}/000002"]
+        assert await mongo.donations.find_one({"id": created[1]["donation_id"]}, {"_id": 0}) == receipted
+
+        pdf = await client.get(f"/api/donations/{created[1]['donation_id']}/receipt", headers=admin_headers)
+        not_issued = await client.get(f"/api/donations/{created[2]['donation_id']}/receipt", headers=admin_headers)
+
+    assert pdf.status_code == 200
+    assert pdf.headers["content-type"] == "application/pdf"
+    assert pdf.content.startswith(b"%PDF")
+    assert not_issued.status_code == 404
+
+
+async def test_receipts_run_in_process_when_jobs_are_disabled(mongo, admin_headers, monkeypatch):
+    import main
+    import routers.donations as donations
+
+    runs = []
+
+    async def fake_generate(fy):
+        runs.append(fy)
+
+    monkeypatch.setattr(donations, "JOBS_ENABLED", False)
+    monkeypatch.setattr(donations, "generate", fake_generate)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://t") as client:
+        response = await client.post("/api/donations/receipts?fy=2025-26", headers=admin_headers)
+
+    assert response.status_code == 202
+    assert response.json() == {"job_id": None, "fy": "2025-26"}
+    assert runs == ["2025-26"]
+    assert await mongo.jobs.count_documents({}) == 0
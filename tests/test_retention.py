@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from utils import retention
+
+
+@pytest.fixture
+def client(mongo):
+    import main
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://t")
+
+
+@pytest.mark.parametrize("path", ["/api/donations", "/api/inquiries", "/api/volunteers"])
+async def test_archive_requires_admin(client, admin_headers, path):
+    async with client:
+        anonymous = await client.get(path, params={"archived": "true"})
+        admin = await client.get(path, params={"archived": "true"}, headers=admin_headers)
+
+    assert anonymous.status_code in (401, 403)
+    assert admin.status_code == 200
+
+
+NOW = datetime(2026, 6, 1)
+
+
+@pytest.fixture(params=["collection", "file"])
+def archive(request, monkeypatch, tmp_path):
+    store = retention.CollectionArchive() if request.param == "collection" else retention.FileArchive(str(tmp_path))
+    monkeypatch.setattr(retention, "store", store)
+    return store
+
+
+def _doc(id, status, age_days):
+    return {"id": id, "status": status, "created_at": NOW - timedelta(days=age_days)}
+
+
+async def _ids(cursor):
+    return sorted([doc["id"] async for doc in cursor])
+
+
+@pytest.mark.parametrize("name", sorted(retention.DEFAULT_POLICIES))
+async def test_policy_moves_only_old_matching_documents(mongo, archive, name):
+    policy = retention.DEFAULT_POLICIES[name]
+    other_status = "completed" if policy.status != "completed" else "new"
+    await mongo[policy.collection].insert_many([
+        _doc("old", policy.status, policy.older_than_days + 1),
+        _doc("young", policy.status, policy.older_than_days - 1),
+        _doc("other", other_status, policy.older_than_days + 1),
+    ])
+
+    assert await retention.apply_policy(policy, dry_run=True, now=NOW) == 1
+    assert await _ids(mongo[policy.collection].find()) == ["old", "other", "young"]
+
+    assert await retention.apply_policy(policy, now=NOW) == 1
+    assert await _ids(mongo[policy.collection].find()) == ["other", "young"]
+    (archived,) = await retention.find_archived(policy.collection, {"status": policy.status}, 10)
+    assert archived["id"] == "old"
+    assert archived["created_at"] == NOW - timedelta(days=policy.older_than_days + 1)
+    assert "archived_at" in archived
+
+    assert await retention.apply_policy(policy, now=NOW) == 0
+    assert len(await retention.find_archived(policy.collection, {}, 10)) == 1
+
+
+async def test_rerun_after_an_interrupted_run_skips_documents_already_archived(mongo, archive):
+    policy = retention.DEFAULT_POLICIES["inquiries.closed"]
+    await mongo.inquiries.insert_many([_doc("copied", "closed", 365), _doc("pending", "closed", 365)])
+    # The previous run archived one document and stopped before deleting it
+    copied = await mongo.inquiries.find_one({"id": "copied"})
+    await archive.write("inquiries", [copied])
+
+    assert await retention.apply_policy(policy, now=NOW) == 2
+    assert await mongo.inquiries.count_documents({}) == 0
+    archived = await retention.find_archived("inquiries", {}, 10)
+    assert sorted(doc["id"] for doc in archived) == ["copied", "pending"]
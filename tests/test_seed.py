@@ -0,0 +1,27 @@
+import httpx
+
+
+async def test_generate_rebuilds_rollups_and_donors(mongo, admin_headers):
+    import main
+
+    config = {"seed": 7, "donations": 300, "volunteers": 20, "batch_size": 50}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://t") as client:
+        response = await client.post("/api/seed/generate", json=config, headers=admin_headers)
+
+    assert response.status_code == 200
+    assert response.json()["results"] == {"donations": 300, "volunteers": 20}
+
+    completed = await mongo.donations.count_documents({"status": "completed"})
+    monthly = await mongo.donation_rollups.find({"period": "month"}).to_list(None)
+    assert sum(bucket.get("completed", {}).get("count", 0) for bucket in monthly) == completed
+    assert await mongo.donors.count_documents({}) > 0
+    assert await mongo.donations.count_documents({"status": "completed", "donor_id": None}) == 0
+
+
+async def test_generate_requires_admin(mongo):
+    import main
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://t") as client:
+        response = await client.post("/api/seed/generate", json={"donations": 10})
+
+    assert response.status_code in (401, 403)
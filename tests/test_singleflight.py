@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from utils.singleflight import SingleFlight, query_key
+
+
+async def test_concurrent_misses_load_once():
+    flight = SingleFlight("test")
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"rows": [1, 2, 3]}
+
+    results = await asyncio.gather(*(flight.do("k", load) for _ in range(50)))
+
+    assert calls == 1
+    assert all(result is results[0] for result in results)
+    assert len(flight) == 0
+
+
+async def test_error_reaches_every_caller_and_is_not_cached():
+    flight = SingleFlight("test")
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        raise RuntimeError("database down")
+
+    results = await asyncio.gather(*(flight.do("k", load) for _ in range(10)), return_exceptions=True)
+
+    assert calls == 1
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert len(flight) == 0
+
+    async def recovered():
+        return "ok"
+
+    assert await flight.do("k", recovered) == "ok"
+
+
+async def test_timed_out_caller_does_not_cancel_the_load():
+    flight = SingleFlight("test")
+    release = asyncio.Event()
+
+    async def load():
+        await release.wait()
+        return "done"
+
+    patient = asyncio.ensure_future(flight.do("k", load, timeout=5))
+    with pytest.raises(asyncio.TimeoutError):
+        await flight.do("k", load, timeout=0.01)
+    release.set()
+
+    assert await patient == "done"
+
+
+def test_query_key_ignores_key_order():
+    assert query_key("news", {"a": 1, "b": 2}, limit=20) == query_key("news", {"b": 2, "a": 1}, limit=20)
@@ -0,0 +1,48 @@
+from datetime import datetime
+
+import httpx
+import pytest
+
+import routers.snapshots as snapshot_routes
+from utils.snapshots import publish
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot_routes, "SNAPSHOT_DIR", str(tmp_path))
+    return str(tmp_path)
+
+
+async def test_list_snapshot_matches_api_default_limit(mongo, snapshot_dir):
+    import main
+
+    await mongo.news.insert_many([
+        {"id": f"n{i}", "title": f"News {i}", "excerpt": "...", "category": "events", "image": "n.jpg",
+         "date": datetime(2024, 1, 1 + i)}
+        for i in range(25)
+    ])
+    await publish(["news"], root=snapshot_dir)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://t") as client:
+        snapshot = await client.get("/api/snapshots/news")
+
+    # GET /news returns the 20 latest by default
+    assert [item["id"] for item in snapshot.json()] == [f"n{i}" for i in range(24, 4, -1)]
+
+
+async def test_gzip_and_plain_have_distinct_etags(mongo, snapshot_dir):
+    import main
+
+    await publish(["programs"], root=snapshot_dir)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://t") as client:
+        gzipped = await client.get("/api/snapshots/programs", headers={"Accept-Encoding": "gzip"})
+        plain = await client.get("/api/snapshots/programs", headers={"Accept-Encoding": "identity"})
+        revalidated = await client.get(
+            "/api/snapshots/programs",
+            headers={"Accept-Encoding": "identity", "If-None-Match": gzipped.headers["ETag"]},
+        )
+
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert gzipped.headers["ETag"] != plain.headers["ETag"]
+    assert plain.headers["Vary"] == "Accept-Encoding"
+    assert revalidated.status_code == 200
@@ -0,0 +1,46 @@
+import asyncio
+
+import utils.warmup as warmup_module
+from utils.warmup import WarmUp
+
+
+class FlakyDb:
+    """Answers the first ping, then fails every other."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def command(self, name):
+        self.calls += 1
+        if self.calls > 1 and self.calls % 2:
+            raise ConnectionError("pool exhausted")
+        return {"ok": 1}
+
+
+async def test_failed_pool_pings_do_not_stop_warmup(monkeypatch):
+    monkeypatch.setattr(warmup_module, "MONGO_MIN_POOL_SIZE", 4)
+    monkeypatch.setattr(warmup_module, "STEPS", {})
+    db = FlakyDb()
+    monkeypatch.setattr(warmup_module, "get_db", lambda: db)
+
+    warmup = WarmUp()
+    await warmup.run()
+
+    assert warmup.state == "done"
+
+
+async def test_unexpected_failure_ends_in_a_terminal_state(monkeypatch):
+    async def broken(self):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(WarmUp, "_connect", broken)
+    warmup = WarmUp()
+    monkeypatch.setattr(warmup_module, "WARMUP_ENABLED", True)
+    warmup.start()
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+    assert warmup.state == "failed"
+    assert warmup.done
+    assert warmup.report()["seconds"] is not None
+    await warmup.stop()
@@ -0,0 +1,64 @@
+import asyncio
+
+from pymongo import InsertOne
+from pymongo.errors import AutoReconnect
+
+import utils.write_behind as write_behind_module
+from utils.write_behind import WriteBehindQueue
+
+
+class _FlakyCollection:
+    def __init__(self, db):
+        self.db = db
+
+    async def bulk_write(self, ops, ordered):
+        self.db.calls += 1
+        if self.db.down:
+            raise AutoReconnect("primary unavailable")
+        self.db.written.extend(op._doc for op in ops)
+
+
+class _FlakyDatabase:
+    def __init__(self):
+        self.down = False
+        self.calls = 0
+        self.written = []
+
+    def __getitem__(self, name):
+        return _FlakyCollection(self)
+
+
+def _queue(**overrides):
+    options = dict(enabled=True, max_size=100, batch_size=10, flush_ms=10, put_timeout=1)
+    return WriteBehindQueue(**{**options, **overrides})
+
+
+async def test_writes_are_batched(monkeypatch):
+    database = _FlakyDatabase()
+    monkeypatch.setattr(write_behind_module, "get_db", lambda: database)
+    queue = _queue()
+
+    for i in range(25):
+        await queue.insert("inquiries", {"id": i})
+    await queue.close()
+
+    assert [doc["id"] for doc in database.written] == list(range(25))
+    assert database.calls == 3
+
+
+async def test_close_writes_batch_interrupted_mid_retry(monkeypatch):
+    database = _FlakyDatabase()
+    database.down = True
+    monkeypatch.setattr(write_behind_module, "get_db", lambda: database)
+    queue = _queue()
+
+    await queue.insert("inquiries", {"id": "in-flight"})
+    while not database.calls:
+        await asyncio.sleep(0.01)
+    # The flusher now holds the batch and backs off 0.2s before retrying
+    await queue.insert("inquiries", {"id": "queued"})
+    database.down = False
+
+    await queue.close(timeout=0.05)
+
+    assert [doc["id"] for doc in database.written] == ["in-flight", "queued"]